@@ -4,4 +4,18 @@ pigframe
 
 from .world import *
 from .scene import *
-from .action import *
\ No newline at end of file
+from .action import *
+from .storage import *
+from .entity import *
+from .columnar import columnar, is_columnar, ComponentProxy, ColumnarPool, ColumnView, Columns
+from .command import *
+from .query import Query
+from .spatial import SpatialGrid
+from .profiler import Profiler
+from .replay import InputLog
+from .schedule import Schedule, EveryNFrames, FixedRate, OnDemand
+from .executor import ParallelExecutor
+from .pool import WorldPool
+from .registry import PriorityRegistry
+from .snapshot import SnapshotFile
+from .rollback import RollbackBuffer
\ No newline at end of file
@@ -4,3 +4,183 @@ from dataclasses import dataclass
 class ActionMap:
     """Base class for user action map."""
     pass
+
+
+class ActionResults:
+    """Base class of the per-frame results of user actions.
+
+    `make_action_results_type` creates a subclass with one slot per action,
+    so results are updated in place every frame without creating objects.
+    """
+
+    __slots__ = ()
+
+    def __init__(self) -> None:
+        for name in self.__slots__:
+            setattr(self, name, False)
+
+    def as_dict(self) -> dict[str, bool]:
+        """Return action name -> result."""
+        return {name: getattr(self, name) for name in self.__slots__}
+
+    def __eq__(self, other) -> bool:
+        if not isinstance(other, ActionResults):
+            return NotImplemented
+        return self.as_dict() == other.as_dict()
+
+    def __repr__(self) -> str:
+        results = ", ".join(f"{name}={value!r}" for name, value in self.as_dict().items())
+        return f"{type(self).__name__}({results})"
+
+
+def make_action_results_type(names: list[str]) -> type:
+    """Create an `ActionResults` subclass with one slot per action name.
+
+    Parameters
+    ----------
+    names : list[str]
+        action names
+
+    Returns
+    -------
+    _type_
+        type: subclass of ActionResults
+    """
+    return type("EventResults", (ActionResults,), {"__slots__": tuple(names)})
+
+
+# Marks an action polled without argument.
+_NO_ARGUMENT = object()
+
+
+class InputState:
+    """Bitmask state of the actions of an `ActionMap`.
+
+    Each action owns one bit. The current and previous frames' states are integers,
+    so pressed / released edges are two bit operations, and the states of the last
+    `history` frames are kept in a fixed-size ring buffer for input buffering
+    (e.g. "shoot pressed within the last 5 frames").
+
+    Polling is grouped per poll function (device), e.g. `pyxel.btn`:
+    every distinct key is polled once per frame even if several actions share it.
+    """
+
+    def __init__(self, bindings: list[tuple[str, callable, tuple]], history: int = 60) -> None:
+        """Bitmask state of the actions of an `ActionMap`.
+
+        Parameters
+        ----------
+        bindings : list[tuple[str, callable, tuple]]
+            action name, poll function and the arguments (keys) polled for the action.
+            An action without argument calls the poll function without argument.
+        history : int, optional
+            number of frames kept in the ring buffer, by default 60
+        """
+        self.names = [name for name, _, _ in bindings]
+        self.bits = {name: 1 << i for i, name in enumerate(self.names)}
+
+        # Give every distinct (poll function, argument) pair one raw bit, grouped per poll function.
+        devices: dict = {}
+        raw_bits: dict = {}
+        self._action_raw_masks = []
+        for name, poll, args in bindings:
+            keys = devices.setdefault(poll, [])
+            raw_mask = 0
+            for arg in args or (_NO_ARGUMENT,):
+                if (poll, arg) not in raw_bits:
+                    raw_bits[(poll, arg)] = len(raw_bits)
+                    keys.append(arg)
+                raw_mask |= 1 << raw_bits[(poll, arg)]
+            self._action_raw_masks.append(raw_mask)
+        self._devices = [
+            (poll, [(arg, 1 << raw_bits[(poll, arg)]) for arg in keys]) for poll, keys in devices.items()
+        ]
+
+        self.current = 0
+        self.previous = 0
+        self.frame = 0
+        self.history = [0] * history
+
+    def poll(self) -> int:
+        """Poll every device once and push the resulting state.
+
+        Returns
+        -------
+        _type_
+            int: bitmask of the actions which are active in this frame
+        """
+        raw = 0
+        for poll, keys in self._devices:
+            for arg, bit in keys:
+                if (poll() if arg is _NO_ARGUMENT else poll(arg)):
+                    raw |= bit
+        mask = 0
+        for i, raw_mask in enumerate(self._action_raw_masks):
+            if raw & raw_mask:
+                mask |= 1 << i
+        self.push(mask)
+        return mask
+
+    def push(self, mask: int) -> None:
+        """Push the state of a new frame.
+
+        Parameters
+        ----------
+        mask : int
+            bitmask of the actions which are active in the frame
+        """
+        self.previous = self.current
+        self.current = mask
+        self.history[self.frame % len(self.history)] = mask
+        self.frame += 1
+
+    def mask(self, frames_ago: int = 0) -> int:
+        """Return the state of a past frame, 0 when it is older than the ring buffer.
+
+        Parameters
+        ----------
+        frames_ago : int, optional
+            0 for the current frame, 1 for the previous one and so on., by default 0
+        """
+        if frames_ago >= len(self.history) or frames_ago >= self.frame:
+            return 0
+        return self.history[(self.frame - 1 - frames_ago) % len(self.history)]
+
+    @property
+    def pressed_mask(self) -> int:
+        """Return the bitmask of the actions which became active in this frame."""
+        return self.current & ~self.previous
+
+    @property
+    def released_mask(self) -> int:
+        """Return the bitmask of the actions which became inactive in this frame."""
+        return self.previous & ~self.current
+
+    def is_down(self, name: str) -> bool:
+        """Check if an action is active in this frame."""
+        return bool(self.current & self.bits[name])
+
+    def is_pressed(self, name: str) -> bool:
+        """Check if an action became active in this frame."""
+        return bool(self.pressed_mask & self.bits[name])
+
+    def is_released(self, name: str) -> bool:
+        """Check if an action became inactive in this frame."""
+        return bool(self.released_mask & self.bits[name])
+
+    def pressed_within(self, name: str, frames: int) -> bool:
+        """Check if an action became active in one of the last `frames` frames.
+
+        Parameters
+        ----------
+        name : str
+            action name
+        frames : int
+            number of frames, 1 being the current frame only. It must be smaller than the ring buffer size.
+        """
+        bit = self.bits[name]
+        for frames_ago in range(frames):
+            if self.mask(frames_ago) & ~self.mask(frames_ago + 1) & bit:
+                return True
+        return False
+
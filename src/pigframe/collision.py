@@ -0,0 +1,90 @@
+"""
+This module contains the broad-phase collision used by `World.collide`:
+a sort-and-sweep over the x axis, vectorized with NumPy when it is installed.
+"""
+
+from bisect import bisect_left, bisect_right
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover - depends on the environment
+    np = None
+
+# Below this many candidate tests (len(a) * len(b)), the pure Python sweep is faster than NumPy.
+NUMPY_THRESHOLD = 4096
+
+
+def sweep_pairs(
+    a: list[tuple], b: list[tuple], width: float, height: float, use_numpy: bool | None = None, as_array: bool | None = None
+):
+    """Return the pairs of points of `a` and `b` closer than `width` on x and `height` on y.
+
+    Parameters
+    ----------
+    a : list[tuple]
+        tuple: entity id, x, y
+    b : list[tuple]
+        tuple: entity id, x, y
+    width : float
+        pairs need abs(ax - bx) < width
+    height : float
+        pairs need abs(ay - by) < height
+    use_numpy : bool | None, optional
+        whether to use the NumPy sweep, by default None to use it for large inputs when NumPy is installed
+    as_array : bool | None, optional
+        whether to return a NumPy array instead of a list, by default None for an array when NumPy is installed
+
+    Returns
+    -------
+    _type_
+        np.ndarray | list[tuple[int, int]]: pairs of entity ids (id of `a`, id of `b`), never the same entity twice,
+        as an (n, 2) int64 array or a list of tuples.
+        Pairs are ordered by the x of the `a` point, then by the x of the `b` point.
+    """
+    if as_array is None:
+        as_array = np is not None
+    if not a or not b:
+        return np.empty((0, 2), np.int64) if as_array else []
+    if use_numpy is None:
+        use_numpy = np is not None and len(a) * len(b) >= NUMPY_THRESHOLD
+    if use_numpy:
+        pairs = _sweep_numpy(a, b, width, height)
+        return pairs if as_array else list(zip(*pairs.T.tolist()))
+    a = sorted(a, key=lambda point: point[1])
+    b = sorted(b, key=lambda point: point[1])
+    bxs = [point[1] for point in b]
+    pairs = []
+    for a_id, ax, ay in a:
+        lo = bisect_right(bxs, ax - width)
+        hi = bisect_left(bxs, ax + width, lo)
+        for j in range(lo, hi):
+            b_id, _, by = b[j]
+            if -height < ay - by < height and a_id != b_id:
+                pairs.append((a_id, b_id))
+    return np.array(pairs, np.int64).reshape(-1, 2) if as_array else pairs
+
+
+def _sweep_numpy(a: list[tuple], b: list[tuple], width: float, height: float):
+    """Return the pairs of `sweep_pairs` as an (n, 2) int64 array."""
+    a_ids, a_xs, a_ys = (np.asarray(column) for column in zip(*a))
+    b_ids, b_xs, b_ys = (np.asarray(column) for column in zip(*b))
+    a_order = np.argsort(a_xs, kind="stable")
+    b_order = np.argsort(b_xs, kind="stable")
+    a_ids, a_xs, a_ys = a_ids[a_order], a_xs[a_order], a_ys[a_order]
+    b_ids, b_xs, b_ys = b_ids[b_order], b_xs[b_order], b_ys[b_order]
+    lo = np.searchsorted(b_xs, a_xs - width, side="right")
+    hi = np.maximum(np.searchsorted(b_xs, a_xs + width, side="left"), lo)
+    counts = hi - lo
+    total = int(counts.sum())
+    if total == 0:
+        return np.empty((0, 2), np.int64)
+    # Expand every x-window [lo, hi) into candidate (i, j) index pairs.
+    i = np.repeat(np.arange(len(a_xs)), counts)
+    starts = np.repeat(lo - np.cumsum(counts) + counts, counts)
+    j = starts + np.arange(total)
+    dy = a_ys[i] - b_ys[j]
+    hit = (dy > -height) & (dy < height) & (a_ids[i] != b_ids[j])
+    pairs = np.empty((int(hit.sum()), 2), np.int64)
+    pairs[:, 0] = a_ids[i[hit]]
+    pairs[:, 1] = b_ids[j[hit]]
+    return pairs
@@ -0,0 +1,323 @@
+"""
+This module contains columnar components: component dataclasses whose fields are stored
+in contiguous NumPy arrays inside `World`, so that systems can update every entity
+with one vectorized expression.
+
+NumPy is an optional dependency. It is only required once a component is declared columnar.
+"""
+
+import dataclasses
+
+from .storage import SparseSet
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover - exercised only without NumPy
+    np = None
+
+_DEFAULT_DTYPES = {
+    float: "float64",
+    int: "int64",
+    bool: "bool",
+    "float": "float64",
+    "int": "int64",
+    "bool": "bool",
+}
+
+
+def columnar(cls=None, *, dtypes: dict | None = None):
+    """Declare a component dataclass as columnar.
+
+    Fields annotated with `float`, `int` or `bool` get a NumPy dtype automatically,
+    the other fields need an explicit dtype in `dtypes`.
+
+    ```python
+    @columnar
+    @dataclass
+    class Position(Component):
+        x: float
+        y: float
+    ```
+
+    Parameters
+    ----------
+    cls : type, optional
+        component dataclass, when used as a bare decorator.
+    dtypes : dict | None, optional
+        field name -> NumPy dtype, overriding the dtypes derived from annotations., by default None
+    """
+
+    def wrap(cls):
+        if np is None:
+            raise ImportError("columnar components require NumPy. Install it with `pip install numpy`.")
+        if not dataclasses.is_dataclass(cls):
+            raise TypeError(f"{cls.__name__} must be a dataclass to be columnar")
+        schema = {}
+        for f in dataclasses.fields(cls):
+            dtype = (dtypes or {}).get(f.name) or _DEFAULT_DTYPES.get(f.type)
+            if dtype is None:
+                raise TypeError(f"field {f.name} of {cls.__name__} needs a NumPy dtype, pass it with dtypes=")
+            schema[f.name] = np.dtype(dtype)
+        cls.__columns__ = schema
+        return cls
+
+    if cls is None:
+        return wrap
+    return wrap(cls)
+
+
+def is_columnar(component_type: type) -> bool:
+    """Check if a component type has been declared with `columnar`. Subclasses are not columnar."""
+    return "__columns__" in vars(component_type)
+
+
+class ComponentProxy:
+    """Lightweight view of one entity's columnar component.
+
+    Reading or assigning an attribute reads or writes the NumPy column of the pool,
+    so `world.get_entity_object(ent)[Position].x += 1` works as with a regular component.
+    """
+
+    __slots__ = ("_pool", "_entity")
+
+    def __init__(self, pool: "ColumnarPool", entity: int) -> None:
+        object.__setattr__(self, "_pool", pool)
+        object.__setattr__(self, "_entity", entity)
+
+    def _position(self) -> int:
+        position = self._pool.index(self._entity)
+        if position < 0:
+            raise ReferenceError(
+                f"entity {self._entity} no longer has a {self._pool.component_type.__name__} component"
+            )
+        return position
+
+    def __getattr__(self, name: str):
+        column = self._pool.columns.get(name)
+        if column is None:
+            raise AttributeError(f"{self._pool.component_type.__name__} has no field {name!r}")
+        return column[self._position()].item()
+
+    def __setattr__(self, name: str, value) -> None:
+        column = self._pool.columns.get(name)
+        if column is None:
+            raise AttributeError(f"{self._pool.component_type.__name__} has no field {name!r}")
+        column[self._position()] = value
+
+    def values(self) -> dict:
+        """Return field name -> value."""
+        position = self._position()
+        return {name: column[position].item() for name, column in self._pool.columns.items()}
+
+    def materialize(self):
+        """Return a regular component instance holding a copy of the values."""
+        return self._pool.component_type(**self.values())
+
+    def __eq__(self, other) -> bool:
+        if isinstance(other, ComponentProxy):
+            return self._pool.component_type is other._pool.component_type and self.values() == other.values()
+        if isinstance(other, self._pool.component_type):
+            return self.values() == dataclasses.asdict(other)
+        return NotImplemented
+
+    def __repr__(self) -> str:
+        fields = ", ".join(f"{name}={value!r}" for name, value in self.values().items())
+        return f"{self._pool.component_type.__name__}({fields})"
+
+
+class ColumnarPool(SparseSet):
+    """`SparseSet` pool of a columnar component type.
+
+    Every field is a NumPy array whose first `len(self)` elements are parallel to `entities`.
+    `dense` holds a `ComponentProxy` per entity for per-entity access.
+    """
+
+    __slots__ = ("component_type", "columns", "ids")
+
+    def __init__(self, component_type: type, capacity: int = 64) -> None:
+        super().__init__()
+        self.component_type = component_type
+        self.columns = {name: np.empty(capacity, dtype) for name, dtype in component_type.__columns__.items()}
+        self.ids = np.empty(capacity, np.int64)
+
+    def _reserve(self, size: int) -> None:
+        capacity = len(self.ids)
+        if size <= capacity:
+            return
+        while capacity < size:
+            capacity *= 2
+        n = len(self.entities)
+        for name, column in self.columns.items():
+            grown = np.empty(capacity, column.dtype)
+            grown[:n] = column[:n]
+            self.columns[name] = grown
+        grown = np.empty(capacity, np.int64)
+        grown[:n] = self.ids[:n]
+        self.ids = grown
+
+    def add(self, entity: int, component) -> bool:
+        if self.index(entity) >= 0:
+            return False
+        n = len(self.entities)
+        self._reserve(n + 1)
+        for name, column in self.columns.items():
+            column[n] = getattr(component, name)
+        self.ids[n] = entity
+        return super().add(entity, ComponentProxy(self, entity))
+
+    def remove(self, entity: int):
+        position = self.index(entity)
+        if position < 0:
+            return None
+        component = self.dense[position].materialize()
+        last = len(self.entities) - 1
+        if position != last:
+            for column in self.columns.values():
+                column[position] = column[last]
+            self.ids[position] = self.ids[last]
+        super().remove(entity)
+        return component
+
+    def extend(self, entities, components, adopt: bool = False) -> None:
+        """Append many entities which are not in the pool yet.
+
+        Parameters
+        ----------
+        entities : range | list[int]
+            entity ids
+        components : list | dict
+            components parallel to `entities`, or field name -> array (or single value)
+            copied into the columns without building component instances.
+        adopt : bool, optional
+            whether an empty pool may use the arrays of `components` as its columns without copying them,
+            by default False. Used when restoring a snapshot file, whose columns are mapped from the file.
+            They are copied anyway unless every field is a separate writable array of its dtype and length.
+        """
+        if adopt and not self.entities and len(entities) and self._adopt(entities, components):
+            return
+        start = len(self.entities)
+        stop = start + len(entities)
+        self._reserve(stop)
+        for name, column in self.columns.items():
+            if isinstance(components, dict):
+                column[start:stop] = components[name]
+            else:
+                column[start:stop] = [getattr(component, name) for component in components]
+        self.ids[start:stop] = entities
+        super().extend(entities, [ComponentProxy(self, entity) for entity in entities])
+
+    def _adopt(self, entities, components) -> bool:
+        if not isinstance(components, dict):
+            return False
+        n = len(entities)
+        columns = []
+        for name, dtype in self.component_type.__columns__.items():
+            column = components.get(name)
+            if not (
+                isinstance(column, np.ndarray)
+                and column.dtype == dtype
+                and column.shape == (n,)
+                and column.flags.writeable
+            ):
+                return False
+            # Fields sharing memory would write into each other.
+            if any(np.may_share_memory(column, other) for other in columns):
+                return False
+            columns.append(column)
+        self.columns = {name: components[name] for name in self.component_type.__columns__}
+        self.ids = np.asarray(entities, np.int64)
+        super().extend(entities, [ComponentProxy(self, entity) for entity in entities])
+        return True
+
+    def column(self, name: str):
+        """Return a view of the live part of a field column."""
+        return self.columns[name][: len(self.entities)]
+
+
+class ColumnView:
+    """Field columns of one component type for the entities of a `Columns` result.
+
+    Reading a field returns a NumPy array, assigning a field writes it back into the pool.
+    When the selection is a contiguous range of the pool the arrays are views and can be
+    modified in place. Otherwise they are copies, so assign the whole field
+    (`pos.x = ...` or `pos.x += ...`) to store the result.
+    """
+
+    __slots__ = ("_pool", "_selector")
+
+    def __init__(self, pool: ColumnarPool, selector) -> None:
+        object.__setattr__(self, "_pool", pool)
+        object.__setattr__(self, "_selector", selector)
+
+    @property
+    def is_view(self) -> bool:
+        """Whether the arrays returned by this view share memory with the pool."""
+        return isinstance(self._selector, slice)
+
+    def __getattr__(self, name: str):
+        column = self._pool.columns.get(name)
+        if column is None:
+            raise AttributeError(f"{self._pool.component_type.__name__} has no field {name!r}")
+        return column[self._selector]
+
+    def __setattr__(self, name: str, value) -> None:
+        column = self._pool.columns.get(name)
+        if column is None:
+            raise AttributeError(f"{self._pool.component_type.__name__} has no field {name!r}")
+        column[self._selector] = value
+
+
+class Columns:
+    """Result of `World.get_columns`: entity ids and one `ColumnView` per queried component type.
+
+    ```python
+    pos, vel = world.get_columns(Position, Velocity)
+    pos.x += vel.x
+    ```
+    """
+
+    def __init__(self, entities, views: dict) -> None:
+        self.entities = entities
+        self.views = views
+
+    def __len__(self) -> int:
+        return len(self.entities)
+
+    def __getitem__(self, component_type: type) -> ColumnView:
+        return self.views[component_type]
+
+    def __iter__(self):
+        return iter(self.views.values())
+
+
+def query_columns(pools: list, component_types: tuple) -> Columns:
+    """Build the `Columns` of the entities which are in every pool.
+
+    Parameters
+    ----------
+    pools : list
+        pools of the component types
+    component_types : tuple
+        queried component types
+    """
+    if np is None:
+        raise ImportError("columnar queries require NumPy. Install it with `pip install numpy`.")
+    for component_type, pool in zip(component_types, pools):
+        if not isinstance(pool, ColumnarPool):
+            raise TypeError(f"{component_type.__name__} is not a columnar component")
+
+    first = pools[0]
+    n = len(first)
+    ids = first.ids[:n]
+    if all(len(pool) == n and np.array_equal(pool.ids[:n], ids) for pool in pools[1:]):
+        # Every pool holds the same entities in the same order: hand out views.
+        selector = slice(0, n)
+        return Columns(ids, {ct: ColumnView(pool, selector) for ct, pool in zip(component_types, pools)})
+
+    entities = ids
+    positions = [np.arange(n)]
+    for pool in pools[1:]:
+        entities, left, right = np.intersect1d(entities, pool.ids[: len(pool)], assume_unique=True, return_indices=True)
+        positions = [p[left] for p in positions]
+        positions.append(right)
+    return Columns(entities, {ct: ColumnView(pool, p) for ct, pool, p in zip(component_types, pools, positions)})
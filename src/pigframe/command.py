@@ -0,0 +1,118 @@
+"""
+This module contains `CommandBuffer` which defers structural changes of the world
+(creating and removing entities, adding and removing components) to a flush point.
+"""
+
+import threading
+from typing import Type
+
+_ADD_COMPONENT = 0
+_REMOVE_COMPONENT = 1
+_REMOVE_ENTITY = 2
+
+
+class CommandBuffer:
+    """Queue of structural changes applied to the world in one batch by `flush`.
+
+    Systems which iterate a query can queue changes instead of applying them at once,
+    so the entities they iterate do not change under their feet.
+    `World.process_systems` flushes `world.commands` after the systems have run.
+    Queuing is safe from systems running concurrently on a `ParallelExecutor`.
+    """
+
+    def __init__(self, world) -> None:
+        """Queue of structural changes applied to the world in one batch by `flush`.
+
+        Parameters
+        ----------
+        world : World
+            World object
+        """
+        self.world = world
+        self.commands: list[tuple] = []
+        # `create_entity` allocates at once, and the allocator is not safe to share between threads.
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self.commands)
+
+    def create_entity(self) -> int:
+        """Create an entity. The id is allocated at once so components can be queued for it.
+        Allocations are serialized, so concurrent systems never get the same id.
+
+        Returns
+        -------
+        _type_
+            int: entity id
+        """
+        with self._lock:
+            return self.world.create_entity()
+
+    def add_component(self, entity: int, component_type: Type, **kwargs) -> None:
+        """Queue adding a component to an entity.
+
+        Parameters
+        ----------
+        entity : int
+            entity id
+        component_type : Type[Component]
+            component type, instantiated with `kwargs` when the buffer is flushed.
+        """
+        self.commands.append((_ADD_COMPONENT, entity, component_type, kwargs))
+
+    def remove_component(self, entity: int, component_type: Type) -> None:
+        """Queue removing a component from an entity.
+
+        Parameters
+        ----------
+        entity : int
+            entity id
+        component_type : Type[Component]
+            component type
+        """
+        self.commands.append((_REMOVE_COMPONENT, entity, component_type, None))
+
+    def remove_entity(self, entity: int) -> None:
+        """Queue removing an entity.
+
+        Parameters
+        ----------
+        entity : int
+            entity id
+        """
+        self.commands.append((_REMOVE_ENTITY, entity, None, None))
+
+    def flush(self) -> int:
+        """Apply the queued commands in order.
+
+        Cached queries are reconciled once after every command has been applied.
+        Commands targeting an entity which has been removed in the meantime are skipped.
+
+        Returns
+        -------
+        _type_
+            int: number of commands applied
+        """
+        if not self.commands:
+            return 0
+        commands = self.commands
+        self.commands = []
+        world = self.world
+        allocator = world.entity_allocator
+        applied = 0
+        with world.batch():
+            for command, entity, component_type, kwargs in commands:
+                if allocator.is_stale(entity):
+                    continue
+                if command == _ADD_COMPONENT:
+                    world.add_component_to_entity(entity, component_type, **kwargs)
+                elif command == _REMOVE_COMPONENT:
+                    world.remove_component_from_entity(entity, component_type)
+                else:
+                    world.remove_entity(entity)
+                applied += 1
+        return applied
+
+    def clear(self) -> None:
+        """Drop the queued commands without applying them."""
+        self.commands.clear()
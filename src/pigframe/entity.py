@@ -0,0 +1,214 @@
+"""
+This module contains the entity id allocator used by `World`.
+
+An entity id packs an index and a generation: `id = generation << ENTITY_INDEX_BITS | index`.
+Indices of removed entities are recycled, and the generation of the index is incremented
+so that ids held after removal (stale handles) can be told apart from the new entity.
+Ids of the first generation equal their index, so they look like plain sequential ids.
+"""
+
+from collections import deque
+
+ENTITY_INDEX_BITS = 32
+ENTITY_INDEX_MASK = (1 << ENTITY_INDEX_BITS) - 1
+
+
+def entity_index(entity: int) -> int:
+    """Return the index part of an entity id."""
+    return entity & ENTITY_INDEX_MASK
+
+
+def entity_generation(entity: int) -> int:
+    """Return the generation part of an entity id."""
+    return entity >> ENTITY_INDEX_BITS
+
+
+def make_entity(index: int, generation: int = 0) -> int:
+    """Build an entity id from an index and a generation."""
+    return (generation << ENTITY_INDEX_BITS) | index
+
+
+class EntityAllocator:
+    """Entity id allocator with a free-list of recycled indices and a generation per index.
+
+    Indices are kept dense: new ids reuse the indices of removed entities
+    (oldest first) before new indices are appended.
+    """
+
+    def __init__(self) -> None:
+        self.generations: list[int] = []
+        self.alive = bytearray()
+        self.free: deque[int] = deque()
+        self.alive_count = 0
+
+    def __len__(self) -> int:
+        return self.alive_count
+
+    @property
+    def capacity(self) -> int:
+        """Return the number of indices handed out so far, which bounds every live index."""
+        return len(self.generations)
+
+    def _grow(self, size: int) -> None:
+        """Grow the index space to `size`, putting the new indices on the free-list."""
+        start = len(self.generations)
+        if size <= start:
+            return
+        self.generations.extend([0] * (size - start))
+        self.alive.extend(bytes(size - start))
+        self.free.extend(range(start, size))
+
+    def allocate(self) -> int:
+        """Allocate a new entity id.
+
+        Returns
+        -------
+        _type_
+            int: entity id
+        """
+        free = self.free
+        alive = self.alive
+        while free:
+            index = free.popleft()
+            if not alive[index]:
+                break
+        else:
+            index = len(self.generations)
+            self.generations.append(0)
+            self.alive.append(0)
+        alive[index] = 1
+        self.alive_count += 1
+        return make_entity(index, self.generations[index])
+
+    def allocate_block(self, n: int) -> range | list[int]:
+        """Allocate `n` entity ids with contiguous indices.
+
+        The first run of `n` free indices is reused. Without such a run, the block starts after
+        the last live index and the index space only grows by what the free tail lacks.
+
+        Returns
+        -------
+        _type_
+            range | list[int]: entity ids, a range when every index of the block has the same generation.
+        """
+        alive = self.alive
+        if n <= 0:
+            return range(0)
+        start = alive.find(bytes(n))
+        if start < 0:
+            start = len(alive.rstrip(b"\x00"))
+            missing = start + n - len(alive)
+            self.generations.extend([0] * missing)
+            alive.extend(bytes(missing))
+        alive[start : start + n] = b"\x01" * n
+        self.alive_count += n
+        # Reused indices stay in the free-list and are skipped by allocate(), drop them once they dominate it.
+        if len(self.free) > 2 * (len(self.generations) - self.alive_count) + 64:
+            self.free = deque(index for index in dict.fromkeys(self.free) if not alive[index])
+        generations = self.generations[start : start + n]
+        if generations.count(generations[0]) == n:
+            first = make_entity(start, generations[0])
+            return range(first, first + n)
+        return [make_entity(index, generation) for index, generation in enumerate(generations, start)]
+
+    def reserve(self, entity: int) -> int:
+        """Mark a specific entity id as alive.
+
+        Parameters
+        ----------
+        entity : int
+            entity id. Its index must not be used by a live entity,
+            and its generation must not be older than the current generation of the index.
+
+        Returns
+        -------
+        _type_
+            int: entity id
+
+        Raises
+        ------
+        ValueError
+            if the index of the entity id is used by a live entity, or if the entity id is stale.
+        """
+        index = entity_index(entity)
+        self._grow(index + 1)
+        if self.alive[index]:
+            raise ValueError(f"entity index {index} is already used by entity {self.current(index)}")
+        if entity_generation(entity) < self.generations[index]:
+            # Reviving an old generation would make every handle released since then valid again.
+            raise ValueError(f"entity {entity} is stale: index {index} is at generation {self.generations[index]}")
+        # The index stays in the free-list and is skipped by allocate() while it is alive.
+        self.generations[index] = entity_generation(entity)
+        self.alive[index] = 1
+        self.alive_count += 1
+        return entity
+
+    def release(self, entity: int) -> bool:
+        """Release an entity id so that its index can be recycled.
+
+        Returns
+        -------
+        _type_
+            bool: True if the entity was alive, False otherwise.
+        """
+        if not self.is_alive(entity):
+            return False
+        index = entity_index(entity)
+        self.alive[index] = 0
+        self.generations[index] += 1
+        self.alive_count -= 1
+        self.free.append(index)
+        return True
+
+    def is_alive(self, entity: int) -> bool:
+        """Check if an entity id refers to a live entity."""
+        index = entity_index(entity)
+        return (
+            index < len(self.generations)
+            and self.alive[index] == 1
+            and self.generations[index] == entity_generation(entity)
+        )
+
+    def is_stale(self, entity: int) -> bool:
+        """Check if an entity id refers to an entity which has been removed."""
+        index = entity_index(entity)
+        return index < len(self.generations) and self.generations[index] > entity_generation(entity)
+
+    def current(self, index: int) -> int | None:
+        """Return the live entity id using `index`, None if the index is free."""
+        if index >= len(self.generations) or not self.alive[index]:
+            return None
+        return make_entity(index, self.generations[index])
+
+    def peek(self) -> int:
+        """Return the entity id which the next `allocate` call returns."""
+        for index in self.free:
+            if not self.alive[index]:
+                return make_entity(index, self.generations[index])
+        return len(self.generations)
+
+    def set_next(self, entity: int) -> None:
+        """Make the next `allocate` call return the index of `entity`.
+
+        Raises
+        ------
+        ValueError
+            if the index is used by a live entity.
+        """
+        index = entity_index(entity)
+        self._grow(index + 1)
+        if self.alive[index]:
+            raise ValueError(f"entity index {index} is already used by entity {self.current(index)}")
+        self.generations[index] = max(self.generations[index], entity_generation(entity))
+        try:
+            self.free.remove(index)
+        except ValueError:
+            pass
+        self.free.appendleft(index)
+
+    def clear(self) -> None:
+        """Release every entity id and reset the index space."""
+        self.generations.clear()
+        self.alive.clear()
+        self.free.clear()
+        self.alive_count = 0
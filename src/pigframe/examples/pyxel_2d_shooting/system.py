@@ -97,30 +97,16 @@ class SysBulletHitEnemy(System):
         if not self.world.component_exist(Bullet) or not self.world.component_exist(CpEnemy):
             return
         
-        for bullet_ent, (bullet, bullet_pos) in self.world.get_components(Bullet, Position):
-            for enemy_ent, (enemy, enemy_pos) in self.world.get_components(CpEnemy, Position):
-
-                if self.check_collision(bullet_pos, enemy_pos):
-                    self.world.remove_entity(bullet_ent)
-                    if self.world.get_entity_object(enemy_ent) == None:
-                        break
-                    enemy.hp -= 1
-
-    @staticmethod
-    def check_collision(pos1, pos2, size=16):
-        return (abs(pos1.x - pos2.x) < size) and (abs(pos1.y - pos2.y) < size)
+        # Bullets hitting an enemy are removed once every system has run.
+        for bullet_ent, enemy_ent in self.world.collide(Bullet, CpEnemy, 16, Position):
+            self.world.commands.remove_entity(bullet_ent)
+            self.world.get_entity_object(enemy_ent)[CpEnemy].hp -= 1
 
 class SysPlayerHitEnemy(System):
     def process(self):
         # Check for enemy-player collisions
-        for player_ent, (playable, player_pos) in self.world.get_components(Playable, Position):
-            for enemy_ent, (_, enemy_pos) in self.world.get_components(CpEnemy, Position):
-                if self.check_collision(player_pos, enemy_pos):
-                    playable.hp -= 1
-
-    @staticmethod
-    def check_collision(pos1, pos2, size=16):
-        return (abs(pos1.x - pos2.x) < size) and (abs(pos1.y - pos2.y) < size)
+        for player_ent, enemy_ent in self.world.collide(Playable, CpEnemy, 16, Position):
+            self.world.get_entity_object(player_ent)[Playable].hp -= 1
 
 class SysKillEnemy(System):
     def process(self):
@@ -0,0 +1,161 @@
+"""
+This module contains `ParallelExecutor` which runs the systems of a scene concurrently
+on a thread pool, following the component types they declare to read and write.
+"""
+
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from time import perf_counter_ns
+
+
+class _Plan:
+    """Dependency DAG of the systems of a scene."""
+
+    __slots__ = ("systems", "parallel", "successors", "indegree")
+
+    def __init__(self, systems: tuple, parallel: bool, successors: list[list[int]], indegree: list[int]) -> None:
+        self.systems = systems
+        self.parallel = parallel
+        self.successors = successors
+        self.indegree = indegree
+
+
+def _access(system) -> tuple[frozenset, frozenset] | None:
+    """Return the read and written component types of a system, None if it declares none."""
+    if system.reads is None and system.writes is None:
+        return None
+    writes = frozenset(system.writes or ())
+    return frozenset(system.reads or ()) | writes, writes
+
+
+def _conflict(a, b) -> bool:
+    """Check if two systems must not run concurrently."""
+    if a is None or b is None:
+        return True
+    a_reads, a_writes = a
+    b_reads, b_writes = b
+    return not (a_writes.isdisjoint(b_reads) and b_writes.isdisjoint(a_reads))
+
+
+class ParallelExecutor:
+    """Run non-conflicting systems concurrently on a thread pool.
+
+    Systems declare the component types they read and write with the `reads` and
+    `writes` class attributes. Two systems conflict when one writes a type the other
+    reads or writes; a system without declarations conflicts with every system.
+    Conflicting systems run in priority order, the others may run at the same time.
+    When no system of the scene declares access, systems run one after another
+    on the calling thread as without executor.
+
+    Systems running concurrently must not add or remove entities and components
+    directly: they queue such changes with `world.commands`, applied after every system has run.
+    `world.commands.create_entity` allocates ids under a lock, so it is safe from any of them,
+    unlike `world.create_entity`.
+
+    ```python
+    class Move(System):
+        reads = (Velocity,)
+        writes = (Position,)
+
+    world.executor = ParallelExecutor(max_workers=4)
+    ```
+    """
+
+    def __init__(self, max_workers: int | None = None) -> None:
+        """Run non-conflicting systems concurrently on a thread pool.
+
+        Parameters
+        ----------
+        max_workers : int | None, optional
+            number of threads, by default None for the default of `ThreadPoolExecutor`
+        """
+        self.max_workers = max_workers
+        self._pool: ThreadPoolExecutor | None = None
+        self._plans: dict[str, _Plan] = {}
+
+    def plan(self, scene: str, systems: list) -> _Plan:
+        """Return the dependency DAG of the systems of a scene, rebuilt when the systems change.
+
+        Returns
+        -------
+        _type_
+            _Plan: DAG in the order of `systems`, not parallel if no system declares access
+        """
+        systems = tuple(systems)
+        plan = self._plans.get(scene)
+        if plan is not None and plan.systems == systems:
+            return plan
+        accesses = [_access(system) for system in systems]
+        successors = [[] for _ in systems]
+        indegree = [0] * len(systems)
+        # `systems` is sorted by priority, so edges go from the lower priority to the higher one.
+        for j in range(len(systems)):
+            for i in range(j):
+                if _conflict(accesses[i], accesses[j]):
+                    successors[i].append(j)
+                    indegree[j] += 1
+        parallel = any(access is not None for access in accesses)
+        plan = _Plan(systems, parallel, successors, indegree)
+        self._plans[scene] = plan
+        return plan
+
+    @staticmethod
+    def _call(system, runs: int) -> list[tuple[int, int]]:
+        timings = []
+        for _ in range(runs):
+            start = perf_counter_ns()
+            system.process()
+            timings.append((start, perf_counter_ns()))
+        return timings
+
+    def run(self, world, systems: list) -> bool:
+        """Run the systems of the current scene of a world.
+
+        Returns
+        -------
+        _type_
+            bool: True if the systems have been run, False if no system declares access
+            and they must be run sequentially instead.
+        """
+        plan = self.plan(world.current_scene, systems)
+        if not plan.parallel:
+            return False
+        if self._pool is None:
+            self._pool = ThreadPoolExecutor(self.max_workers, thread_name_prefix="pigframe")
+        pool = self._pool
+        systems = plan.systems
+        # Schedules are evaluated on the calling thread, in priority order.
+        runs = [1 if system.schedule is None else system.schedule.runs(world) for system in systems]
+        indegree = list(plan.indegree)
+        futures = {}
+        for i, degree in enumerate(indegree):
+            if degree == 0:
+                futures[pool.submit(self._call, systems[i], runs[i])] = i
+        profiler = world.profiler if world.profiler.enabled else None
+        error = None
+        while futures:
+            done, _ = wait(futures, return_when=FIRST_COMPLETED)
+            for future in done:
+                i = futures.pop(future)
+                try:
+                    timings = future.result()
+                except BaseException as e:
+                    # Systems depending on the failed one are not run.
+                    error = error or e
+                    continue
+                if profiler is not None:
+                    name = type(systems[i]).__qualname__
+                    for start, end in timings:
+                        profiler.record("system", name, start, end)
+                for j in plan.successors[i]:
+                    indegree[j] -= 1
+                    if indegree[j] == 0:
+                        futures[pool.submit(self._call, systems[j], runs[j])] = j
+        if error is not None:
+            raise error
+        return True
+
+    def shutdown(self) -> None:
+        """Stop the threads of the pool. The executor can still be used afterwards."""
+        if self._pool is not None:
+            self._pool.shutdown()
+            self._pool = None
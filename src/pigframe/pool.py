@@ -0,0 +1,194 @@
+"""
+This module contains `WorldPool` which simulates many independent worlds in worker processes.
+"""
+
+import multiprocessing
+import os
+
+
+def _snapshot(world, component_types: tuple) -> dict:
+    """Return the requested components of a world: component type -> list of tuple: entity id, component."""
+    snapshot = {}
+    for component_type in component_types:
+        rows = []
+        for entity, component in world.storage.iter_component(component_type):
+            # Columnar components are proxies of the pool arrays, send plain dataclasses instead.
+            materialize = getattr(component, "materialize", None)
+            rows.append((entity, component if materialize is None else materialize()))
+        snapshot[component_type] = rows
+    return snapshot
+
+
+def _worker(connection, factory, indices: list[int]) -> None:
+    """Build the worlds of `indices` and serve the requests of the parent process."""
+    try:
+        worlds = {i: factory(i) for i in indices}
+    except BaseException as e:
+        connection.send((False, e))
+        return
+    connection.send((True, None))
+    while True:
+        op, targets, args = connection.recv()
+        if op == "close":
+            break
+        try:
+            if op == "step":
+                frames, dt, component_types = args
+                result = {}
+                for i in targets:
+                    worlds[i].run_headless(frames, dt)
+                    result[i] = _snapshot(worlds[i], component_types)
+            elif op == "snapshot":
+                result = {i: _snapshot(worlds[i], args) for i in targets}
+            else:
+                function, function_args = args
+                result = {i: function(worlds[i], *function_args) for i in targets}
+        except BaseException as e:
+            connection.send((False, e))
+        else:
+            connection.send((True, result))
+    connection.close()
+
+
+class WorldPool:
+    """Independent worlds simulated in worker processes.
+
+    Each worker process builds its worlds with `factory(index)`, so the factory must be
+    picklable (e.g. a module-level function). Worlds never leave their process:
+    only the requested component types are sent back to the parent.
+
+    ```python
+    def make_world(index: int) -> World:
+        world = World()
+        ...
+        return world
+
+    with WorldPool(make_world, 1000, processes=8) as pool:
+        results = pool.step(60, components=(Position, Health))  # every world, in lockstep
+        pool.step(10, worlds=[0, 5])  # some worlds only
+    results[3][Position]  # list of tuple: entity id, component of world 3
+    ```
+    """
+
+    def __init__(self, factory, n_worlds: int, processes: int | None = None, mp_context: str | None = None) -> None:
+        """Independent worlds simulated in worker processes.
+
+        Parameters
+        ----------
+        factory : callable
+            picklable function which returns the world of a given index
+        n_worlds : int
+            number of worlds
+        processes : int | None, optional
+            number of worker processes, by default None for `os.cpu_count()`
+        mp_context : str | None, optional
+            multiprocessing start method, by default None for the platform default
+        """
+        context = multiprocessing.get_context(mp_context)
+        processes = max(1, min(processes or os.cpu_count() or 1, n_worlds))
+        self.n_worlds = n_worlds
+        # Worker k holds the worlds k, k + processes, k + 2 * processes, ...
+        self._owners = [i % processes for i in range(n_worlds)]
+        self._connections = []
+        self._processes = []
+        for k in range(processes):
+            parent, child = context.Pipe()
+            process = context.Process(
+                target=_worker, args=(child, factory, list(range(k, n_worlds, processes))), daemon=True
+            )
+            process.start()
+            child.close()
+            self._connections.append(parent)
+            self._processes.append(process)
+        try:
+            self._gather(range(processes))
+        except BaseException:
+            self.close()
+            raise
+
+    def __len__(self) -> int:
+        return self.n_worlds
+
+    def __enter__(self) -> "WorldPool":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    def _gather(self, workers) -> dict:
+        """Receive the answers of workers, raising the first error after every answer has been received."""
+        results = {}
+        error = None
+        for k in workers:
+            ok, result = self._connections[k].recv()
+            if not ok:
+                error = error or result
+            elif result:
+                results.update(result)
+        if error is not None:
+            raise error
+        return results
+
+    def _request(self, op: str, worlds, args) -> list:
+        targets = range(self.n_worlds) if worlds is None else list(worlds)
+        per_worker: dict[int, list[int]] = {}
+        for i in targets:
+            per_worker.setdefault(self._owners[i], []).append(i)
+        # Every worker works at the same time, then the answers are collected.
+        for k, indices in per_worker.items():
+            self._connections[k].send((op, indices, args))
+        results = self._gather(per_worker)
+        return [results[i] for i in targets]
+
+    def step(self, frames: int = 1, dt: float | None = None, components: tuple = (), worlds=None) -> list[dict]:
+        """Process frames of worlds with `World.run_headless`.
+
+        Parameters
+        ----------
+        frames : int, optional
+            number of frames, by default 1
+        dt : float | None, optional
+            timestep in seconds, by default None to keep the one of each world
+        components : tuple, optional
+            component types sent back after stepping, by default () for none
+        worlds : Iterable[int] | None, optional
+            indices of the worlds to step, by default None for every world (lockstep)
+
+        Returns
+        -------
+        _type_
+            list[dict]: for each stepped world, component type -> list of tuple: entity id, component
+        """
+        return self._request("step", worlds, (frames, dt, tuple(components)))
+
+    def snapshot(self, components: tuple, worlds=None) -> list[dict]:
+        """Return components of worlds without stepping them.
+
+        Returns
+        -------
+        _type_
+            list[dict]: for each world, component type -> list of tuple: entity id, component
+        """
+        return self._request("snapshot", worlds, tuple(components))
+
+    def call(self, function, *args, worlds=None) -> list:
+        """Call `function(world, *args)` in the process of each world and return the results.
+        `function`, `args` and the results must be picklable.
+        """
+        return self._request("call", worlds, (function, args))
+
+    def close(self) -> None:
+        """Stop the worker processes."""
+        for connection, process in zip(self._connections, self._processes):
+            if process.is_alive():
+                try:
+                    connection.send(("close", None, None))
+                except (BrokenPipeError, OSError):
+                    pass
+            connection.close()
+        for process in self._processes:
+            process.join(timeout=5)
+            if process.is_alive():
+                process.terminate()
+        self._connections = []
+        self._processes = []
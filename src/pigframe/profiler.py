@@ -0,0 +1,146 @@
+"""
+This module contains `Profiler` which records the wall-clock time of every system,
+event and screen processed by `World`.
+"""
+
+import json
+import math
+import os
+from collections import deque
+from time import perf_counter_ns
+
+
+class Profiler:
+    """Per-system, per-event and per-screen wall-clock profiler of `World`.
+
+    It is disabled by default and costs one attribute check per `process_*` call.
+    Once enabled, each processed item records its duration with `time.perf_counter_ns`.
+    The last `window` samples of each item are kept for rolling statistics
+    and the last `trace_size` samples are kept as Chrome trace events.
+
+    ```python
+    world.profiler.enable()
+    ...
+    print(world.profiler.report())
+    world.profiler.export_chrome_trace("frame.json")  # open with chrome://tracing or Perfetto
+    ```
+    """
+
+    def __init__(self, window: int = 120, trace_size: int = 10000) -> None:
+        """Per-system, per-event and per-screen wall-clock profiler of `World`.
+
+        Parameters
+        ----------
+        window : int, optional
+            number of samples (frames) kept per item for statistics, by default 120
+        trace_size : int, optional
+            number of samples kept for the Chrome trace export, by default 10000
+        """
+        self.enabled = False
+        self.window = window
+        self.samples: dict[tuple[str, str], deque[int]] = {}
+        self.trace: deque[tuple[str, str, int, int]] = deque(maxlen=trace_size)
+        self.origin = perf_counter_ns()
+
+    def enable(self) -> None:
+        """Start recording."""
+        self.enabled = True
+
+    def disable(self) -> None:
+        """Stop recording. Recorded samples are kept."""
+        self.enabled = False
+
+    def reset(self) -> None:
+        """Drop every recorded sample."""
+        self.samples.clear()
+        self.trace.clear()
+        self.origin = perf_counter_ns()
+
+    def record(self, category: str, name: str, start: int, end: int) -> None:
+        """Record one sample.
+
+        Parameters
+        ----------
+        category : str
+            kind of the item, e.g. "system", "event" or "screen"
+        name : str
+            name of the item
+        start : int
+            start time in nanoseconds from `time.perf_counter_ns`
+        end : int
+            end time in nanoseconds from `time.perf_counter_ns`
+        """
+        key = (category, name)
+        samples = self.samples.get(key)
+        if samples is None:
+            samples = deque(maxlen=self.window)
+            self.samples[key] = samples
+        samples.append(end - start)
+        self.trace.append((category, name, start, end))
+
+    def run(self, category: str, items, method: str) -> None:
+        """Call `method` of every item and record its duration under the item's class name."""
+        for item in items:
+            start = perf_counter_ns()
+            getattr(item, method)()
+            self.record(category, type(item).__qualname__, start, perf_counter_ns())
+
+    def stats(self) -> dict[tuple[str, str], dict[str, float]]:
+        """Return rolling statistics of every item.
+
+        Returns
+        -------
+        _type_
+            dict: (category, name) -> {"count", "mean_ms", "p95_ms", "max_ms"} over the last `window` samples
+        """
+        stats = {}
+        for key, samples in self.samples.items():
+            ordered = sorted(samples)
+            n = len(ordered)
+            stats[key] = {
+                "count": n,
+                "mean_ms": sum(ordered) / n / 1e6,
+                "p95_ms": ordered[max(0, math.ceil(0.95 * n) - 1)] / 1e6,
+                "max_ms": ordered[-1] / 1e6,
+            }
+        return stats
+
+    def report(self) -> str:
+        """Return a text table of the statistics, slowest mean first."""
+        rows = sorted(self.stats().items(), key=lambda item: item[1]["mean_ms"], reverse=True)
+        width = max([len(f"{category} {name}") for (category, name), _ in rows] + [4])
+        lines = [f"{'item':<{width}}  {'count':>6}  {'mean ms':>9}  {'p95 ms':>9}  {'max ms':>9}"]
+        for (category, name), s in rows:
+            lines.append(
+                f"{category + ' ' + name:<{width}}  {s['count']:>6}  "
+                f"{s['mean_ms']:>9.3f}  {s['p95_ms']:>9.3f}  {s['max_ms']:>9.3f}"
+            )
+        return "\n".join(lines)
+
+    def chrome_trace(self) -> dict:
+        """Return the recorded samples in the Chrome trace-event format."""
+        pid = os.getpid()
+        events = [
+            {
+                "name": name,
+                "cat": category,
+                "ph": "X",
+                "ts": (start - self.origin) / 1000,
+                "dur": (end - start) / 1000,
+                "pid": pid,
+                "tid": 0,
+            }
+            for category, name, start, end in self.trace
+        ]
+        return {"traceEvents": events, "displayTimeUnit": "ms"}
+
+    def export_chrome_trace(self, path: str) -> None:
+        """Write the recorded samples to a Chrome trace-event JSON file.
+
+        Parameters
+        ----------
+        path : str
+            output file path
+        """
+        with open(path, "w") as f:
+            json.dump(self.chrome_trace(), f)
@@ -0,0 +1,221 @@
+"""
+This module contains query result caches used by `World.get_component` and `World.get_components`,
+and `Query` which adds exclusion, alternative and optional filters on top of them.
+"""
+
+from operator import is_
+
+
+class CachedQuery:
+    """Cached result of a component query which is patched in place when entities change.
+
+    Rows are tuple: entity id, component (single component query) or
+    tuple: entity id, list of components (multi components query).
+    When an entity gains or loses a component, only the queries involving that
+    component type add or swap-remove the row of that entity.
+
+    The list handed out by `result` is never mutated afterwards, so a system can keep
+    iterating it while it adds or removes entities. The first patch after a handout
+    copies the list once instead of rebuilding it.
+    """
+
+    __slots__ = ("component_types", "single", "rows", "index", "shared")
+
+    def __init__(self, component_types: tuple, rows: list, single: bool = False) -> None:
+        """Cached result of a component query.
+
+        Parameters
+        ----------
+        component_types : tuple
+            component types of the query
+        rows : list
+            initial rows of the query
+        single : bool, optional
+            whether rows hold a single component instead of a list of components, by default False
+        """
+        self.component_types = component_types
+        self.single = single
+        self.rows = rows
+        self.index = {row[0]: i for i, row in enumerate(rows)}
+        self.shared = False
+
+    def __len__(self) -> int:
+        return len(self.rows)
+
+    def __contains__(self, entity: int) -> bool:
+        return entity in self.index
+
+    def result(self) -> list:
+        """Return the rows. The returned list is left untouched by later patches."""
+        self.shared = True
+        return self.rows
+
+    def _own_rows(self) -> None:
+        if self.shared:
+            self.rows = self.rows.copy()
+            self.shared = False
+
+    def add(self, entity: int, payload) -> None:
+        """Add the row of an entity if it is not in the result yet."""
+        if entity in self.index:
+            return
+        self._own_rows()
+        self.index[entity] = len(self.rows)
+        self.rows.append((entity, payload))
+
+    def discard(self, entity: int) -> None:
+        """Remove the row of an entity if it is in the result."""
+        i = self.index.pop(entity, None)
+        if i is None:
+            return
+        self._own_rows()
+        last = self.rows.pop()
+        if i < len(self.rows):
+            self.rows[i] = last
+            self.index[last[0]] = i
+
+    def reorder(self, entities) -> None:
+        """Put the rows in the order of `entities`, e.g. saved by `World.snapshot`.
+        Rows of other entities follow in their current order."""
+        rows = self.rows
+        if [row[0] for row in rows] == list(entities):
+            return
+        positions = {entity: i for i, entity in enumerate(entities)}
+        end = len(positions)
+        self.rows = sorted(rows, key=lambda row: positions.get(row[0], end))
+        self.index = {row[0]: i for i, row in enumerate(self.rows)}
+        self.shared = False
+
+    def _replace(self, i: int, entity: int, payload) -> None:
+        """Replace the payload of the row of an entity, keeping its position."""
+        self._own_rows()
+        self.rows[i] = (entity, payload)
+
+    def update(self, entity: int, entity_object: dict | None) -> None:
+        """Add, remove or refresh the row of an entity depending on whether it matches the query now.
+
+        A row whose components have been replaced (e.g. removed and added again inside `World.batch`)
+        gets the new components.
+
+        Parameters
+        ----------
+        entity : int
+            entity id
+        entity_object : dict | None
+            current components of the entity, None if the entity has been removed
+        """
+        if entity_object is None or not all(ct in entity_object for ct in self.component_types):
+            self.discard(entity)
+            return
+        if self.single:
+            payload = entity_object[self.component_types[0]]
+        else:
+            payload = [entity_object[ct] for ct in self.component_types]
+        i = self.index.get(entity)
+        if i is None:
+            self.add(entity, payload)
+            return
+        current = self.rows[i][1]
+        if current is not payload if self.single else not all(map(is_, current, payload)):
+            self._replace(i, entity, payload)
+
+
+class Query(CachedQuery):
+    """Reusable query with filters, kept up to date by `World` once registered with `World.add_query`.
+
+    An entity matches when it has every type of `all`, none of the types of `none`
+    and, if `any` is given, at least one type of `any`.
+    Rows are tuple: entity id, list of components of `all` followed by the components
+    of `optional` (None for a missing optional component).
+
+    ```python
+    enemies = world.add_query(Query(all=[Position], none=[Playable], optional=[Velocity]))
+    for ent, (pos, vel) in enemies:
+        ...
+    ```
+    """
+
+    __slots__ = ("all", "none", "any", "optional")
+
+    def __init__(self, all=(), none=(), any=(), optional=()) -> None:
+        """Reusable query with filters.
+
+        Parameters
+        ----------
+        all : list[Type[Component]], optional
+            component types an entity must have, by default ()
+        none : list[Type[Component]], optional
+            component types an entity must not have, by default ()
+        any : list[Type[Component]], optional
+            component types an entity must have at least one of, by default () for no constraint
+        optional : list[Type[Component]], optional
+            component types fetched if the entity has them, by default ()
+        """
+        self.all = tuple(all)
+        self.none = tuple(none)
+        self.any = tuple(any)
+        self.optional = tuple(optional)
+        if not self.all and not self.any:
+            raise ValueError("a query needs at least one type in `all` or `any`")
+        super().__init__(self.all + self.optional, [])
+
+    def __iter__(self):
+        return iter(self.result())
+
+    def __repr__(self) -> str:
+        filters = ", ".join(
+            f"{name}=[{', '.join(t.__name__ for t in getattr(self, name))}]"
+            for name in ("all", "none", "any", "optional")
+        )
+        return f"Query({filters})"
+
+    @property
+    def types(self) -> set:
+        """Return every component type which can change whether or how an entity matches."""
+        return {*self.all, *self.none, *self.any, *self.optional}
+
+    def matches(self, entity_object: dict | None) -> bool:
+        """Check if an entity with the given components matches the query."""
+        if entity_object is None:
+            return False
+        for component_type in self.all:
+            if component_type not in entity_object:
+                return False
+        for component_type in self.none:
+            if component_type in entity_object:
+                return False
+        if self.any and not any(component_type in entity_object for component_type in self.any):
+            return False
+        return True
+
+    def _payload(self, entity_object: dict) -> list:
+        components = [entity_object[ct] for ct in self.all]
+        components.extend(entity_object.get(ct) for ct in self.optional)
+        return components
+
+    def update(self, entity: int, entity_object: dict | None) -> None:
+        if not self.matches(entity_object):
+            self.discard(entity)
+            return
+        payload = self._payload(entity_object)
+        i = self.index.get(entity)
+        if i is None:
+            self.add(entity, payload)
+        elif not all(map(is_, self.rows[i][1], payload)):
+            # An optional component has been added or removed, or a component has been replaced.
+            self._replace(i, entity, payload)
+
+    def rebuild(self, storage) -> None:
+        """Recompute the rows from a storage."""
+        if self.all:
+            candidates = [entity for entity, _ in storage.iter_components(*self.all)]
+        else:
+            candidates = list(storage.entities)
+        rows = []
+        for entity in candidates:
+            entity_object = storage.get_entity_object(entity)
+            if self.matches(entity_object):
+                rows.append((entity, self._payload(entity_object)))
+        self.rows = rows
+        self.index = {row[0]: i for i, row in enumerate(rows)}
+        self.shared = False
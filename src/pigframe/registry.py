@@ -0,0 +1,114 @@
+"""
+This module contains `PriorityRegistry`, the priority-ordered container of the systems,
+screens and events of a scene.
+"""
+
+from bisect import bisect_left, bisect_right
+from collections.abc import Sequence
+from heapq import merge
+from itertools import count
+
+
+class PriorityRegistry(Sequence):
+    """Items ordered by their `priority` attribute, ties kept in registration order.
+
+    It is a read-only sequence. Items are inserted with a binary search, and an index
+    by type allows removing every item of a type without scanning the registry.
+    Types in `disabled` stay registered but are left out of `enabled`.
+    """
+
+    __slots__ = ("_items", "_keys", "_by_type", "_counter", "disabled")
+
+    def __init__(self, items=()) -> None:
+        """Items ordered by their `priority` attribute, ties kept in registration order.
+
+        Parameters
+        ----------
+        items : Iterable, optional
+            initial items, by default ()
+        """
+        self._items: list = []
+        # tuple: priority, registration number. Unique, so it locates an item exactly.
+        self._keys: list[tuple] = []
+        self._by_type: dict[type, list[tuple]] = {}
+        self._counter = count()
+        self.disabled: set[type] = set()
+        self.extend(items)
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+    def __getitem__(self, index):
+        return self._items[index]
+
+    def __iter__(self):
+        return iter(self._items)
+
+    def __repr__(self) -> str:
+        return f"PriorityRegistry({self._items!r})"
+
+    def __eq__(self, other) -> bool:
+        if isinstance(other, PriorityRegistry):
+            return self._items == other._items
+        if isinstance(other, (list, tuple)):
+            return self._items == list(other)
+        return NotImplemented
+
+    def add(self, item) -> None:
+        """Insert an item after the items of lower or equal priority."""
+        self._insert((item.priority, next(self._counter)), item)
+
+    def extend(self, items) -> None:
+        """Insert many items at once: they are sorted together and merged in one pass."""
+        new = [((item.priority, next(self._counter)), item) for item in items]
+        if not new:
+            return
+        if len(new) == 1:
+            self._insert(*new[0])
+            return
+        new.sort(key=lambda entry: entry[0])
+        merged = list(merge(zip(self._keys, self._items), new, key=lambda entry: entry[0]))
+        self._keys = [key for key, _ in merged]
+        self._items = [item for _, item in merged]
+        for key, item in new:
+            self._by_type.setdefault(type(item), []).append(key)
+
+    def _insert(self, key: tuple, item) -> None:
+        i = bisect_right(self._keys, key)
+        self._keys.insert(i, key)
+        self._items.insert(i, item)
+        self._by_type.setdefault(type(item), []).append(key)
+
+    def enabled(self) -> list:
+        """Return the items whose type is not disabled, in priority order."""
+        if not self.disabled:
+            return list(self._items)
+        disabled = self.disabled
+        return [item for item in self._items if type(item) not in disabled]
+
+    def types(self):
+        """Return the types of the registered items."""
+        return self._by_type.keys()
+
+    def of_type(self, item_type: type) -> list:
+        """Return the items of a type, in priority order."""
+        return [self._items[bisect_left(self._keys, key)] for key in sorted(self._by_type.get(item_type, ()))]
+
+    def remove_type(self, item_type: type) -> list:
+        """Remove every item of a type.
+
+        Returns
+        -------
+        _type_
+            list: removed items
+        """
+        keys = self._by_type.pop(item_type, None)
+        self.disabled.discard(item_type)
+        if keys is None:
+            return []
+        removed = []
+        for key in keys:
+            i = bisect_left(self._keys, key)
+            del self._keys[i]
+            removed.append(self._items.pop(i))
+        return removed
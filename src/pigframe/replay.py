@@ -0,0 +1,121 @@
+"""
+This module contains `InputLog`, the compact binary log of user actions used by
+`World.record_inputs` and `World.replay_inputs` for deterministic replays.
+"""
+
+import struct
+import sys
+from array import array
+
+_MAGIC = b"PGIL"
+_VERSION = 1
+# magic, version, number of actions, mask size in bytes, seed, number of frames
+_HEADER = struct.Struct("<4sHHBQI")
+
+
+def _mask_typecode(n_actions: int) -> str:
+    """Return the smallest unsigned array typecode which holds a mask of `n_actions` bits."""
+    for typecode in ("B", "H", "I", "L", "Q"):
+        if array(typecode).itemsize * 8 >= n_actions:
+            return typecode
+    raise ValueError(f"an input log holds at most 64 actions, got {n_actions}")
+
+
+class InputLog:
+    """Resolved action state of every frame plus the RNG seed of a recorded session.
+
+    Each frame is one `InputState` bitmask stored in an `array` of the smallest
+    unsigned type which fits the actions (1 byte per frame for up to 8 actions).
+    The binary format is a little-endian header, the action names and the masks.
+
+    ```python
+    log = world.record_inputs(seed=42)
+    ...  # play
+    log.save("session.pgil")
+    world.fast_forward(InputLog.load("session.pgil"))
+    ```
+    """
+
+    def __init__(self, names: list[str], seed: int = 0, masks=()) -> None:
+        """Resolved action state of every frame plus the RNG seed of a recorded session.
+
+        Parameters
+        ----------
+        names : list[str]
+            action names, in the bit order of `InputState`
+        seed : int, optional
+            seed passed to the seed hook when the session starts, by default 0
+        masks : Iterable[int], optional
+            action bitmask of every frame, by default ()
+        """
+        self.names = list(names)
+        self.seed = seed
+        self.masks = array(_mask_typecode(len(self.names)), masks)
+
+    def __len__(self) -> int:
+        return len(self.masks)
+
+    def __iter__(self):
+        return iter(self.masks)
+
+    def __eq__(self, other) -> bool:
+        if not isinstance(other, InputLog):
+            return NotImplemented
+        return (self.names, self.seed, self.masks) == (other.names, other.seed, other.masks)
+
+    def append(self, mask: int) -> None:
+        """Append the action bitmask of a frame."""
+        self.masks.append(mask)
+
+    def to_bytes(self) -> bytes:
+        """Serialize the log.
+
+        Returns
+        -------
+        _type_
+            bytes: header, action names separated by NUL and the masks, little-endian
+        """
+        masks = self.masks
+        if sys.byteorder == "big":
+            masks = array(masks.typecode, masks)
+            masks.byteswap()
+        names = "\0".join(self.names).encode()
+        header = _HEADER.pack(_MAGIC, _VERSION, len(self.names), masks.itemsize, self.seed, len(masks))
+        return header + struct.pack("<I", len(names)) + names + masks.tobytes()
+
+    @classmethod
+    def from_bytes(cls, buffer: bytes) -> "InputLog":
+        """Deserialize a log written by `to_bytes`.
+
+        Raises
+        ------
+        ValueError
+            if the buffer is not an input log of a supported version.
+        """
+        buffer = memoryview(buffer)
+        magic, version, n_names, itemsize, seed, n_frames = _HEADER.unpack_from(buffer)
+        if magic != _MAGIC or version != _VERSION:
+            raise ValueError("not a pigframe input log or unsupported version")
+        offset = _HEADER.size
+        (names_size,) = struct.unpack_from("<I", buffer, offset)
+        offset += 4
+        names = bytes(buffer[offset:offset + names_size]).decode()
+        offset += names_size
+        log = cls(names.split("\0") if n_names else [], seed)
+        if log.masks.itemsize != itemsize:
+            raise ValueError(f"mask size {itemsize} does not match {n_names} actions")
+        log.masks.frombytes(buffer[offset:offset + itemsize * n_frames])
+        if sys.byteorder == "big":
+            log.masks.byteswap()
+        return log
+
+    def save(self, path: str) -> None:
+        """Write the log to a file."""
+        with open(path, "wb") as f:
+            f.write(self.to_bytes())
+
+    @classmethod
+    def load(cls, path: str) -> "InputLog":
+        """Read a log written by `save`."""
+        with open(path, "rb") as f:
+            return cls.from_bytes(f.read())
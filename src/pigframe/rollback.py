@@ -0,0 +1,201 @@
+"""
+This module contains `RollbackBuffer`, the ring buffer of world states used by
+`World.enable_rollback` and `World.rewind` for rollback netcode and time-rewind mechanics.
+"""
+
+import zlib
+from collections import deque
+
+
+def _xor(a: bytes, b: bytes, size: int) -> bytes:
+    """XOR two byte strings, the shorter one padded with zeros to `size` bytes."""
+    return (int.from_bytes(a, "little") ^ int.from_bytes(b, "little")).to_bytes(size, "little")
+
+
+def _planes(data: bytes) -> bytes:
+    """Group the bytes of 8-byte values by position: the bytes which rarely change between frames
+    (signs, exponents and high bytes) become long runs of zeros in a XOR, which compress better."""
+    return b"".join(data[k::8] for k in range(8))
+
+
+def _unplanes(data: bytes) -> bytes:
+    """Reverse `_planes`."""
+    values = bytearray(len(data))
+    n = len(data) // 8
+    for k in range(8):
+        values[k::8] = data[k * n:(k + 1) * n]
+    return bytes(values)
+
+
+# how a blob of a delta is stored
+_RAW, _XOR, _XOR_PLANES = 0, 1, 2
+
+
+class RollbackBuffer:
+    """States of the last `capacity` consecutive frames, delta-compressed.
+
+    A state is a dict of blobs (bytes), e.g. the columns made by `snapshot.capture_world`.
+    Only the newest state is kept whole. Every older state is stored as a delta against
+    the state of the next frame, blob by blob: a blob equal to the next one costs nothing,
+    a changed blob is stored as its XOR with the next one, compressed with zlib.
+    Between consecutive frames most columns are unchanged or only change in the low bytes of
+    their values, so a delta is a fraction of a state.
+    Getting the state of `k` frames ago applies the `k` newest deltas, so short rewinds are cheap,
+    and dropping the oldest frame is free.
+    Each frame also keeps the input mask processed in that frame, for re-simulation.
+
+    ```python
+    buffer = RollbackBuffer(120)
+    buffer.push(world.frame, {"world": world.snapshot()})
+    ...
+    world.restore(buffer.state(frame)["world"])
+    ```
+    """
+
+    __slots__ = ("capacity", "level", "first", "_deltas", "_latest", "_inputs")
+
+    def __init__(self, capacity: int = 120, level: int = 1) -> None:
+        """States of the last `capacity` consecutive frames, delta-compressed.
+
+        Parameters
+        ----------
+        capacity : int, optional
+            number of frames kept, by default 120 (2 seconds at 60 FPS)
+        level : int, optional
+            zlib compression level of the deltas, by default 1
+        """
+        if capacity < 1:
+            raise ValueError(f"capacity must be at least 1, got {capacity}")
+        self.capacity = capacity
+        self.level = level
+        # frame of the oldest state
+        self.first = 0
+        # blob key -> None if the blob equals the one of the next state, or tuple:
+        # size of the blob, compressed data, _RAW, _XOR or _XOR_PLANES (XOR with the blob of the next state)
+        self._deltas: deque[dict] = deque()
+        self._latest: dict | None = None
+        self._inputs: deque[int | None] = deque()
+
+    def __len__(self) -> int:
+        return len(self._inputs)
+
+    def __contains__(self, frame: int) -> bool:
+        return self.first <= frame < self.first + len(self._inputs)
+
+    @property
+    def frames(self) -> range:
+        """Return the frames whose state is kept, oldest first."""
+        return range(self.first, self.first + len(self._inputs))
+
+    @property
+    def nbytes(self) -> int:
+        """Return the number of bytes of the kept states."""
+        latest = 0 if self._latest is None else sum(len(data) for data in self._latest.values())
+        return latest + sum(len(entry[1]) for delta in self._deltas for entry in delta.values() if entry is not None)
+
+    def clear(self) -> None:
+        """Drop every state."""
+        self._deltas.clear()
+        self._inputs.clear()
+        self._latest = None
+
+    def push(self, frame: int, state: dict) -> None:
+        """Keep the state of a frame, dropping the oldest one when the buffer is full.
+
+        Parameters
+        ----------
+        frame : int
+            frame of the state. Pushing the newest frame again replaces its state,
+            and a frame which does not follow the newest one starts the buffer over.
+        state : dict
+            state: key -> bytes. Blobs are compared with the previous state, so they must not be modified afterwards.
+        """
+        newest = self.first + len(self._inputs) - 1
+        if self._latest is None or not newest <= frame <= newest + 1:
+            self.clear()
+            self.first = frame
+            self._inputs.append(None)
+        elif frame == newest:
+            self._inputs[-1] = None
+            if self._deltas and state != self._latest:
+                # The delta of the previous frame is relative to the replaced state.
+                previous = self.state(frame - 1)
+                self._deltas[-1] = self._delta(previous, state)
+        else:
+            self._deltas.append(self._delta(self._latest, state))
+            self._inputs.append(None)
+            if len(self._inputs) > self.capacity:
+                self._deltas.popleft()
+                self._inputs.popleft()
+                self.first += 1
+        self._latest = state
+
+    def _delta(self, older: dict, newer: dict) -> dict:
+        """Return the delta which turns `newer` into `older`."""
+        delta = {}
+        level = self.level
+        for key, data in older.items():
+            next_data = newer.get(key)
+            if next_data is None:
+                delta[key] = len(data), zlib.compress(data, level), _RAW
+            elif next_data == data:
+                delta[key] = None
+            elif len(data) == len(next_data) and len(data) % 8 == 0:
+                delta[key] = len(data), zlib.compress(_planes(_xor(data, next_data, len(data))), level), _XOR_PLANES
+            else:
+                size = max(len(data), len(next_data))
+                delta[key] = len(data), zlib.compress(_xor(data, next_data, size), level), _XOR
+        return delta
+
+    def _check(self, frame: int) -> None:
+        if frame not in self:
+            raise KeyError(f"frame {frame} is not in the rollback buffer (frames {self.first} to {self.first + len(self) - 1})")
+
+    def state(self, frame: int) -> dict:
+        """Return the state of a kept frame.
+
+        Raises
+        ------
+        KeyError
+            if the frame is not kept.
+        """
+        self._check(frame)
+        state = self._latest
+        for i in range(len(self._deltas) - 1, frame - self.first - 1, -1):
+            older = {}
+            for key, entry in self._deltas[i].items():
+                if entry is None:
+                    older[key] = state[key]
+                    continue
+                size, data, mode = entry
+                data = zlib.decompress(data)
+                if mode == _XOR_PLANES:
+                    data = _unplanes(data)
+                older[key] = data if mode == _RAW else _xor(state[key], data, len(data))[:size]
+            state = older
+        return state
+
+    def set_input(self, frame: int, mask: int) -> None:
+        """Keep the input mask processed in a kept frame."""
+        self._check(frame)
+        self._inputs[frame - self.first] = mask
+
+    def inputs(self, start: int, stop: int) -> list:
+        """Return the input masks of the frames from `start` to `stop` (excluded), None for unknown ones."""
+        return [self._inputs[frame - self.first] if frame in self else None for frame in range(start, stop)]
+
+    def discard_after(self, frame: int) -> dict:
+        """Drop the states of the frames after a kept frame, which becomes the newest one.
+
+        Returns
+        -------
+        _type_
+            dict: state of the frame
+        """
+        state = self.state(frame)
+        keep = frame - self.first
+        while len(self._deltas) > keep:
+            self._deltas.pop()
+            self._inputs.pop()
+        self._latest = state
+        return state
@@ -6,6 +6,24 @@ from typing import TypeVar
 
 _T_event = TypeVar('_T_event')
 
+
+class SceneEvent:
+    """Trigger and run flag of an event in a scene.
+    `event["triger"]` and `event["run"]` are still accepted for the former dict entries.
+    """
+    __slots__ = ("triger", "run")
+
+    def __init__(self, triger: callable, run: int = 0) -> None:
+        self.triger = triger
+        self.run = run
+
+    def __getitem__(self, key: str):
+        return getattr(self, key)
+
+    def __setitem__(self, key: str, value) -> None:
+        setattr(self, key, value)
+
+
 class SceneManager():
     """scene manager class.
     """
@@ -56,8 +74,22 @@ class SceneManager():
         if self.__scenes_events.get(scene) is None:
             self.__scenes_events.update({scene: {}})
         
-        self.__scenes_events[scene].update({event_type: {"triger": triger, "run": 0}})
+        self.__scenes_events[scene].update({event_type: SceneEvent(triger)})
         
+    def remove_scene_event(self, scene: str, event_type: _T_event) -> None:
+        """Remove event from the scene.
+
+        Parameters
+        ----------
+        scene : str
+            Scene to remove event from.
+        event_type : _T_event
+            Event type.
+        """
+        events = self.__scenes_events.get(scene)
+        if events is not None:
+            events.pop(event_type, None)
+
     def add_scene_transition(self, scene_from: str, scene_to: str, triger: callable) -> None:
         """Add transition between scenes.
 
@@ -87,7 +119,7 @@ class SceneManager():
         run : int
             whether the event should be run
         """
-        self.__scenes_events[scene][event_type]["run"] = run
+        self.__scenes_events[scene][event_type].run = run
         
     def process(self):
         """Process events and transitions. Update current scene.
@@ -99,11 +131,12 @@ class SceneManager():
     def __process_events(self):
         """Process events.
         """
-        if self.__scenes_events.get(self.current_scene) is None:
+        events = self.__scenes_events.get(self.current_scene)
+        if events is None:
             return
-        for event, event_data in self.__scenes_events[self.current_scene].items():
-            if event_data["triger"]():
-                self.update_scene_event(self.current_scene, event, 1)
+        for event in events.values():
+            if event.triger():
+                event.run = 1
     
     def __process_transitions(self):
         """Process transitions.
@@ -0,0 +1,119 @@
+"""
+This module contains schedules which decide how many times a system runs in a frame.
+A schedule is given to `World.add_system_to_scenes` or `World.add_system`;
+systems without schedule run exactly once per `World.process_systems` call.
+"""
+
+
+class Schedule:
+    """Base class of system schedules."""
+
+    def runs(self, world) -> int:
+        """Return how many times the system runs in the current frame.
+
+        Parameters
+        ----------
+        world : World
+            World object
+
+        Returns
+        -------
+        _type_
+            int: number of runs, 0 to skip the system
+        """
+        return 1
+
+
+class EveryNFrames(Schedule):
+    """Run a system once every `n` frames of its scenes."""
+
+    def __init__(self, n: int, offset: int = 0) -> None:
+        """Run a system once every `n` frames of its scenes.
+
+        Parameters
+        ----------
+        n : int
+            period in frames
+        offset : int, optional
+            frame of the first run, by default 0 (the system runs in the first frame).
+            Different offsets spread systems of the same period over different frames.
+        """
+        if n < 1:
+            raise ValueError(f"n must be at least 1, got {n}")
+        self.n = n
+        self.counter = -offset
+
+    def runs(self, world) -> int:
+        counter = self.counter
+        self.counter += 1
+        return 1 if counter >= 0 and counter % self.n == 0 else 0
+
+
+class FixedRate(Schedule):
+    """Run a system at a fixed simulation rate, independent of the frame rate.
+
+    Every frame adds `world.dt` to an accumulator, and the system runs once per
+    elapsed `period`. When frames are too long, at most `max_steps` runs catch up
+    in one frame and the rest of the backlog is dropped.
+    """
+
+    # Tolerance so that e.g. six 1/60 s frames make exactly one 10 Hz step despite rounding.
+    EPSILON = 1e-9
+
+    def __init__(self, rate: float, max_steps: int = 5) -> None:
+        """Run a system at a fixed simulation rate.
+
+        Parameters
+        ----------
+        rate : float
+            runs per second of simulated time (`world.dt`)
+        max_steps : int, optional
+            maximum number of runs in one frame, by default 5
+        """
+        if rate <= 0:
+            raise ValueError(f"rate must be positive, got {rate}")
+        self.rate = rate
+        self.period = 1 / rate
+        self.max_steps = max_steps
+        self.accumulator = 0.0
+
+    def runs(self, world) -> int:
+        self.accumulator += world.dt
+        steps = int((self.accumulator + self.EPSILON) / self.period)
+        if steps > self.max_steps:
+            steps = self.max_steps
+            self.accumulator = 0.0
+        else:
+            self.accumulator -= steps * self.period
+        return steps
+
+
+class OnDemand(Schedule):
+    """Run a system only when it has work to do.
+
+    The system runs in the next frame after `request` is called,
+    and in every frame where `predicate(world)` returns True.
+    """
+
+    def __init__(self, predicate=None) -> None:
+        """Run a system only when it has work to do.
+
+        Parameters
+        ----------
+        predicate : callable, optional
+            called with the world every frame, the system runs if it returns True, by default None
+        """
+        self.predicate = predicate
+        self.pending = False
+
+    def request(self) -> None:
+        """Run the system in the next frame."""
+        self.pending = True
+
+    def runs(self, world) -> int:
+        if self.pending:
+            self.pending = False
+            return 1
+        if self.predicate is not None and self.predicate(world):
+            return 1
+        return 0
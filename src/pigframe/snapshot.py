@@ -0,0 +1,533 @@
+"""
+This module contains the world state used by `World.snapshot`, `World.restore` and `World.rewind`,
+and its binary snapshot format.
+
+A world state (`capture_world`) is a dict of blobs:
+
+- "meta": pickled component schemas, storage layout, allocator counters, scene state, frame, input state and RNG state
+- "entities", "generations", "alive", "free": entity ids and entity allocator state
+- ("ids", component type): ids of the entities which have the component type
+- ("field", component type, field name): one column per field
+- ("components", component type): pickled components whose instances do not share the same fields
+- ("rows", kind, key): entity ids in the order of the rows of a cached query: kind "component" or "components"
+  for the caches of `World.get_component` and `World.get_components` keyed by their types,
+  "query" for the registered queries keyed by their position
+
+A field whose values are all `int` (64-bit), `float` or `bool` is packed with `array`,
+columns of columnar components are the bytes of their NumPy arrays, and other fields are pickled.
+Numeric blobs are little-endian. Since every column is a blob of its own, the rollback buffer
+compares and delta-compresses states column by column.
+
+A snapshot (`pack_state`) is a header, the blobs 8-byte aligned and a pickled table of contents:
+
+- header: magic, version, offset and size of the table of contents
+- table of contents: key, offset and size of every blob
+
+Blobs are aligned so that `SnapshotFile` can use them in place from a memory-mapped file.
+
+Component types, schemas and non-numeric fields are pickled. Loading a snapshot unpickles them,
+which can run arbitrary code: only load snapshots from trusted sources, never from the network
+or from files which other users can write.
+"""
+
+import mmap
+import os
+import pickle
+import struct
+import sys
+from array import array
+from collections import deque
+from itertools import repeat
+from operator import attrgetter, itemgetter, setitem
+
+from .storage import components_from_columns
+
+_MAGIC = b"PGWS"
+_VERSION = 2
+# magic, version, flags, offset of the table of contents, size of the table of contents
+_HEADER = struct.Struct("<4sHHQQ")
+_ALIGN = 8
+_INT64_MIN = -(1 << 63)
+_INT64_MAX = (1 << 63) - 1
+_BIG_ENDIAN = sys.byteorder == "big"
+# array typecode -> NumPy dtype of the little-endian blobs
+_NUMPY_DTYPES = {"q": "<i8", "d": "<f8", "B": "?", "Q": "<u8"}
+
+
+def _pack(typecode: str, values) -> bytes:
+    """Return the little-endian bytes of an `array` of the values."""
+    values = array(typecode, values)
+    if _BIG_ENDIAN:
+        values.byteswap()
+    return values.tobytes()
+
+
+def _unpack(typecode: str, data):
+    """Return the values of a little-endian blob: a memoryview cast to the typecode,
+    or an `array` on big-endian hosts."""
+    if _BIG_ENDIAN:
+        values = array(typecode)
+        values.frombytes(data)
+        values.byteswap()
+        return values
+    return memoryview(data).cast(typecode)
+
+
+def _column_values(data, kind: str) -> list:
+    """Return the values of a field blob as a list."""
+    if kind == "pickle":
+        return pickle.loads(data)
+    if kind == "B":
+        return [value != 0 for value in _unpack("B", data)]
+    return _unpack(kind, data).tolist()
+
+
+def _column_kind(values) -> str | None:
+    """Return the array typecode which stores every value exactly, None if there is none."""
+    types = set(map(type, values))
+    if len(types) != 1:
+        return None
+    kind = types.pop()
+    if kind is bool:
+        return "B"
+    if kind is float:
+        return "d"
+    if kind is int and _INT64_MIN <= min(values) and max(values) <= _INT64_MAX:
+        return "q"
+    return None
+
+
+def _field_names(component_type: type, components: list) -> tuple[str, tuple] | None:
+    """Return tuple: "dict" or "slots", field names of the first component, None if components differ.
+
+    Fields are the instance attributes, or the dataclass fields of components stored in slots.
+    Instance attributes are only compared by count: reading the fields of every component
+    raises `KeyError` if one of them has other attributes.
+    """
+    first = components[0]
+    fields = tuple(getattr(component_type, "__dataclass_fields__", ()))
+    names = getattr(first, "__dict__", None)
+    if names:
+        names = tuple(names)
+        if not all(name in names for name in fields):
+            return None
+        try:
+            if set(map(len, map(vars, components))) == {len(names)}:
+                return "dict", names
+        except TypeError:
+            # a component without instance attributes
+            pass
+        return None
+    if fields and not any(getattr(component, "__dict__", None) for component in components):
+        return "slots", fields
+    return None
+
+
+def _entries(storage, component_type: type) -> tuple:
+    """Return tuple: entity ids, components, in the iteration order of the storage."""
+    pools = storage.components
+    # The components of `DefaultStorage` are pools. Other storages only give an iterator.
+    pool = pools.get(component_type) if isinstance(pools, dict) else None
+    if pool is not None and hasattr(pool, "dense"):
+        return pool.entities, pool.dense
+    entries = list(storage.iter_component(component_type))
+    return [entity for entity, _ in entries], [component for _, component in entries]
+
+
+def _columnar_pool(storage, component_type: type):
+    """Return the columnar pool of a component type, None if it is not stored in one."""
+    pools = storage.components
+    pool = pools.get(component_type) if isinstance(pools, dict) else None
+    return pool if hasattr(pool, "columns") else None
+
+
+def _capture_components(state: dict, component_type: type, components: list) -> tuple:
+    """Add the blobs of the components of one type to a state and return tuple: encoding, fields."""
+    layout = _field_names(component_type, components)
+    if layout is None:
+        state[("components", component_type)] = pickle.dumps(components, pickle.HIGHEST_PROTOCOL)
+        return "pickle", []
+    encoding, names = layout
+    if encoding == "dict":
+        dicts = list(map(vars, components))
+        try:
+            columns = [list(map(itemgetter(name), dicts)) for name in names]
+        except KeyError:
+            state[("components", component_type)] = pickle.dumps(components, pickle.HIGHEST_PROTOCOL)
+            return "pickle", []
+    else:
+        columns = [list(map(attrgetter(name), components)) for name in names]
+    fields = []
+    for name, values in zip(names, columns):
+        kind = _column_kind(values)
+        if kind is None:
+            kind = "pickle"
+            state[("field", component_type, name)] = pickle.dumps(values, pickle.HIGHEST_PROTOCOL)
+        else:
+            state[("field", component_type, name)] = _pack(kind, values)
+        fields.append((name, kind))
+    return encoding, fields
+
+
+def capture_world(world, rng=None) -> dict:
+    """Return the state of a world: entities, components, entity allocator, scene state, frame
+    and input state, and the state of `rng` (an object with `getstate`, e.g. the `random` module) if given.
+
+    Returns
+    -------
+    _type_
+        dict: blob key -> bytes, see the module documentation
+    """
+    storage = world.storage
+    allocator = world.entity_allocator
+    state = {
+        "entities": _pack("Q", storage.entities),
+        "generations": _pack("Q", allocator.generations),
+        "alive": bytes(allocator.alive),
+        "free": _pack("Q", allocator.free),
+    }
+    schemas = []
+    for component_type in list(storage.components):
+        pool = _columnar_pool(storage, component_type)
+        if pool is not None:
+            n = len(pool)
+            if not n:
+                continue
+            state[("ids", component_type)] = pool.ids[:n].astype("<u8").tobytes()
+            fields = []
+            for name, column in pool.columns.items():
+                dtype = column.dtype.newbyteorder("<")
+                state[("field", component_type, name)] = column[:n].astype(dtype, copy=False).tobytes()
+                fields.append((name, "numpy:" + dtype.str))
+            schemas.append((component_type, n, "columns", fields))
+            continue
+        ids, components = _entries(storage, component_type)
+        if not ids:
+            continue
+        state[("ids", component_type)] = _pack("Q", ids)
+        encoding, fields = _capture_components(state, component_type, components)
+        schemas.append((component_type, len(ids), encoding, fields))
+
+    # The order of cached rows depends on the changes which made them, not only on the storage.
+    for kind, caches in (
+        ("component", world._get_component_cache.items()),
+        ("components", world._get_components_cache.items()),
+        ("query", enumerate(world._queries)),
+    ):
+        for key, cached in caches:
+            state[("rows", kind, key)] = _pack("Q", map(itemgetter(0), cached.rows))
+
+    manager = world.scene_manager
+    input_state = world.input_state
+    meta = {
+        "components": schemas,
+        "alive_count": allocator.alive_count,
+        "layout": (type(storage), storage.layout()),
+        "scene": (
+            manager.current_scene,
+            manager.next_scene,
+            manager.prev_scene,
+            {scene: {event_type: event.run for event_type, event in events.items()} for scene, events in manager.scenes_events.items()},
+        ),
+        "frame": world.frame,
+        "dt": world.dt,
+        "input": None if input_state is None else (input_state.current, input_state.previous, input_state.frame, list(input_state.history)),
+        "random": None if rng is None else rng.getstate(),
+    }
+    state["meta"] = pickle.dumps(meta, pickle.HIGHEST_PROTOCOL)
+    return state
+
+
+def _decode_components(state: dict, component_type: type, n: int, encoding: str, fields: list):
+    """Decode the components of one type: a list of components, or a dict of field columns for columnar types."""
+    if encoding == "pickle":
+        return pickle.loads(state[("components", component_type)])
+    if encoding == "columns":
+        import numpy as np
+
+        return {name: np.frombuffer(state[("field", component_type, name)], dtype=kind[6:]) for name, kind in fields}
+    names = [name for name, _ in fields]
+    columns = [_column_values(state[("field", component_type, name)], kind) for name, kind in fields]
+    new = component_type.__new__
+    components = []
+    if encoding == "dict":
+        for row in zip(*columns) if columns else ((),) * n:
+            component = new(component_type)
+            component.__dict__.update(zip(names, row))
+            components.append(component)
+    else:
+        setter = object.__setattr__
+        for row in zip(*columns):
+            component = new(component_type)
+            for name, value in zip(names, row):
+                setter(component, name, value)
+            components.append(component)
+    return components
+
+
+def _write_in_place(storage, state: dict, entities: list, schemas: list) -> bool:
+    """Write the field values of a state into the components of a storage.
+
+    Only done when the storage has the entities of the state, and every component type has
+    the same entities in the same order and the same fields. Returns whether it was done:
+    when it was not, the storage must be rebuilt from the state.
+    """
+    if list(storage.entities) != entities:
+        return False
+    if {schema[0] for schema in schemas} != {ct for ct in storage.components if storage.count(ct)}:
+        return False
+    targets = []
+    for component_type, n, encoding, fields in schemas:
+        if encoding == "pickle":
+            return False
+        ids = _unpack("Q", state[("ids", component_type)]).tolist()
+        if encoding == "columns":
+            pool = _columnar_pool(storage, component_type)
+            if pool is None or len(pool) != n or pool.ids[:n].tolist() != ids:
+                return False
+            targets.append(pool)
+            continue
+        live_ids, components = _entries(storage, component_type)
+        names = tuple(name for name, _ in fields)
+        if list(live_ids) != ids or _field_names(component_type, components) != (encoding, names):
+            return False
+        targets.append(components)
+
+    for (component_type, n, encoding, fields), target in zip(schemas, targets):
+        if encoding == "columns":
+            import numpy as np
+
+            for name, kind in fields:
+                target.columns[name][:n] = np.frombuffer(state[("field", component_type, name)], dtype=kind[6:])
+            continue
+        if encoding == "dict":
+            target, setter = list(map(vars, target)), setitem
+        else:
+            setter = object.__setattr__
+        for name, kind in fields:
+            values = _column_values(state[("field", component_type, name)], kind)
+            deque(map(setter, target, repeat(name), values), 0)
+        # A component which had other attributes than the saved ones has gained one.
+        # The storage is then rebuilt from the state, which drops the written components.
+        if encoding == "dict" and set(map(len, target)) != {len(fields)}:
+            return False
+    return True
+
+
+def apply_state(world, state: dict, rng=None, adopt: bool = False, in_place: bool = False) -> bool:
+    """Replace the state of a world with a state made by `capture_world`,
+    and the state of `rng` (an object with `setstate`) if the state has one.
+
+    Parameters
+    ----------
+    world : World
+        world
+    state : dict
+        state
+    rng : optional
+        random number generator, by default None
+    adopt : bool, optional
+        whether columnar pools may use the columns of the state without copying them, by default False
+    in_place : bool, optional
+        whether to write the field values into the current components when the world has the same entities
+        and components as the state, instead of rebuilding the storage, by default False
+
+    Returns
+    -------
+    _type_
+        bool: True if the storage has been rebuilt, False if the values have been written in place.
+    """
+    meta = pickle.loads(state["meta"])
+    schemas = meta["components"]
+    entities = _unpack("Q", state["entities"]).tolist()
+    rebuilt = not (in_place and _write_in_place(world.storage, state, entities, schemas))
+    if rebuilt:
+        components = {}
+        for component_type, n, encoding, fields in schemas:
+            ids = _unpack("Q", state[("ids", component_type)]).tolist()
+            components[component_type] = (ids, _decode_components(state, component_type, n, encoding, fields))
+        storage_type, layout = meta["layout"]
+        storage = type(world.storage)()
+        # A layout only applies to the storage type which made it.
+        storage.restore(entities, components, adopt=adopt, layout=layout if storage_type is type(storage) else ())
+        world.storage = storage
+
+    allocator = world.entity_allocator
+    allocator.generations = _unpack("Q", state["generations"]).tolist()
+    allocator.alive = bytearray(state["alive"])
+    allocator.free = deque(_unpack("Q", state["free"]))
+    allocator.alive_count = meta["alive_count"]
+
+    manager = world.scene_manager
+    manager.current_scene, manager.next_scene, manager.prev_scene, runs = meta["scene"]
+    for scene, events in runs.items():
+        states = manager.get_scene_events(scene) or {}
+        for event_type, run in events.items():
+            if event_type in states:
+                states[event_type].run = run
+    world.frame = meta["frame"]
+    world.dt = meta["dt"]
+    if meta["input"] is not None and world.input_state is not None:
+        input_state = world.input_state
+        input_state.current, input_state.previous, input_state.frame, history = meta["input"]
+        if len(history) == len(input_state.history):
+            input_state.history[:] = history
+    if rng is not None and meta["random"] is not None:
+        rng.setstate(meta["random"])
+    return rebuilt
+
+
+def row_orders(state: dict) -> dict:
+    """Return the row orders of the cached queries of a state: tuple: kind, key -> list of entity ids."""
+    return {key[1:]: _unpack("Q", data).tolist() for key, data in state.items() if key[0] == "rows"}
+
+
+def pack_state(state: dict) -> bytes:
+    """Serialize a state made by `capture_world` into a snapshot."""
+    buffer = bytearray(_HEADER.size)
+    toc = []
+    for key, data in state.items():
+        buffer.extend(bytes(-len(buffer) % _ALIGN))
+        toc.append((key, len(buffer), len(data)))
+        buffer.extend(data)
+    offset = len(buffer)
+    buffer.extend(pickle.dumps(toc, pickle.HIGHEST_PROTOCOL))
+    _HEADER.pack_into(buffer, 0, _MAGIC, _VERSION, 0, offset, len(buffer) - offset)
+    return bytes(buffer)
+
+
+def unpack_state(buffer) -> dict:
+    """Return the state of a snapshot. Blobs are memoryviews of the buffer, nothing is copied.
+
+    Raises
+    ------
+    ValueError
+        if the buffer is not a world snapshot of a supported version.
+    """
+    buffer = memoryview(buffer)
+    if len(buffer) < _HEADER.size:
+        raise ValueError("not a pigframe world snapshot")
+    magic, version, _, offset, size = _HEADER.unpack_from(buffer)
+    if magic != _MAGIC or version != _VERSION:
+        raise ValueError("not a pigframe world snapshot or unsupported version")
+    toc = pickle.loads(buffer[offset:offset + size])
+    return {key: buffer[start:start + length] for key, start, length in toc}
+
+
+def dump_world(world, rng=None) -> bytes:
+    """Serialize the state of a world (see `capture_world`) into a snapshot."""
+    return pack_state(capture_world(world, rng))
+
+
+def load_world(world, buffer, rng=None, adopt: bool = False) -> bool:
+    """Replace the state of a world with a snapshot made by `dump_world`, see `apply_state`."""
+    return apply_state(world, unpack_state(buffer), rng, adopt)
+
+
+class SnapshotFile:
+    """Snapshot file (see `World.save_snapshot`) opened with `mmap`.
+
+    Nothing is read until it is accessed: numeric columns are NumPy arrays over the mapped file,
+    and the component objects of a type are built the first time `components` is called for it.
+    The mapping is copy-on-write, so modifying a column never writes to the file.
+    Opening a file unpickles its table of contents and schemas, which can run arbitrary code:
+    only open files from trusted sources.
+
+    ```python
+    with SnapshotFile("level1.pgws") as level:
+        tiles = level.column(Tile, "kind")
+        level.restore(world)
+    ```
+    """
+
+    def __init__(self, path) -> None:
+        """Snapshot file (see `World.save_snapshot`) opened with `mmap`.
+
+        Parameters
+        ----------
+        path : str | os.PathLike
+            snapshot file from a trusted source
+
+        Raises
+        ------
+        ValueError
+            if the file is not a world snapshot.
+        """
+        with open(path, "rb") as file:
+            if os.fstat(file.fileno()).st_size == 0:
+                raise ValueError("not a pigframe world snapshot")
+            self.buffer = memoryview(mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_COPY))
+        self.state = unpack_state(self.buffer)
+        self._types = {schema[0]: schema[1:] for schema in pickle.loads(self.state["meta"])["components"]}
+        self._components: dict[type, list] = {}
+
+    def __len__(self) -> int:
+        return len(self.entities)
+
+    def __enter__(self) -> "SnapshotFile":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def close(self) -> None:
+        """Drop the references to the file. The mapping is released once no restored column uses it."""
+        self.buffer = None
+        self.state = None
+        self._components.clear()
+
+    @property
+    def entities(self):
+        """Return the entity ids, in the iteration order of the saved world."""
+        return _unpack("Q", self.state["entities"])
+
+    @property
+    def component_types(self) -> list[type]:
+        """Return the component types which have at least one component."""
+        return list(self._types)
+
+    def ids(self, component_type: type):
+        """Return the ids of the entities which have a component type, parallel to its columns."""
+        return _unpack("Q", self.state[("ids", component_type)])
+
+    def column(self, component_type: type, name: str):
+        """Return the values of a field of a component type, parallel to `ids`.
+
+        Parameters
+        ----------
+        component_type : type
+            component type
+        name : str
+            field name
+
+        Returns
+        -------
+        _type_
+            NumPy array over the mapped file for numeric fields (NumPy is required), list otherwise.
+        """
+        _, encoding, fields = self._types[component_type]
+        if encoding == "pickle":
+            return [getattr(component, name) for component in self.components(component_type)]
+        kind = dict(fields)[name]
+        data = self.state[("field", component_type, name)]
+        if kind == "pickle":
+            return pickle.loads(data)
+        import numpy as np
+
+        return np.frombuffer(data, dtype=kind[6:] if kind.startswith("numpy:") else _NUMPY_DTYPES[kind])
+
+    def components(self, component_type: type) -> list:
+        """Return the components of a type, parallel to `ids`. They are built on the first call."""
+        components = self._components.get(component_type)
+        if components is None:
+            n, encoding, fields = self._types[component_type]
+            components = _decode_components(self.state, component_type, n, encoding, fields)
+            if isinstance(components, dict):
+                components = components_from_columns(component_type, components, n)
+            self._components[component_type] = components
+        return components
+
+    def restore(self, world) -> None:
+        """Replace the state of a world with the snapshot, see `World.restore`.
+        Columns of columnar components are used in place, without being copied."""
+        world._restore(self.state, adopt=True)
@@ -0,0 +1,243 @@
+"""
+This module contains `SpatialGrid`, a uniform-grid spatial index of the entities of a query,
+kept up to date by `World` like any registered `Query`.
+"""
+
+from math import floor
+
+from .query import Query
+
+# Half of the 8 neighbouring cells: visiting them from every cell visits each pair of cells once.
+_FORWARD_NEIGHBOURS = ((1, 0), (-1, 1), (0, 1), (1, 1))
+_NEIGHBOURS = tuple((dx, dy) for dx in (-1, 0, 1) for dy in (-1, 0, 1))
+
+
+class SpatialGrid(Query):
+    """Uniform-grid spatial index of the entities having a position component.
+
+    Entities are points at the `x` / `y` attributes of their position component, bucketed
+    in square cells of `cell_size`. Entities entering or leaving the query (spawned,
+    removed, component added or removed) are indexed incrementally; positions are
+    mutated in place by systems, so call `refresh` once per frame after movement.
+
+    For broad-phase collision, choose a cell size at least as large as the largest
+    object: two objects which overlap are then always in the same or neighbouring cells.
+
+    ```python
+    grid = world.add_spatial_index(Position, cell_size=16, none=[Playable])
+    ...
+    grid.refresh()
+    for a, b in grid.candidate_pairs():
+        ...
+    ```
+    """
+
+    __slots__ = ("position_type", "cell_size", "x", "y", "cells", "entity_cells")
+
+    def __init__(self, position_type: type, cell_size: float, all=(), none=(), any=(), x: str = "x", y: str = "y") -> None:
+        """Uniform-grid spatial index of the entities having a position component.
+
+        Parameters
+        ----------
+        position_type : type
+            component type holding the position
+        cell_size : float
+            width and height of a cell
+        all : list[Type[Component]], optional
+            other component types an indexed entity must have, by default ()
+        none : list[Type[Component]], optional
+            component types an indexed entity must not have, by default ()
+        any : list[Type[Component]], optional
+            component types an indexed entity must have at least one of, by default () for no constraint
+        x : str, optional
+            attribute of the x coordinate, by default "x"
+        y : str, optional
+            attribute of the y coordinate, by default "y"
+        """
+        if cell_size <= 0:
+            raise ValueError(f"cell_size must be positive, got {cell_size}")
+        self.position_type = position_type
+        self.cell_size = cell_size
+        self.x = x
+        self.y = y
+        # cell -> entity -> position component. Dicts keep iteration order deterministic.
+        self.cells: dict[tuple[int, int], dict[int, object]] = {}
+        self.entity_cells: dict[int, tuple[int, int]] = {}
+        super().__init__(all=(position_type, *all), none=none, any=any)
+
+    def __repr__(self) -> str:
+        return f"SpatialGrid({self.position_type.__name__}, cell_size={self.cell_size}, {super().__repr__()})"
+
+    def cell_of(self, x: float, y: float) -> tuple[int, int]:
+        """Return the cell containing a point."""
+        return floor(x / self.cell_size), floor(y / self.cell_size)
+
+    def _position(self, position) -> tuple[float, float]:
+        return getattr(position, self.x), getattr(position, self.y)
+
+    def _insert(self, entity: int, position) -> None:
+        cell = self.cell_of(*self._position(position))
+        self.entity_cells[entity] = cell
+        bucket = self.cells.get(cell)
+        if bucket is None:
+            self.cells[cell] = {entity: position}
+        else:
+            bucket[entity] = position
+
+    def _remove(self, entity: int) -> None:
+        cell = self.entity_cells.pop(entity)
+        bucket = self.cells[cell]
+        del bucket[entity]
+        if not bucket:
+            del self.cells[cell]
+
+    def add(self, entity: int, payload) -> None:
+        if entity in self.index:
+            return
+        super().add(entity, payload)
+        self._insert(entity, payload[0])
+
+    def discard(self, entity: int) -> None:
+        if entity not in self.index:
+            return
+        super().discard(entity)
+        self._remove(entity)
+
+    def _replace(self, i: int, entity: int, payload) -> None:
+        super()._replace(i, entity, payload)
+        self._remove(entity)
+        self._insert(entity, payload[0])
+
+    def _index_rows(self) -> None:
+        self.cells.clear()
+        self.entity_cells.clear()
+        for entity, components in self.rows:
+            self._insert(entity, components[0])
+
+    def reorder(self, entities) -> None:
+        rows = self.rows
+        super().reorder(entities)
+        if self.rows is not rows:
+            self._index_rows()
+
+    def rebuild(self, storage) -> None:
+        super().rebuild(storage)
+        self._index_rows()
+
+    def refresh(self) -> int:
+        """Move the entities whose position has left their cell since the last refresh.
+
+        Returns
+        -------
+        _type_
+            int: number of entities which changed cell
+        """
+        moved = 0
+        cell_size = self.cell_size
+        x, y = self.x, self.y
+        entity_cells = self.entity_cells
+        for entity, components in self.rows:
+            position = components[0]
+            cell = floor(getattr(position, x) / cell_size), floor(getattr(position, y) / cell_size)
+            if cell != entity_cells[entity]:
+                self._remove(entity)
+                entity_cells[entity] = cell
+                self.cells.setdefault(cell, {})[entity] = position
+                moved += 1
+        return moved
+
+    def query_aabb(self, x0: float, y0: float, x1: float, y1: float) -> list[int]:
+        """Return the entities whose position is inside an axis-aligned box (bounds included).
+
+        Parameters
+        ----------
+        x0 : float
+            left of the box
+        y0 : float
+            top of the box
+        x1 : float
+            right of the box
+        y1 : float
+            bottom of the box
+
+        Returns
+        -------
+        _type_
+            list[int]: entity ids, in no particular order
+        """
+        cx0, cy0 = self.cell_of(x0, y0)
+        cx1, cy1 = self.cell_of(x1, y1)
+        x, y = self.x, self.y
+        found = []
+        cells = self.cells
+        if cx1 < cx0 or cy1 < cy0:
+            return found
+        if (cx1 - cx0 + 1) * (cy1 - cy0 + 1) > len(cells):
+            # The box covers more cells than there are occupied ones: visit the occupied ones.
+            buckets = [bucket for (cx, cy), bucket in cells.items() if cx0 <= cx <= cx1 and cy0 <= cy <= cy1]
+        else:
+            buckets = [cells.get((cx, cy)) for cx in range(cx0, cx1 + 1) for cy in range(cy0, cy1 + 1)]
+        for bucket in buckets:
+            if bucket is None:
+                continue
+            for entity, position in bucket.items():
+                px, py = getattr(position, x), getattr(position, y)
+                if x0 <= px <= x1 and y0 <= py <= y1:
+                    found.append(entity)
+        return found
+
+    def query_radius(self, cx: float, cy: float, radius: float) -> list[int]:
+        """Return the entities whose position is within `radius` of a point (boundary included).
+
+        Returns
+        -------
+        _type_
+            list[int]: entity ids
+        """
+        x, y = self.x, self.y
+        r2 = radius * radius
+        found = []
+        for entity in self.query_aabb(cx - radius, cy - radius, cx + radius, cy + radius):
+            position = self.rows[self.index[entity]][1][0]
+            dx, dy = getattr(position, x) - cx, getattr(position, y) - cy
+            if dx * dx + dy * dy <= r2:
+                found.append(entity)
+        return found
+
+    def candidate_pairs(self, other: "SpatialGrid | None" = None) -> list[tuple[int, int]]:
+        """Return the pairs of entities in the same or neighbouring cells (broad phase).
+
+        Parameters
+        ----------
+        other : SpatialGrid | None, optional
+            grid of the same cell size to pair the entities of this grid with (e.g. bullets and enemies),
+            by default None to pair the entities of this grid together
+
+        Returns
+        -------
+        _type_
+            list[tuple[int, int]]: pairs of entity ids, each pair once.
+            With `other`, the first id is from this grid and the second from `other`.
+        """
+        pairs = []
+        cells = self.cells
+        if other is None:
+            for (cx, cy), bucket in cells.items():
+                entities = list(bucket)
+                for i, a in enumerate(entities):
+                    for b in entities[i + 1:]:
+                        pairs.append((a, b))
+                for dx, dy in _FORWARD_NEIGHBOURS:
+                    neighbour = cells.get((cx + dx, cy + dy))
+                    if neighbour is not None:
+                        pairs.extend((a, b) for a in entities for b in neighbour)
+            return pairs
+        if other.cell_size != self.cell_size:
+            raise ValueError("both grids must have the same cell size")
+        other_cells = other.cells
+        for (cx, cy), bucket in cells.items():
+            for dx, dy in _NEIGHBOURS:
+                neighbour = other_cells.get((cx + dx, cy + dy))
+                if neighbour is not None:
+                    pairs.extend((a, b) for a in bucket for b in neighbour if a != b)
+        return pairs
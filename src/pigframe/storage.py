@@ -0,0 +1,731 @@
+"""
+This module contains component storage backends used by `World`.
+
+`DefaultStorage` keeps an entity -> components dict and a `SparseSet` pool per component type.
+`ArchetypeStorage` groups entities sharing the same set of component types into tables,
+so multi-component queries only walk the tables that match.
+"""
+
+import dataclasses
+from typing import Iterator
+from collections.abc import Mapping
+from itertools import starmap, repeat
+from abc import ABCMeta, abstractmethod
+from .entity import ENTITY_INDEX_MASK
+
+SPARSE_PAGE_BITS = 12
+SPARSE_PAGE_SIZE = 1 << SPARSE_PAGE_BITS
+SPARSE_PAGE_MASK = SPARSE_PAGE_SIZE - 1
+
+
+def components_from_columns(component_type: type, columns: dict, n: int) -> list:
+    """Build `n` components from field columns.
+
+    Parameters
+    ----------
+    component_type : type
+        component type
+    columns : dict
+        field name -> sequence of `n` values, or a single value shared by every component
+    n : int
+        number of components
+
+    Returns
+    -------
+    _type_
+        list: components
+    """
+    if not columns:
+        return [component_type() for _ in range(n)]
+    names = list(columns)
+    values = [
+        repeat(column, n) if isinstance(column, (str, bytes)) or not hasattr(column, "__len__") else column
+        for column in columns.values()
+    ]
+    if dataclasses.is_dataclass(component_type):
+        init_fields = [f.name for f in dataclasses.fields(component_type) if f.init]
+        if names == init_fields[: len(names)]:
+            # Positional construction skips building a kwargs dict per component.
+            return list(starmap(component_type, zip(*values)))
+    return [component_type(**dict(zip(names, row))) for row in zip(*values)]
+
+
+def check_columns(component_type: type, columns: dict, n: int, fill_defaults: bool = False) -> dict:
+    """Check field columns before building `n` components from them.
+
+    Parameters
+    ----------
+    component_type : type
+        component type
+    columns : dict
+        field name -> sequence of `n` values, or a single value shared by every component
+    n : int
+        number of components
+    fill_defaults : bool, optional
+        whether to add the default value of the dataclass fields missing from `columns`, by default False
+
+    Returns
+    -------
+    _type_
+        dict: columns, with the missing fields when `fill_defaults` is True
+
+    Raises
+    ------
+    ValueError
+        if a column does not have `n` values.
+    TypeError
+        if a field is not a field of the dataclass, or a field without default value is missing.
+    """
+    for name, column in columns.items():
+        if not isinstance(column, (str, bytes)) and hasattr(column, "__len__") and len(column) != n:
+            raise ValueError(f"{len(column)} values given for field {name} of {component_type.__name__}, expected {n}")
+    if not dataclasses.is_dataclass(component_type):
+        return columns
+    fields = {f.name: f for f in dataclasses.fields(component_type) if f.init}
+    unknown = [name for name in columns if name not in fields]
+    if unknown:
+        raise TypeError(f"{component_type.__name__} has no field {', '.join(unknown)}")
+    columns = dict(columns)
+    for name, f in fields.items():
+        if name in columns:
+            continue
+        if f.default is dataclasses.MISSING and f.default_factory is dataclasses.MISSING:
+            raise TypeError(f"field {name} of {component_type.__name__} has no default value and is missing")
+        if fill_defaults:
+            columns[name] = f.default if f.default is not dataclasses.MISSING else f.default_factory()
+    return columns
+
+
+class Storage(metaclass=ABCMeta):
+    """Base class for component storage backends of `World`.
+
+    A storage exposes two mappings for compatibility with code which reads them directly:
+
+    - `entities`: entity id -> dict of component type -> component
+    - `components`: component type -> collection of entity ids which have the component
+    """
+
+    entities: Mapping
+    components: Mapping
+
+    @abstractmethod
+    def add_entity(self, entity: int) -> None:
+        """Register an entity which has no component yet."""
+
+    @abstractmethod
+    def add_component(self, entity: int, component_type: type, component) -> bool:
+        """Add a component to an entity.
+
+        Returns
+        -------
+        _type_
+            bool: True if the component is added, False if the entity already has a component of the type.
+        """
+
+    @abstractmethod
+    def remove_component(self, entity: int, component_type: type):
+        """Remove a component from an entity.
+
+        Returns
+        -------
+        _type_
+            removed component, or None if the entity does not have the component.
+        """
+
+    @abstractmethod
+    def remove_entity(self, entity: int) -> dict | None:
+        """Remove an entity and all of its components.
+
+        Returns
+        -------
+        _type_
+            dict | None: removed components, or None if the entity does not exist.
+        """
+
+    @abstractmethod
+    def get_entity_object(self, entity: int) -> dict | None:
+        """Return the components of an entity as a dict, or None if the entity does not exist."""
+
+    @abstractmethod
+    def has_component(self, entity: int, component_type: type) -> bool:
+        """Check if an entity has a component."""
+
+    @abstractmethod
+    def count(self, component_type: type) -> int:
+        """Return the number of entities which have the component."""
+
+    @abstractmethod
+    def iter_component(self, component_type: type) -> Iterator[tuple]:
+        """Yield tuple: entity id, component."""
+
+    @abstractmethod
+    def iter_components(self, *component_types: type) -> Iterator[tuple]:
+        """Yield tuple: entity id, list of components for entities which have every given type."""
+
+    def has_components(self, entity: int, *component_types: type) -> bool:
+        """Check if an entity has every given component."""
+        return all(self.has_component(entity, ct) for ct in component_types)
+
+    def add_entities(self, entities, components: dict) -> None:
+        """Add the same set of component types to many new entities at once.
+
+        Parameters
+        ----------
+        entities : range | list[int]
+            ids of entities which have no component yet
+        components : dict
+            component type -> list of components parallel to `entities`,
+            or dict of field name -> column (see `components_from_columns`)
+        """
+        n = len(entities)
+        for component_type, values in components.items():
+            if isinstance(values, dict):
+                values = components_from_columns(component_type, values, n)
+            for entity, component in zip(entities, values):
+                self.add_component(entity, component_type, component)
+
+    def layout(self) -> list:
+        """Return the internal order of the storage which `restore` needs to give the same iteration order,
+        e.g. the order of its tables. Saved by `World.snapshot`."""
+        return []
+
+    def restore(self, entities, components: dict, adopt: bool = False, layout=()) -> None:
+        """Fill an empty storage, e.g. from a snapshot (see `World.restore`).
+
+        Entities sharing the same component types are added together with `add_entities`,
+        in the order of `components`, so that `iter_component` gives the same order as before.
+
+        Parameters
+        ----------
+        entities : list[int]
+            every entity id, in the iteration order of `entities`
+        components : dict
+            component type -> tuple: entity ids in the order of `iter_component`, components parallel to them
+            (or dict of field name -> column, see `components_from_columns`)
+        adopt : bool, optional
+            whether columnar pools may use the given columns without copying them
+            (see `ColumnarPool.extend`), by default False
+        layout : list, optional
+            `layout` of the saved storage, by default ()
+        """
+        entity_objects = {entity: {} for entity in entities}
+        for component_type, (ids, values) in components.items():
+            if isinstance(values, dict):
+                values = components_from_columns(component_type, values, len(ids))
+            for entity, component in zip(ids, values):
+                entity_objects[entity][component_type] = component
+        groups: dict[frozenset, list[int]] = {}
+        for entity, entity_object in entity_objects.items():
+            groups.setdefault(frozenset(entity_object), []).append(entity)
+        for component_types, group in groups.items():
+            if not component_types:
+                for entity in group:
+                    self.add_entity(entity)
+                continue
+            # Entities sharing component types are listed in iteration order by the ids of each of the types.
+            ids = components[next(iter(component_types))][0]
+            positions = {entity: i for i, entity in enumerate(ids)}
+            group.sort(key=positions.__getitem__)
+            self.add_entities(
+                group, {ct: [entity_objects[entity][ct] for entity in group] for ct in component_types}
+            )
+
+    def get_columns(self, *component_types: type):
+        """Return the NumPy columns of columnar components, see `World.get_columns`."""
+        raise NotImplementedError(f"{type(self).__name__} does not support columnar queries")
+
+
+class SparseSet:
+    """Pool of the components of one type, stored as a sparse set.
+
+    `entities` and `dense` are parallel dense lists: `dense[i]` is the component of `entities[i]`.
+    The sparse index maps the index of an entity id (see `entity_index`) to its position
+    in the dense lists. It is split in pages of `SPARSE_PAGE_SIZE` slots allocated on demand,
+    so large entity ids do not allocate a slot for every smaller id.
+    Iteration is a linear scan over the dense lists, and removal moves the last
+    element into the removed position.
+    """
+
+    __slots__ = ("pages", "entities", "dense")
+
+    def __init__(self) -> None:
+        self.pages: list[list[int] | None] = []
+        self.entities: list[int] = []
+        self.dense: list = []
+
+    def __len__(self) -> int:
+        return len(self.entities)
+
+    def __iter__(self):
+        return iter(self.entities)
+
+    def __contains__(self, entity: int) -> bool:
+        return self.index(entity) >= 0
+
+    def __repr__(self) -> str:
+        return f"SparseSet({self.entities})"
+
+    def index(self, entity: int) -> int:
+        """Return the position of an entity in the dense lists, -1 if the entity is not in the pool."""
+        index = entity & ENTITY_INDEX_MASK
+        page_number = index >> SPARSE_PAGE_BITS
+        if page_number >= len(self.pages):
+            return -1
+        page = self.pages[page_number]
+        if page is None:
+            return -1
+        position = page[index & SPARSE_PAGE_MASK]
+        # An index is shared by every generation of the entity, so compare the whole id.
+        if position < 0 or self.entities[position] != entity:
+            return -1
+        return position
+
+    def _set_position(self, entity: int, position: int) -> None:
+        index = entity & ENTITY_INDEX_MASK
+        page_number = index >> SPARSE_PAGE_BITS
+        if page_number >= len(self.pages):
+            self.pages.extend([None] * (page_number + 1 - len(self.pages)))
+        page = self.pages[page_number]
+        if page is None:
+            page = [-1] * SPARSE_PAGE_SIZE
+            self.pages[page_number] = page
+        page[index & SPARSE_PAGE_MASK] = position
+
+    def get(self, entity: int, default=None):
+        """Return the component of an entity, or `default` if the entity is not in the pool."""
+        position = self.index(entity)
+        if position < 0:
+            return default
+        return self.dense[position]
+
+    def add(self, entity: int, component) -> bool:
+        """Add the component of an entity.
+
+        Returns
+        -------
+        _type_
+            bool: True if the component is added, False if the entity is already in the pool.
+        """
+        if self.index(entity) >= 0:
+            return False
+        self._set_position(entity, len(self.entities))
+        self.entities.append(entity)
+        self.dense.append(component)
+        return True
+
+    def remove(self, entity: int):
+        """Remove an entity from the pool by moving the last element into its position.
+
+        Returns
+        -------
+        _type_
+            removed component, or None if the entity is not in the pool.
+        """
+        position = self.index(entity)
+        if position < 0:
+            return None
+        component = self.dense[position]
+        last_entity = self.entities.pop()
+        last_component = self.dense.pop()
+        if position < len(self.entities):
+            self.entities[position] = last_entity
+            self.dense[position] = last_component
+            self._set_position(last_entity, position)
+        self._set_position(entity, -1)
+        return component
+
+    def items(self):
+        """Return an iterator of tuple: entity id, component."""
+        return zip(self.entities, self.dense)
+
+    def extend(self, entities, components) -> None:
+        """Append many entities which are not in the pool yet.
+
+        Parameters
+        ----------
+        entities : range | list[int]
+            entity ids
+        components : list
+            components parallel to `entities`
+        """
+        start = len(self.entities)
+        for position, entity in enumerate(entities, start):
+            self._set_position(entity, position)
+        self.entities.extend(entities)
+        self.dense.extend(components)
+
+
+class DefaultStorage(Storage):
+    """Storage which keeps a dict of components per entity and a `SparseSet` pool per component type."""
+
+    def __init__(self) -> None:
+        self.entities: dict[int, dict] = {}
+        self.components: dict[type, SparseSet] = {}
+
+    def _get_pool(self, component_type: type) -> SparseSet:
+        pool = self.components.get(component_type)
+        if pool is None:
+            if "__columns__" in vars(component_type):
+                from .columnar import ColumnarPool
+
+                pool = ColumnarPool(component_type)
+            else:
+                pool = SparseSet()
+            self.components[component_type] = pool
+        return pool
+
+    def add_entity(self, entity: int) -> None:
+        self.entities.setdefault(entity, {})
+
+    def add_entities(self, entities, components: dict) -> None:
+        n = len(entities)
+        entity_objects = [{} for _ in range(n)]
+        for component_type, values in components.items():
+            pool = self._get_pool(component_type)
+            if isinstance(values, dict) and not hasattr(pool, "columns"):
+                values = components_from_columns(component_type, values, n)
+            start = len(pool)
+            # Columnar pools accept field columns and store proxies in `dense`.
+            pool.extend(entities, values)
+            for entity_object, component in zip(entity_objects, pool.dense[start:]):
+                entity_object[component_type] = component
+        self.entities.update(zip(entities, entity_objects))
+
+    def layout(self) -> list:
+        """Return the component types in the order of their pools."""
+        return list(self.components)
+
+    def restore(self, entities, components: dict, adopt: bool = False, layout=()) -> None:
+        # Pools are created and refilled in the order of the snapshot, so iteration order is the same as before.
+        for component_type in layout:
+            self._get_pool(component_type)
+        entity_objects = self.entities
+        for entity in entities:
+            entity_objects[entity] = {}
+        for component_type, (ids, values) in components.items():
+            pool = self._get_pool(component_type)
+            start = len(pool)
+            if hasattr(pool, "columns"):
+                pool.extend(ids, values, adopt=adopt)
+            else:
+                if isinstance(values, dict):
+                    values = components_from_columns(component_type, values, len(ids))
+                pool.extend(ids, values)
+            for entity, component in zip(ids, pool.dense[start:]):
+                entity_objects[entity][component_type] = component
+
+    def add_component(self, entity: int, component_type: type, component) -> bool:
+        pool = self._get_pool(component_type)
+        entity_object = self.entities.setdefault(entity, {})
+        if component_type in entity_object:
+            return False
+
+        pool.add(entity, component)
+        # Columnar pools store a proxy instead of the component itself.
+        entity_object[component_type] = pool.dense[-1]
+        return True
+
+    def remove_component(self, entity: int, component_type: type):
+        entity_object = self.entities.get(entity)
+        if entity_object is None or component_type not in entity_object:
+            return None
+        del entity_object[component_type]
+        return self.components[component_type].remove(entity)
+
+    def remove_entity(self, entity: int) -> dict | None:
+        entity_object = self.entities.pop(entity, None)
+        if entity_object is None:
+            return None
+        for component_type in entity_object:
+            entity_object[component_type] = self.components[component_type].remove(entity)
+        return entity_object
+
+    def get_entity_object(self, entity: int) -> dict | None:
+        return self.entities.get(entity)
+
+    def has_component(self, entity: int, component_type: type) -> bool:
+        return component_type in self.entities[entity]
+
+    def count(self, component_type: type) -> int:
+        return len(self.components.get(component_type, ()))
+
+    def iter_component(self, component_type: type) -> Iterator[tuple]:
+        pool = self.components.get(component_type)
+        if pool is None:
+            return
+        yield from pool.items()
+
+    def iter_components(self, *component_types: type) -> Iterator[tuple]:
+        pools = [self.components.get(ct) for ct in component_types]
+        if not pools or any(pool is None for pool in pools):
+            return
+        # Walk the smallest pool and probe the others through their sparse index.
+        driver = min(pools, key=len)
+        for entity in driver.entities:
+            components = []
+            for pool in pools:
+                position = pool.index(entity)
+                if position < 0:
+                    break
+                components.append(pool.dense[position])
+            else:
+                yield entity, components
+
+    def get_columns(self, *component_types: type):
+        from .columnar import is_columnar, query_columns
+
+        for component_type in component_types:
+            if not is_columnar(component_type):
+                raise TypeError(f"{component_type.__name__} is not a columnar component")
+        return query_columns([self._get_pool(ct) for ct in component_types], component_types)
+
+
+class Archetype:
+    """Table of entities which have exactly the same set of component types.
+
+    Components are stored column by column: `columns[component_type][row]` is the component
+    of the entity `entities[row]`.
+    """
+
+    __slots__ = ("types", "entities", "columns", "add_edges", "remove_edges")
+
+    def __init__(self, types: frozenset) -> None:
+        self.types = types
+        self.entities: list[int] = []
+        self.columns: dict[type, list] = {ct: [] for ct in types}
+        # Archetype reached by adding / removing a component type, filled lazily.
+        self.add_edges: dict[type, "Archetype"] = {}
+        self.remove_edges: dict[type, "Archetype"] = {}
+
+    def __len__(self) -> int:
+        return len(self.entities)
+
+    def append(self, entity: int, components: dict) -> int:
+        """Append a row and return its index."""
+        self.entities.append(entity)
+        for ct, column in self.columns.items():
+            column.append(components[ct])
+        return len(self.entities) - 1
+
+    def row(self, row: int) -> dict:
+        """Return the components of a row as a dict."""
+        return {ct: column[row] for ct, column in self.columns.items()}
+
+    def swap_remove(self, row: int) -> int | None:
+        """Remove a row by moving the last row into its place.
+
+        Returns
+        -------
+        _type_
+            int | None: entity id which has been moved into `row`, None if no entity has been moved.
+        """
+        last = len(self.entities) - 1
+        moved = None
+        if row != last:
+            moved = self.entities[last]
+            self.entities[row] = moved
+            for column in self.columns.values():
+                column[row] = column[last]
+        self.entities.pop()
+        for column in self.columns.values():
+            column.pop()
+        return moved
+
+
+class _ArchetypeEntities(Mapping):
+    """Read-only view: entity id -> dict of component type -> component."""
+
+    def __init__(self, storage: "ArchetypeStorage") -> None:
+        self._storage = storage
+
+    def __getitem__(self, entity: int) -> dict:
+        archetype, row = self._storage.locations[entity]
+        return archetype.row(row)
+
+    def __contains__(self, entity) -> bool:
+        return entity in self._storage.locations
+
+    def __iter__(self):
+        return iter(self._storage.locations)
+
+    def __len__(self) -> int:
+        return len(self._storage.locations)
+
+    def __repr__(self) -> str:
+        return repr(dict(self))
+
+
+class _ArchetypeComponents(Mapping):
+    """Read-only view: component type -> frozenset of entity ids which have the component."""
+
+    def __init__(self, storage: "ArchetypeStorage") -> None:
+        self._storage = storage
+
+    def __getitem__(self, component_type: type) -> frozenset:
+        if component_type not in self._storage.component_types:
+            raise KeyError(component_type)
+        return frozenset(
+            entity
+            for archetype in self._storage.matching_archetypes((component_type,))
+            for entity in archetype.entities
+        )
+
+    def __contains__(self, component_type) -> bool:
+        return component_type in self._storage.component_types
+
+    def __iter__(self):
+        return iter(self._storage.component_types)
+
+    def __len__(self) -> int:
+        return len(self._storage.component_types)
+
+    def __repr__(self) -> str:
+        return repr(dict(self))
+
+
+class ArchetypeStorage(Storage):
+    """Storage which groups entities with the same set of component types into one `Archetype` table.
+
+    Adding or removing a component moves the entity to another table. Queries walk only the tables
+    whose types include every queried type, and the list of matching tables is cached per query.
+    `entities` and `components` are read-only views, and `get_entity_object` returns a new dict
+    built from the entity's row. Columnar components are not supported: adding one raises `TypeError`.
+    """
+
+    def __init__(self) -> None:
+        empty = Archetype(frozenset())
+        self.archetypes: dict[frozenset, Archetype] = {empty.types: empty}
+        self.locations: dict[int, tuple[Archetype, int]] = {}
+        self.component_types: set[type] = set()
+        self._matching_cache: dict[frozenset, list[Archetype]] = {}
+        self.entities = _ArchetypeEntities(self)
+        self.components = _ArchetypeComponents(self)
+
+    def _get_archetype(self, types: frozenset) -> Archetype:
+        archetype = self.archetypes.get(types)
+        if archetype is None:
+            for component_type in types - self.component_types:
+                if "__columns__" in vars(component_type):
+                    raise TypeError(
+                        f"{component_type.__name__} is columnar, which ArchetypeStorage does not support: use DefaultStorage"
+                    )
+            archetype = Archetype(types)
+            self.archetypes[types] = archetype
+            self.component_types.update(types)
+            for query, archetypes in self._matching_cache.items():
+                if query <= types:
+                    archetypes.append(archetype)
+        return archetype
+
+    def matching_archetypes(self, component_types) -> list[Archetype]:
+        """Return every archetype which has all the given component types."""
+        query = frozenset(component_types)
+        archetypes = self._matching_cache.get(query)
+        if archetypes is None:
+            archetypes = [a for types, a in self.archetypes.items() if query <= types]
+            self._matching_cache[query] = archetypes
+        return archetypes
+
+    def _move(self, entity: int, source: Archetype, row: int, target: Archetype, components: dict) -> None:
+        moved = source.swap_remove(row)
+        if moved is not None:
+            self.locations[moved] = (source, row)
+        self.locations[entity] = (target, target.append(entity, components))
+
+    def add_entity(self, entity: int) -> None:
+        if entity in self.locations:
+            return
+        empty = self.archetypes[frozenset()]
+        self.locations[entity] = (empty, empty.append(entity, {}))
+
+    def add_entities(self, entities, components: dict) -> None:
+        n = len(entities)
+        archetype = self._get_archetype(frozenset(components))
+        start = len(archetype)
+        for component_type, values in components.items():
+            if isinstance(values, dict):
+                values = components_from_columns(component_type, values, n)
+            archetype.columns[component_type].extend(values)
+        archetype.entities.extend(entities)
+        for row, entity in enumerate(entities, start):
+            self.locations[entity] = (archetype, row)
+
+    def layout(self) -> list:
+        """Return the component types of every archetype, in creation order (the order queries walk them)."""
+        return list(self.archetypes)
+
+    def restore(self, entities, components: dict, adopt: bool = False, layout=()) -> None:
+        # Archetypes are created in the saved order, empty ones included, so queries walk them in the same order.
+        for types in layout:
+            self._get_archetype(frozenset(types))
+        super().restore(entities, components, adopt)
+        self.locations = {entity: self.locations[entity] for entity in entities}
+
+    def add_component(self, entity: int, component_type: type, component) -> bool:
+        self.add_entity(entity)
+        source, row = self.locations[entity]
+        if component_type in source.types:
+            return False
+
+        target = source.add_edges.get(component_type)
+        if target is None:
+            target = self._get_archetype(source.types | {component_type})
+            source.add_edges[component_type] = target
+            target.remove_edges[component_type] = source
+
+        components = source.row(row)
+        components[component_type] = component
+        self._move(entity, source, row, target, components)
+        return True
+
+    def remove_component(self, entity: int, component_type: type):
+        location = self.locations.get(entity)
+        if location is None or component_type not in location[0].types:
+            return None
+        source, row = location
+
+        target = source.remove_edges.get(component_type)
+        if target is None:
+            target = self._get_archetype(source.types - {component_type})
+            source.remove_edges[component_type] = target
+            target.add_edges[component_type] = source
+
+        components = source.row(row)
+        component = components.pop(component_type)
+        self._move(entity, source, row, target, components)
+        return component
+
+    def remove_entity(self, entity: int) -> dict | None:
+        location = self.locations.pop(entity, None)
+        if location is None:
+            return None
+        archetype, row = location
+        components = archetype.row(row)
+        moved = archetype.swap_remove(row)
+        if moved is not None:
+            self.locations[moved] = (archetype, row)
+        return components
+
+    def get_entity_object(self, entity: int) -> dict | None:
+        location = self.locations.get(entity)
+        if location is None:
+            return None
+        return location[0].row(location[1])
+
+    def has_component(self, entity: int, component_type: type) -> bool:
+        return component_type in self.locations[entity][0].types
+
+    def count(self, component_type: type) -> int:
+        return sum(len(a) for a in self.matching_archetypes((component_type,)))
+
+    def iter_component(self, component_type: type) -> Iterator[tuple]:
+        for archetype in self.matching_archetypes((component_type,)):
+            yield from zip(archetype.entities, archetype.columns[component_type])
+
+    def iter_components(self, *component_types: type) -> Iterator[tuple]:
+        for archetype in self.matching_archetypes(component_types):
+            if not archetype.entities:
+                continue
+            columns = [archetype.columns[ct] for ct in component_types]
+            for entity, *components in zip(archetype.entities, *columns):
+                yield entity, components
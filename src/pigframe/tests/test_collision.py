@@ -0,0 +1,82 @@
+import random
+from dataclasses import dataclass
+
+import pytest
+
+from pigframe import World, Query
+from pigframe.collision import sweep_pairs, np
+
+
+@dataclass
+class Position:
+    x: float
+    y: float
+
+
+@dataclass
+class Bullet:
+    pass
+
+
+@dataclass
+class Enemy:
+    hp: int
+
+
+def brute_force(a, b, width, height):
+    return {
+        (a_id, b_id)
+        for a_id, ax, ay in a
+        for b_id, bx, by in b
+        if abs(ax - bx) < width and abs(ay - by) < height and a_id != b_id
+    }
+
+
+@pytest.mark.parametrize("seed", range(10))
+def test_sweep_matches_brute_force(seed):
+    rng = random.Random(seed)
+    a = [(i, rng.randint(0, 100), rng.uniform(0, 100)) for i in range(rng.randint(0, 80))]
+    b = [(i, rng.randint(0, 100), rng.uniform(0, 100)) for i in range(40, 40 + rng.randint(0, 80))]
+    pairs = sweep_pairs(a, b, 8, 5, use_numpy=False, as_array=False)
+    assert len(pairs) == len(set(pairs))
+    assert set(pairs) == brute_force(a, b, 8, 5)
+    if np is not None:
+        assert sweep_pairs(a, b, 8, 5, use_numpy=True, as_array=False) == pairs
+        for use_numpy in (False, True):
+            array = sweep_pairs(a, b, 8, 5, use_numpy=use_numpy)
+            assert array.dtype == np.int64 and array.shape == (len(pairs), 2)
+            assert list(map(tuple, array.tolist())) == pairs
+
+
+def test_world_collide():
+    world = World()
+    bullet = world.create_entity()
+    world.add_component_to_entity(bullet, Position, x=0, y=0)
+    world.add_component_to_entity(bullet, Bullet)
+    enemies = []
+    for x in (10, 20, 100):
+        ent = world.create_entity()
+        world.add_component_to_entity(ent, Position, x=x, y=5)
+        world.add_component_to_entity(ent, Enemy, hp=1)
+        enemies.append(ent)
+
+    assert world.collide(Bullet, Enemy, 16, Position, as_array=False) == [(bullet, enemies[0])]
+    assert world.collide(Bullet, [Enemy], (24, 16), Position, as_array=False) == [(bullet, enemies[0]), (bullet, enemies[1])]
+    # Entities of one group collide with each other, never with themselves.
+    assert world.collide(Enemy, Enemy, 16, Position, as_array=False) == [(enemies[0], enemies[1]), (enemies[1], enemies[0])]
+
+    shots = world.add_query(Query(all=[Bullet, Position]))
+    targets = Query(any=[Enemy], optional=[Position])
+    targets.rebuild(world.storage)
+    assert world.collide(shots, targets, 16, Position, as_array=False) == [(bullet, enemies[0])]
+    if np is not None:
+        assert world.collide(shots, targets, 16, Position).tolist() == [[bullet, enemies[0]]]
+        assert world.collide(Bullet, Enemy, 1, Position).shape == (0, 2)
+    with pytest.raises(ValueError):
+        world.collide(Query(all=[Bullet]), Enemy, 16, Position)
+
+
+if __name__ == "__main__":
+    for seed in range(10):
+        test_sweep_matches_brute_force(seed)
+    test_world_collide()
@@ -0,0 +1,138 @@
+from dataclasses import dataclass
+
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from pigframe import World, Component, ArchetypeStorage, ColumnarPool, columnar  # noqa: E402
+
+
+@columnar
+@dataclass
+class Position(Component):
+    x: float
+    y: float
+
+
+@columnar
+@dataclass
+class Velocity(Component):
+    x: float
+    y: float
+
+
+@dataclass
+class Tag(Component):
+    name: str
+
+
+def build_world(n=100):
+    world = World()
+    for i in range(n):
+        ent = world.create_entity()
+        world.add_component_to_entity(ent, Position, x=i, y=0)
+        if i % 2 == 0:
+            world.add_component_to_entity(ent, Velocity, x=1, y=2)
+    return world
+
+
+def test_single_type_columns_are_views():
+    world = build_world()
+    (pos,) = world.get_columns(Position)
+    assert pos.is_view
+    pos.x += 10
+    assert world.get_entity_object(3)[Position].x == 13.0
+    assert np.shares_memory(pos.x, world.get_columns(Position)[Position].x)
+
+
+def test_multi_type_columns_write_back():
+    world = build_world()
+    cols = world.get_columns(Position, Velocity)
+    pos, vel = cols
+    assert len(cols) == 50
+    assert sorted(cols.entities.tolist()) == list(range(0, 100, 2))
+    pos.x += vel.x * 2
+    pos.y = np.clip(pos.y + vel.y, 0, 1)
+
+    assert world.get_entity_object(4)[Position] == Position(6.0, 1.0)
+    assert world.get_entity_object(5)[Position] == Position(5.0, 0.0)
+
+
+def test_proxy_access_and_removal():
+    world = build_world(4)
+    proxy = world.get_entity_object(2)[Position]
+    proxy.x += 1
+    assert proxy.x == 3.0
+    assert proxy.materialize() == Position(3.0, 0.0)
+    assert world.get_component(Position)[2] == (2, Position(3.0, 0.0))
+
+    world.remove_entity(0)
+    # Entity 3 has been moved into the freed row, entity 2 keeps its values.
+    assert world.get_entity_object(2)[Position] == Position(3.0, 0.0)
+    assert world.get_entity_object(3)[Position] == Position(3.0, 0.0)
+    assert world.get_columns(Position).entities.tolist() == [3, 1, 2]
+    stale = world.get_entity_object(1)[Position]
+    assert world.remove_component_from_entity(1, Position) is None
+    with pytest.raises(ReferenceError):
+        stale.x
+
+
+def test_spawn_batch_columns():
+    world = World()
+    ents = world.spawn_batch(1000, {Position: {"x": np.arange(1000), "y": 0.5}, Velocity: {"x": 1, "y": -1}})
+    pos, vel = world.get_columns(Position, Velocity)
+    assert pos.is_view
+    assert pos.x.tolist() == list(range(1000))
+    pos.y += vel.y
+    assert world.get_entity_object(ents[10])[Position] == Position(10.0, -0.5)
+
+
+def test_spawn_batch_copies_arrays():
+    world = World()
+    zeros = np.zeros(4)
+    xs = np.arange(4.0)
+    world.spawn_batch(4, {Position: {"x": zeros, "y": zeros}})
+    world.spawn_batch(4, {Velocity: {"x": xs, "y": zeros}})
+    pos = world.get_columns(Position)[Position]
+    pos.x += 5
+    assert pos.y.tolist() == [0.0] * 4
+    world.storage.components[Velocity].columns["x"][0] = 99
+    assert xs[0] == 0.0 and zeros.tolist() == [0.0] * 4
+
+    # Adoption is opt-in, and refused for fields sharing one buffer.
+    pool = ColumnarPool(Position)
+    pool.extend(range(4), {"x": zeros, "y": zeros}, adopt=True)
+    assert pool.columns["x"] is not zeros
+    pool = ColumnarPool(Position)
+    pool.extend(range(4), {"x": xs, "y": zeros}, adopt=True)
+    assert pool.columns["x"] is xs
+
+
+def test_columns_errors():
+    world = build_world(2)
+    with pytest.raises(TypeError):
+        world.get_columns(Tag)
+    with pytest.raises(NotImplementedError):
+        World(ArchetypeStorage()).get_columns(Position)
+    world = World(ArchetypeStorage())
+    ent = world.create_entity()
+    with pytest.raises(TypeError):
+        world.add_component_to_entity(ent, Position, x=0.0, y=0.0)
+    with pytest.raises(TypeError):
+        world.spawn_batch(2, {Position: {"x": 0.0, "y": 0.0}})
+    assert world.get_component(Position) == []
+    assert world.entity_allocator.alive_count == 1
+    with pytest.raises(TypeError):
+        @columnar
+        @dataclass
+        class Named:
+            name: str
+
+
+if __name__ == "__main__":
+    test_single_type_columns_are_views()
+    test_multi_type_columns_write_back()
+    test_proxy_access_and_removal()
+    test_spawn_batch_columns()
+    test_spawn_batch_copies_arrays()
+    test_columns_errors()
@@ -0,0 +1,117 @@
+from dataclasses import dataclass
+from pigframe import World, System, ParallelExecutor, Query
+
+
+@dataclass
+class Position:
+    x: int
+    y: int
+
+
+@dataclass
+class Bullet:
+    pass
+
+
+class SysSpawnAndCull(System):
+    def process(self):
+        for ent, pos in self.world.get_component(Position):
+            if pos.y < 0:
+                self.world.commands.remove_entity(ent)
+                self.world.commands.remove_entity(ent)
+            else:
+                pos.y -= 1
+        bullet = self.world.commands.create_entity()
+        self.world.commands.add_component(bullet, Position, x=0, y=0)
+        self.world.commands.add_component(bullet, Bullet)
+
+
+def test_commands_are_deferred():
+    world = World()
+    ent = world.create_entity()
+    world.add_component_to_entity(ent, Position, x=0, y=5)
+    rows = world.get_component(Position)
+
+    world.commands.remove_entity(ent)
+    new = world.commands.create_entity()
+    world.commands.add_component(new, Position, x=1, y=1)
+    world.commands.add_component(ent, Bullet)
+    assert world.get_component(Position) is rows
+    assert len(world.commands) == 3
+
+    # The add to the removed entity is skipped.
+    assert world.commands.flush() == 2
+    assert world.get_component(Position) == [(new, Position(1, 1))]
+    assert world.get_component(Bullet) == []
+
+
+def test_process_systems_flushes():
+    world = World()
+    world.add_scenes(["game"])
+    world.add_system(SysSpawnAndCull)
+    world.current_scene = "game"
+    for _ in range(3):
+        world.process_systems()
+    assert len(world.commands) == 0
+    assert sorted(pos.y for _, pos in world.get_component(Position)) == [-1, 0]
+    world.process_systems()
+    assert len(world.get_components(Position, Bullet)) == 2
+
+
+def test_flush_replaces_removed_and_added_component():
+    world = World()
+    ent = world.create_entity()
+    world.add_component_to_entity(ent, Position, x=1, y=0)
+    query = world.add_query(Query(all=[Position]))
+    grid = world.add_spatial_index(Position, cell_size=4)
+    world.get_component(Position)
+    world.get_components(Position)
+
+    world.commands.remove_component(ent, Position)
+    world.commands.add_component(ent, Position, x=5, y=0)
+    world.commands.flush()
+    pos = world.get_entity_object(ent)[Position]
+    assert pos == Position(5, 0)
+    assert world.get_component(Position)[0][1] is pos
+    assert world.get_components(Position)[0][1][0] is pos
+    assert list(query)[0][1][0] is pos
+    assert grid.query_aabb(4, 0, 6, 0) == [ent]
+
+
+class SpawnPositions(System):
+    writes = (Position,)
+
+    def process(self):
+        for _ in range(2000):
+            ent = self.world.commands.create_entity()
+            self.world.commands.add_component(ent, Position, x=0, y=0)
+
+
+class SpawnBullets(System):
+    writes = (Bullet,)
+
+    def process(self):
+        for _ in range(2000):
+            ent = self.world.commands.create_entity()
+            self.world.commands.add_component(ent, Bullet)
+
+
+def test_concurrent_systems_get_distinct_ids():
+    world = World()
+    world.add_scenes(["game"])
+    world.add_system(SpawnPositions, 0)
+    world.add_system(SpawnBullets, 1)
+    world.current_scene = "game"
+    world.executor = ParallelExecutor(max_workers=2)
+    world.process_systems()
+    assert len(world.get_component(Position)) == 2000
+    assert len(world.get_component(Bullet)) == 2000
+    assert world.entity_allocator.alive_count == 4000
+    assert not set(world.storage.components[Position]) & set(world.storage.components[Bullet])
+
+
+if __name__ == "__main__":
+    test_commands_are_deferred()
+    test_process_systems_flushes()
+    test_flush_replaces_removed_and_added_component()
+    test_concurrent_systems_get_distinct_ids()
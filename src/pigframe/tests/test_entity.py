@@ -0,0 +1,101 @@
+from dataclasses import dataclass
+
+import pytest
+
+from pigframe import World, EntityAllocator, entity_index, entity_generation, make_entity
+
+
+@dataclass
+class Position:
+    x: int
+    y: int
+
+
+def test_allocator_recycles_indices():
+    allocator = EntityAllocator()
+    a, b, c = allocator.allocate(), allocator.allocate(), allocator.allocate()
+    assert (a, b, c) == (0, 1, 2)
+    assert allocator.release(b) is True
+    assert allocator.release(b) is False
+
+    d = allocator.allocate()
+    assert entity_index(d) == 1
+    assert entity_generation(d) == 1
+    assert allocator.is_alive(d) is True
+    assert allocator.is_alive(b) is False
+    assert allocator.allocate() == 3
+    assert allocator.capacity == 4
+    assert len(allocator) == 4
+
+
+def test_explicit_id_fills_holes():
+    world = World()
+    assert world.create_entity() == 0
+    assert world.create_entity(3) == 3
+    # Indices skipped by an explicit id are handed out before new ones.
+    assert [world.create_entity() for _ in range(3)] == [1, 2, 4]
+    with pytest.raises(ValueError):
+        world.create_entity(2)
+
+    world.set_next_entity_id(10)
+    assert world.next_entity_id == 10
+    assert world.create_entity() == 10
+
+
+def test_stale_handles():
+    world = World()
+    ent = world.create_entity()
+    world.add_component_to_entity(ent, Position, x=0, y=0)
+    assert world.remove_entity(ent) is True
+    assert world.is_alive(ent) is False
+
+    new = world.create_entity()
+    assert entity_index(new) == entity_index(ent)
+    assert new != ent
+    assert world.is_alive(new) is True
+    assert world.get_entity_object(ent) is None
+    assert world.remove_entity(ent) is None
+    with pytest.raises(ValueError):
+        world.add_component_to_entity(ent, Position, x=1, y=1)
+
+    empty = world.create_entity()
+    assert world.remove_entity(empty) is True
+
+
+def test_explicit_id_rejects_stale_generation():
+    world = World()
+    ent = world.create_entity()
+    world.remove_entity(ent)
+    newer = world.create_entity()
+    world.remove_entity(newer)
+    with pytest.raises(ValueError):
+        world.create_entity(ent)
+    assert world.is_alive(ent) is False
+    assert world.entity_allocator.generations == [2]
+    # The current generation of the index can still be reserved.
+    current = make_entity(entity_index(ent), 2)
+    assert world.create_entity(current) == current
+    assert world.is_alive(newer) is False
+
+
+def test_allocate_block_reuses_free_runs():
+    allocator = EntityAllocator()
+    assert allocator.allocate_block(4) == range(4)
+    for ent in (1, 2):
+        allocator.release(ent)
+    # The hole is too small: the block starts after the last live index.
+    assert allocator.allocate_block(3) == range(4, 7)
+    # A run of free indices is reused, each id with the generation of its index.
+    assert allocator.allocate_block(2) == range(make_entity(1, 1), make_entity(1, 1) + 2)
+    # A free tail is extended instead of appending after it.
+    allocator.release(6)
+    assert allocator.allocate_block(2) == [make_entity(6, 1), 7]
+    assert allocator.capacity == 8
+    assert len(allocator) == 8
+
+if __name__ == "__main__":
+    test_allocator_recycles_indices()
+    test_explicit_id_fills_holes()
+    test_stale_handles()
+    test_explicit_id_rejects_stale_generation()
+    test_allocate_block_reuses_free_runs()
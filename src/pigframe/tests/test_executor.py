@@ -0,0 +1,109 @@
+import threading
+from dataclasses import dataclass
+
+import pytest
+
+from pigframe import World, System, ParallelExecutor
+
+
+@dataclass
+class Position:
+    x: int
+
+
+@dataclass
+class Health:
+    hp: int
+
+
+barrier = threading.Barrier(2, timeout=5)
+order = []
+
+
+class MovePlayers(System):
+    reads = ()
+    writes = (Position,)
+
+    def process(self):
+        barrier.wait()
+        order.append("move")
+
+
+class Regenerate(System):
+    writes = (Health,)
+
+    def process(self):
+        barrier.wait()
+        order.append("regenerate")
+
+
+class Render(System):
+    reads = (Position, Health)
+
+    def process(self):
+        order.append("render")
+
+
+class Legacy(System):
+    def process(self):
+        order.append(threading.current_thread() is threading.main_thread())
+
+
+class Broken(System):
+    writes = (Position,)
+
+    def process(self):
+        raise RuntimeError("broken")
+
+
+def make_world(*systems):
+    world = World()
+    world.add_scenes(["scene1"])
+    world.current_scene = "scene1"
+    for priority, system in enumerate(systems):
+        world.add_system(system, priority)
+    world.executor = ParallelExecutor(max_workers=4)
+    return world
+
+
+def test_non_conflicting_systems_run_concurrently():
+    order.clear()
+    world = make_world(MovePlayers, Regenerate, Render)
+    # Both writers must be at the barrier at the same time, otherwise it breaks.
+    world.process_systems()
+    assert sorted(order[:2]) == ["move", "regenerate"]
+    assert order[2] == "render"
+
+    plan = world.executor.plan("scene1", world.scene_systems["scene1"])
+    assert plan.successors == [[2], [2], []]
+    world.executor.shutdown()
+
+
+def test_undeclared_systems_run_sequentially():
+    order.clear()
+    world = make_world(Legacy, Legacy)
+    world.process_systems()
+    assert order == [True, True]
+
+    order.clear()
+    world = make_world(Legacy, Render, Legacy)
+    assert world.executor.plan("scene1", world.scene_systems["scene1"]).successors == [[1, 2], [2], []]
+    world.process_systems()
+    assert order[1] == "render"
+    world.executor.shutdown()
+
+
+def test_error_is_raised():
+    order.clear()
+    world = make_world(Broken, Render)
+    with pytest.raises(RuntimeError):
+        world.process_systems()
+    # Render depends on Broken and is not run.
+    assert order == []
+    world.executor.shutdown()
+
+
+if __name__ == "__main__":
+    test_non_conflicting_systems_run_concurrently()
+    test_undeclared_systems_run_sequentially()
+    test_error_is_raised()
@@ -0,0 +1,67 @@
+import os
+from dataclasses import dataclass
+
+import pytest
+
+from pigframe import World, System, WorldPool
+
+
+@dataclass
+class Position:
+    x: int
+
+
+@dataclass
+class Health:
+    hp: int
+
+
+class Move(System):
+    def process(self):
+        for ent, pos in self.world.get_component(Position):
+            pos.x += self.world.speed
+
+
+def make_world(index: int) -> World:
+    world = World()
+    world.add_scenes(["play"])
+    world.current_scene = "play"
+    world.add_system(Move, 0)
+    world.speed = index + 1
+    ent = world.create_entity()
+    world.add_component_to_entity(ent, Position, x=0)
+    world.add_component_to_entity(ent, Health, hp=10)
+    return world
+
+
+def broken_factory(index: int) -> World:
+    raise RuntimeError(index)
+
+
+def world_pid(world: World) -> int:
+    return os.getpid()
+
+
+def test_world_pool():
+    with WorldPool(make_world, 5, processes=2) as pool:
+        results = pool.step(10, components=(Position,))
+        assert [result[Position] for result in results] == [[(0, Position(10 * (i + 1)))] for i in range(5)]
+        assert all(Health not in result for result in results)
+
+        pool.step(1, worlds=[3])
+        assert pool.snapshot((Position,), worlds=[2, 3]) == [
+            {Position: [(0, Position(30))]},
+            {Position: [(0, Position(44))]},
+        ]
+        pids = pool.call(world_pid)
+        assert len(set(pids)) == 2 and os.getpid() not in pids
+
+
+def test_world_pool_errors():
+    with pytest.raises(RuntimeError):
+        WorldPool(broken_factory, 2, processes=2)
+
+
+if __name__ == "__main__":
+    test_world_pool()
+    test_world_pool_errors()
@@ -0,0 +1,65 @@
+import json
+import time
+
+from pigframe import World, System, Screen, Event
+
+
+class SysSlow(System):
+    def process(self):
+        time.sleep(0.002)
+
+
+class SysFast(System):
+    def process(self):
+        pass
+
+
+class ScDraw(Screen):
+    def draw(self):
+        pass
+
+
+class EvNothing(Event):
+    def _Event__process(self):
+        pass
+
+
+def test_profiler(tmp_path):
+    world = World()
+    world.add_scenes(["game"])
+    world.add_system(SysSlow, 0)
+    world.add_system(SysFast, 1)
+    world.add_screen(ScDraw)
+    world.add_event_to_scene(EvNothing, "game", lambda: True)
+    world.current_scene = "game"
+
+    world.process()
+    assert world.profiler.samples == {}
+
+    world.profiler.enable()
+    for _ in range(3):
+        world.process()
+        world.process_screens()
+    world.profiler.disable()
+    world.process()
+
+    stats = world.profiler.stats()
+    assert stats[("system", "SysSlow")]["count"] == 3
+    assert stats[("system", "SysSlow")]["mean_ms"] >= 2
+    assert stats[("system", "SysSlow")]["max_ms"] >= stats[("system", "SysSlow")]["p95_ms"]
+    assert stats[("screen", "ScDraw")]["count"] == 3
+    assert stats[("event", "EvNothing")]["count"] == 3
+    assert world.profiler.report().splitlines()[1].startswith("system SysSlow")
+
+    path = tmp_path / "trace.json"
+    world.profiler.export_chrome_trace(str(path))
+    events = json.loads(path.read_text())["traceEvents"]
+    assert len(events) == 12
+    assert {e["ph"] for e in events} == {"X"}
+
+
+if __name__ == "__main__":
+    import pathlib
+    import tempfile
+
+    test_profiler(pathlib.Path(tempfile.mkdtemp()))
@@ -0,0 +1,117 @@
+from dataclasses import dataclass
+
+import pytest
+
+from pigframe import World, Query, ArchetypeStorage
+
+
+@dataclass
+class Position:
+    x: int
+    y: int
+
+
+@dataclass
+class Velocity:
+    x: int
+    y: int
+
+
+@dataclass
+class Bullet:
+    pass
+
+
+@dataclass
+class Playable:
+    pass
+
+
+def test_cache_is_patched():
+    world = World()
+    player = world.create_entity()
+    world.add_component_to_entity(player, Position, x=0, y=0)
+    world.add_component_to_entity(player, Velocity, x=1, y=1)
+
+    moving = world.get_components(Position, Velocity)
+    positions = world.get_component(Position)
+    velocities = world.get_component(Velocity)
+    cached = world._get_components_cache[(Position, Velocity)]
+
+    bullet = world.create_entity()
+    world.add_component_to_entity(bullet, Position, x=5, y=5)
+    world.add_component_to_entity(bullet, Bullet)
+
+    # Lists handed out before the change are left untouched.
+    assert moving == [(player, [Position(0, 0), Velocity(1, 1)])]
+    assert positions == [(player, Position(0, 0))]
+    # Queries which do not involve the changed types keep the same result.
+    assert world.get_component(Velocity) is velocities
+    assert world.get_components(Position, Velocity) is moving
+    assert world.get_component(Position) == [(player, Position(0, 0)), (bullet, Position(5, 5))]
+
+    world.add_component_to_entity(bullet, Velocity, x=0, y=-2)
+    assert world._get_components_cache[(Position, Velocity)] is cached
+    assert world.get_components(Position, Velocity) == [
+        (player, [Position(0, 0), Velocity(1, 1)]),
+        (bullet, [Position(5, 5), Velocity(0, -2)]),
+    ]
+
+    world.remove_entity(player)
+    assert world.get_components(Position, Velocity) == [(bullet, [Position(5, 5), Velocity(0, -2)])]
+    assert world.get_component(Bullet) == [(bullet, Bullet())]
+    assert world.get_component(Velocity) == [(bullet, Velocity(0, -2))]
+
+
+def test_iterate_while_removing():
+    world = World()
+    for i in range(5):
+        ent = world.create_entity()
+        world.add_component_to_entity(ent, Position, x=i, y=0)
+
+    seen = []
+    for ent, pos in world.get_component(Position):
+        seen.append(ent)
+        world.remove_entity(ent)
+    assert seen == [0, 1, 2, 3, 4]
+    assert world.get_component(Position) == []
+
+
+@pytest.mark.parametrize("storage", [None, ArchetypeStorage])
+def test_query_filters(storage):
+    world = World(storage() if storage else None)
+    player = world.create_entity()
+    world.add_component_to_entity(player, Position, x=0, y=0)
+    world.add_component_to_entity(player, Playable)
+    enemy = world.create_entity()
+    world.add_component_to_entity(enemy, Position, x=5, y=5)
+
+    others = world.add_query(Query(all=[Position], none=[Playable], optional=[Velocity]))
+    shots = world.add_query(Query(any=[Bullet, Velocity]))
+    assert list(others) == [(enemy, [Position(5, 5), None])]
+    assert len(shots) == 0
+
+    world.add_component_to_entity(enemy, Velocity, x=1, y=0)
+    assert list(others) == [(enemy, [Position(5, 5), Velocity(1, 0)])]
+    assert list(shots) == [(enemy, [])]
+
+    world.add_component_to_entity(enemy, Playable)
+    assert list(others) == []
+    world.remove_component_from_entity(player, Playable)
+    assert list(others) == [(player, [Position(0, 0), None])]
+
+    world.spawn_batch(2, {Position: {"x": 9, "y": 9}, Bullet: None})
+    assert len(others) == 3
+    assert len(shots) == 3
+
+    world.remove_query(others)
+    world.remove_entity(player)
+    assert len(others) == 3
+    assert player not in shots
+
+
+if __name__ == "__main__":
+    test_cache_is_patched()
+    test_iterate_while_removing()
+    test_query_filters(None)
+    test_query_filters(ArchetypeStorage)
@@ -0,0 +1,143 @@
+"""
+Property-style tests: after random sequences of structural changes,
+cached query results must equal freshly computed (uncached) ones.
+"""
+
+import random
+from dataclasses import dataclass
+
+import pytest
+
+from pigframe import World, DefaultStorage, ArchetypeStorage, Query
+
+
+@dataclass
+class A:
+    v: int
+
+
+@dataclass
+class B:
+    v: int
+
+
+@dataclass
+class C:
+    v: int
+
+
+TYPES = [A, B, C]
+QUERIES = [(A,), (B,), (C,), (A, B), (B, A), (A, C), (B, C), (A, B, C)]
+
+
+def by_entity(rows):
+    """Rows sorted by entity, components replaced by their identity: equal dataclasses would hide stale rows."""
+    return sorted(
+        (ent, tuple(map(id, components)) if isinstance(components, list) else id(components)) for ent, components in rows
+    )
+
+
+def assert_cache_consistent(world: World):
+    for query in world._queries:
+        fresh = Query(query.all, query.none, query.any, query.optional)
+        fresh.rebuild(world.storage)
+        assert by_entity(query) == by_entity(fresh), query
+    for query in QUERIES:
+        if len(query) == 1:
+            cached = world.get_component(query[0])
+            fresh = list(world._get_component(query[0]))
+        else:
+            cached = world.get_components(*query)
+            fresh = list(world._get_components(*query))
+        assert by_entity(cached) == by_entity(fresh), query
+        assert len({ent for ent, _ in cached}) == len(cached), query
+
+
+def random_step(world: World, rng: random.Random, alive: list):
+    op = rng.random()
+    if op < 0.2 or not alive:
+        alive.append(world.create_entity())
+    elif op < 0.5:
+        ent = rng.choice(alive)
+        world.add_component_to_entity(ent, rng.choice(TYPES), v=rng.randint(0, 9))
+    elif op < 0.7:
+        world.remove_component_from_entity(rng.choice(alive), rng.choice(TYPES))
+    elif op < 0.8:
+        world.remove_components_from_entity(rng.choice(alive), *rng.sample(TYPES, 2))
+    else:
+        ent = rng.choice(alive)
+        alive.remove(ent)
+        world.remove_entity(ent)
+
+
+def random_command(world: World, rng: random.Random, alive: list):
+    commands = world.commands
+    op = rng.random()
+    if op < 0.2 or not alive:
+        alive.append(commands.create_entity())
+    elif op < 0.5:
+        ent = rng.choice(alive)
+        component_type = rng.choice(TYPES)
+        # Removing and adding back the same type replaces the component in one flush.
+        if rng.random() < 0.5:
+            commands.remove_component(ent, component_type)
+        commands.add_component(ent, component_type, v=rng.randint(0, 9))
+    elif op < 0.8:
+        for component_type in rng.sample(TYPES, 2):
+            commands.remove_component(rng.choice(alive), component_type)
+    else:
+        ent = rng.choice(alive)
+        alive.remove(ent)
+        commands.remove_entity(ent)
+
+
+@pytest.mark.parametrize("mode", ["direct", "batch", "commands"])
+@pytest.mark.parametrize("storage_type", [DefaultStorage, ArchetypeStorage])
+@pytest.mark.parametrize("seed", range(20))
+def test_cached_equals_uncached(storage_type, seed, mode):
+    rng = random.Random(seed)
+    world = World(storage_type())
+    world.add_query(Query(all=[A], none=[B], optional=[C]))
+    world.add_query(Query(any=[B, C], none=[A]))
+    alive = []
+    for _ in range(40):
+        if mode == "direct":
+            for _ in range(5):
+                random_step(world, rng, alive)
+        elif mode == "batch":
+            with world.batch():
+                for _ in range(5):
+                    random_step(world, rng, alive)
+        else:
+            for _ in range(5):
+                random_command(world, rng, alive)
+            world.commands.flush()
+        # Read the queries at random points so that some caches live across many changes.
+        if rng.random() < 0.3:
+            assert_cache_consistent(world)
+    assert_cache_consistent(world)
+
+
+def test_removed_component_is_not_returned():
+    world = World()
+    ent = world.create_entity()
+    world.add_component_to_entity(ent, A, v=1)
+    world.add_component_to_entity(ent, B, v=2)
+    assert world.get_component(A) == [(ent, A(1))]
+    assert world.get_components(A, B) == [(ent, [A(1), B(2)])]
+
+    world.remove_component_from_entity(ent, A)
+    assert world.get_component(A) == []
+    assert world.get_components(A, B) == []
+    assert world.get_component(B) == [(ent, B(2))]
+
+    world.remove_components_from_entity(ent, B, C)
+    assert world.get_component(B) == []
+
+
+if __name__ == "__main__":
+    for seed in range(20):
+        for mode in ("direct", "batch", "commands"):
+            test_cached_equals_uncached(DefaultStorage, seed, mode)
+            test_cached_equals_uncached(ArchetypeStorage, seed, mode)
+    test_removed_component_is_not_returned()
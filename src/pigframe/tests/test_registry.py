@@ -0,0 +1,131 @@
+import random
+
+from pigframe import World, System, Screen, Event, PriorityRegistry
+
+
+class Item:
+    def __init__(self, priority, name):
+        self.priority = priority
+        self.name = name
+
+
+class Other(Item):
+    pass
+
+
+def names(registry):
+    return [item.name for item in registry]
+
+
+def test_priority_order_is_stable():
+    rng = random.Random(0)
+    registry = PriorityRegistry()
+    expected = []
+    for i in range(200):
+        item = Item(rng.randint(0, 5), i)
+        expected.append(item)
+        if i % 3:
+            registry.add(item)
+        else:
+            registry.extend([item])
+    batch = [Other(rng.randint(0, 5), 200 + i) for i in range(50)]
+    registry.extend(batch)
+    expected.extend(batch)
+    # sorted() is stable: ties keep registration order.
+    assert names(registry) == names(sorted(expected, key=lambda item: item.priority))
+
+    removed = registry.remove_type(Other)
+    assert sorted(names(removed)) == list(range(200, 250))
+    assert names(registry) == names(sorted(expected[:200], key=lambda item: item.priority))
+    assert registry.remove_type(Other) == []
+    assert names(registry.of_type(Item)) == names(registry)
+
+
+class SysA(System):
+    def process(self):
+        pass
+
+
+class SysB(System):
+    def process(self):
+        pass
+
+
+class ScreenA(Screen):
+    def draw(self):
+        pass
+
+
+def test_bulk_registration():
+    world = World()
+    world.add_scenes(["level1", "level2"])
+    world.add_system_to_scenes(SysA, "level1", 1)
+    world.add_systems_to_scenes([SysB, (SysA, 2), (SysB, 1, {})], ["level1", "level2"])
+    world.add_screens_to_scenes([(ScreenA, 3)], "level2")
+
+    order = [(type(system), system.priority) for system in world.scene_systems["level1"]]
+    assert order == [(SysB, 0), (SysA, 1), (SysB, 1), (SysA, 2)]
+    assert world.scene_systems["level2"][0] is world.scene_systems["level1"][0]
+    assert len(world.scene_systems["level2"]) == 3
+    assert [screen.priority for screen in world.scene_screens["level2"]] == [3]
+
+
+runs = []
+
+
+class Tick(System):
+    def process(self):
+        runs.append("tick")
+
+
+class Paint(Screen):
+    def draw(self):
+        runs.append("paint")
+
+
+class Restart(Event):
+    def _Event__process(self):
+        runs.append("restart")
+
+
+def test_remove_and_disable():
+    runs.clear()
+    world = World()
+    world.add_scenes(["title", "game"])
+    world.current_scene = "game"
+    world.add_system(Tick, 0)
+    world.add_screen(Paint, 0)
+    world.add_event(Restart, lambda: True)
+    world.process()
+    world.process_screens()
+    assert runs == ["tick", "restart", "paint"]
+
+    runs.clear()
+    world.set_enabled(Tick, False)
+    world.set_enabled(Paint, False, "game")
+    assert not world.is_enabled(Tick) and world.is_enabled(Restart)
+    world.process()
+    world.process_screens()
+    assert runs == ["restart"]
+    assert len(world.scene_systems["game"]) == 1
+    world.set_enabled(Tick, True)
+    world.set_enabled(Paint, True)
+
+    runs.clear()
+    assert world.remove_system_from_scene(Tick, "game") == 1
+    assert world.remove_event(Restart) == 2
+    world.process()
+    world.process_screens()
+    assert runs == ["paint"]
+    assert len(world.scene_systems["title"]) == 1
+    assert world.scene_manager.get_scene_events("game") == {}
+
+    assert world.remove_system(Tick) == 1
+    assert world.remove_screen(Paint) == 2
+    assert world.remove_screen_from_scene(Paint, ["title"]) == 0
+
+
+if __name__ == "__main__":
+    test_priority_order_is_stable()
+    test_bulk_registration()
+    test_remove_and_disable()
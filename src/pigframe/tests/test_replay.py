@@ -0,0 +1,92 @@
+import random
+from dataclasses import dataclass
+
+import pytest
+
+from pigframe import World, System, ActionMap, InputLog
+
+
+pressed = set()
+
+
+def btn(key):
+    return key in pressed
+
+
+@dataclass
+class Actions(ActionMap):
+    left: tuple = btn, "KEY_LEFT"
+    right: tuple = btn, "KEY_RIGHT"
+
+
+@dataclass
+class Position:
+    x: int
+
+
+class Move(System):
+    def process(self):
+        for ent, pos in self.world.get_component(Position):
+            if self.world.actions.left:
+                pos.x -= 1
+            if self.world.actions.right:
+                pos.x += random.randint(1, 3)
+
+
+def make_world():
+    world = World()
+    world.add_scenes(["play"])
+    world.current_scene = "play"
+    world.add_system(Move, 0)
+    world.set_user_actions_map(Actions())
+    ent = world.create_entity()
+    world.add_component_to_entity(ent, Position, x=0)
+    return world, ent
+
+
+def test_record_and_fast_forward(tmp_path):
+    world, ent = make_world()
+    log = world.record_inputs(seed=7)
+    for frame in range(50):
+        pressed.clear()
+        if frame % 3 == 0:
+            pressed.add("KEY_RIGHT")
+        if frame % 7 == 0:
+            pressed.add("KEY_LEFT")
+        world.process()
+    assert world.stop_recording() is log
+    pressed.clear()
+    assert len(log) == 50 and log.masks.itemsize == 1
+
+    path = tmp_path / "session.pgil"
+    log.save(path)
+    loaded = InputLog.load(path)
+    assert loaded == log
+
+    replayed, replayed_ent = make_world()
+    assert replayed.fast_forward(loaded) == 50
+    assert replayed.get_entity_object(replayed_ent) == world.get_entity_object(ent)
+
+    # Live input resumes once the log is exhausted.
+    pressed.add("KEY_LEFT")
+    replayed.process()
+    assert replayed.actions.left is True
+    pressed.clear()
+
+
+def test_replay_checks_actions():
+    world, _ = make_world()
+    with pytest.raises(ValueError):
+        world.replay_inputs(InputLog(["jump"]))
+    with pytest.raises(ValueError):
+        InputLog.from_bytes(b"NOPE" + bytes(40))
+    with pytest.raises(ValueError):
+        InputLog([f"action{i}" for i in range(65)])
+
+
+if __name__ == "__main__":
+    import pathlib
+    import tempfile
+
+    test_record_and_fast_forward(pathlib.Path(tempfile.mkdtemp()))
+    test_replay_checks_actions()
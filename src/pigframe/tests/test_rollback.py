@@ -0,0 +1,245 @@
+import random
+from dataclasses import dataclass
+
+import pytest
+
+from pigframe import World, System, ActionMap, RollbackBuffer, ArchetypeStorage, columnar
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+
+pressed = set()
+
+
+def btn(key):
+    return key in pressed
+
+
+@dataclass
+class Actions(ActionMap):
+    left: tuple = btn, "KEY_LEFT"
+    right: tuple = btn, "KEY_RIGHT"
+
+
+@dataclass
+class Position:
+    x: int
+    y: float
+
+
+if np is not None:
+
+    @columnar
+    @dataclass
+    class Speed:
+        x: float
+
+
+class Move(System):
+    def process(self):
+        for ent, pos in self.world.get_component(Position):
+            if self.world.actions.left:
+                pos.x -= 1
+            if self.world.actions.right:
+                pos.x += random.randint(1, 3)
+            pos.y += random.random()
+
+
+@dataclass
+class Frozen:
+    pass
+
+
+class Spawn(System):
+    """Spawns, removes and moves entities between archetypes, picking them in iteration order."""
+
+    def process(self):
+        world = self.world
+        if world.frame % 3 == 0:
+            ent = world.create_entity()
+            world.add_component_to_entity(ent, Position, x=0, y=0.0)
+        if world.frame % 5 == 0:
+            world.remove_entity(random.choice(world.get_component(Position))[0])
+        if world.frame % 4 == 0:
+            ent = random.choice(world.get_component(Position))[0]
+            if world.get_entity_object(ent).get(Frozen) is None:
+                world.add_component_to_entity(ent, Frozen)
+            else:
+                world.remove_component_from_entity(ent, Frozen)
+
+
+def make_world(storage=None):
+    world = World(storage() if storage else None)
+    world.add_scenes(["play"])
+    world.current_scene = "play"
+    world.add_system(Move, 0)
+    world.add_system(Spawn, 1)
+    world.set_user_actions_map(Actions())
+    ent = world.create_entity()
+    world.add_component_to_entity(ent, Position, x=0, y=0.0)
+    return world
+
+
+def state(world):
+    return sorted((ent, pos.x, pos.y) for ent, pos in world.get_component(Position))
+
+
+def play(world, frames, rng):
+    for _ in range(frames):
+        pressed.clear()
+        pressed.update(key for key in ("KEY_LEFT", "KEY_RIGHT") if rng.random() < 0.5)
+        world.process()
+    pressed.clear()
+
+
+def test_buffer_reconstructs_every_kept_state():
+    rng = random.Random(3)
+    buffer = RollbackBuffer(capacity=10)
+    states = []
+    for frame in range(25):
+        state = {"fixed": b"unchanged"}
+        for key in ("a", "b", "c"):
+            if rng.random() < 0.8:
+                state[key] = bytes(rng.randrange(4) for _ in range(rng.randrange(40, 60)))
+        # 8-byte values which only change in their low bytes
+        state["d"] = bytes(8 * [frame % 3, 1, 2, 3, 4, 5, 6, 7])
+        states.append(state)
+        buffer.push(frame, state)
+    assert list(buffer.frames) == list(range(15, 25))
+    for frame in buffer.frames:
+        assert buffer.state(frame) == states[frame]
+    with pytest.raises(KeyError):
+        buffer.state(14)
+
+    assert buffer.discard_after(20) == states[20]
+    assert list(buffer.frames) == list(range(15, 21))
+    buffer.push(20, {"a": b"replaced"})
+    buffer.push(21, {"a": b"next", "b": b"new"})
+    assert buffer.state(20) == {"a": b"replaced"}
+    assert buffer.state(19) == states[19]
+    buffer.push(40, {"a": b"gap"})
+    assert list(buffer.frames) == [40]
+
+
+@pytest.mark.parametrize("storage", [None, ArchetypeStorage])
+def test_rewind_and_resimulate_is_deterministic(storage):
+    random.seed(5)
+    world = make_world(storage)
+    world.enable_rollback(frames=30)
+    play(world, 40, random.Random(1))
+    expected = state(world)
+    expected_random = random.random()
+    assert len(world.rollback) == 30
+
+    masks = world.rewind(10)
+    assert world.frame == 30
+    assert len(masks) == 10 and None not in masks
+    assert world.resimulate(masks) == 10
+    assert world.frame == 40
+    assert state(world) == expected
+    assert random.random() == expected_random
+
+
+def test_resimulate_with_corrected_inputs():
+    random.seed(5)
+    world = make_world()
+    world.enable_rollback(frames=30)
+    log = world.record_inputs(seed=1)
+    play(world, 20, random.Random(2))
+    masks = world.rewind(5)
+    assert len(log) == 15
+    corrected = [world.input_state.bits["left"]] * 5
+    world.resimulate(corrected)
+    assert list(log)[-5:] == corrected
+
+    # The same session without rollback, with the corrected inputs from the start.
+    other = make_world()
+    other.fast_forward(log)
+    assert state(other) == state(world)
+    assert masks != corrected
+
+
+class Drift(System):
+    def process(self):
+        for ent, pos in self.world.get_component(Position):
+            pos.x += 10
+            pos.y += 0.5
+
+
+@pytest.mark.parametrize("storage", [None, ArchetypeStorage])
+def test_rewind_writes_values_in_place(storage):
+    world = World(storage() if storage else None)
+    world.add_scenes(["play"])
+    world.current_scene = "play"
+    world.add_system(Drift, 0)
+    for i in range(5):
+        world.add_component_to_entity(world.create_entity(), Position, x=i, y=0.0)
+    grid = world.add_spatial_index(Position, cell_size=4)
+    components = {ent: pos for ent, pos in world.get_component(Position)}
+    world.enable_rollback(frames=10)
+    world.run_headless(3)
+    assert grid.query_aabb(0, 0, 4, 1) == []
+
+    world.rewind(3)
+    # Same entities and components: the values are written into the existing components.
+    assert {ent: pos for ent, pos in world.get_component(Position)} == components
+    assert all(components[ent] is pos for ent, pos in world.get_component(Position))
+    assert sorted((pos.x, pos.y) for pos in components.values()) == [(i, 0.0) for i in range(5)]
+    assert sorted(grid.query_aabb(0, 0, 4, 1)) == sorted(components)
+
+    # A component with another field than the saved ones makes the storage be rebuilt.
+    world.run_headless(1)
+    next(iter(components.values())).__dict__.pop("y")
+    next(iter(components.values())).z = 0
+    world.rewind(1)
+    assert sorted((pos.x, pos.y) for _, pos in world.get_component(Position)) == [(i, 0.0) for i in range(5)]
+    assert not hasattr(world.get_component(Position)[0][1], "z")
+
+
+def test_rewind_columnar_components():
+    if np is None:
+        pytest.skip("numpy is not installed")
+
+    world = World()
+    world.spawn_batch(100, {Speed: {"x": np.arange(100.0)}})
+    pool = world.storage.components[Speed]
+    column = pool.columns["x"]
+    world.enable_rollback(frames=5)
+    for _ in range(3):
+        world.save_rollback_state()
+        (speed,) = world.get_columns(Speed)
+        speed.x *= 2
+        world.frame += 1
+    world.rewind(3)
+    assert world.storage.components[Speed] is pool and pool.columns["x"] is column
+    assert np.array_equal(world.get_columns(Speed)[Speed].x, np.arange(100.0))
+
+
+def test_rewind_limits():
+    world = make_world()
+    with pytest.raises(ValueError):
+        world.rewind(1)
+    world.enable_rollback(frames=4)
+    play(world, 10, random.Random(0))
+    with pytest.raises(ValueError):
+        world.rewind(0)
+    with pytest.raises(KeyError):
+        world.rewind(5)
+    world.rewind(4)
+    assert world.frame == 6
+    world.disable_rollback()
+    world.process()
+    assert world.rollback is None
+
+
+if __name__ == "__main__":
+    test_buffer_reconstructs_every_kept_state()
+    test_rewind_and_resimulate_is_deterministic(None)
+    test_rewind_and_resimulate_is_deterministic(ArchetypeStorage)
+    test_resimulate_with_corrected_inputs()
+    test_rewind_writes_values_in_place(None)
+    test_rewind_columnar_components()
+    test_rewind_limits()
@@ -0,0 +1,68 @@
+from pigframe import World, System, EveryNFrames, FixedRate, OnDemand
+
+
+class Counter(System):
+    def __init__(self, world, priority: int = 0, **kwargs) -> None:
+        super().__init__(world, priority, **kwargs)
+        self.count = 0
+
+    def process(self):
+        self.count += 1
+
+
+def make_world(schedule):
+    world = World()
+    world.add_scenes(["scene1"])
+    world.current_scene = "scene1"
+    world.add_system(Counter, 0, schedule)
+    return world, world.scene_systems["scene1"][0]
+
+
+def test_every_n_frames():
+    world, system = make_world(EveryNFrames(6))
+    world.run_headless(60)
+    assert system.count == 10
+
+    world, system = make_world(EveryNFrames(6, offset=2))
+    world.run_headless(3)
+    assert system.count == 1
+
+
+def test_fixed_rate():
+    world, system = make_world(FixedRate(10))
+    world.run_headless(60, dt=1 / 60)
+    assert system.count == 10
+
+    # A long frame catches up at most `max_steps` runs.
+    world, system = make_world(FixedRate(10, max_steps=3))
+    world.run_headless(1, dt=1.0)
+    assert system.count == 3
+    world.run_headless(1, dt=0.1)
+    assert system.count == 4
+
+
+def test_on_demand():
+    flag = []
+    schedule = OnDemand(lambda world: bool(flag))
+    world, system = make_world(schedule)
+    world.run_headless(5)
+    assert system.count == 0
+    schedule.request()
+    world.run_headless(5)
+    assert system.count == 1
+    flag.append(1)
+    world.run_headless(2)
+    assert system.count == 3
+
+
+def test_unscheduled_system_runs_every_frame():
+    world, system = make_world(None)
+    world.run_headless(7)
+    assert system.count == 7
+
+
+if __name__ == "__main__":
+    test_every_n_frames()
+    test_fixed_rate()
+    test_on_demand()
+    test_unscheduled_system_runs_every_frame()
@@ -0,0 +1,284 @@
+import random
+from dataclasses import dataclass
+
+import pytest
+
+from pigframe import World, Component, Event, ArchetypeStorage, DefaultStorage, Query, SnapshotFile, columnar
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover - depends on the environment
+    np = None
+
+
+@dataclass
+class Position(Component):
+    x: float
+    y: float
+
+
+@dataclass
+class Health(Component):
+    value: int
+    alive: bool
+
+
+@dataclass
+class Name(Component):
+    text: str
+    tags: list
+
+
+@dataclass(slots=True)
+class Slotted(Component):
+    a: int
+    b: float
+
+
+class Custom(Component):
+    def __init__(self, speed, label="none"):
+        self.speed = speed
+        self.label = label
+
+
+if np is not None:
+
+    @columnar
+    @dataclass
+    class Velocity(Component):
+        x: float
+        y: float
+
+
+class Restart(Event):
+    def _Event__process(self):
+        pass
+
+
+def build_world(storage=None):
+    world = World(storage)
+    world.add_scenes(["title", "play"])
+    world.current_scene = "play"
+    world.add_event_to_scene(Restart, "play", lambda: False)
+    for i in range(50):
+        ent = world.create_entity()
+        world.add_component_to_entity(ent, Position, x=i * 0.5, y=-i)
+        if i % 2 == 0:
+            world.add_component_to_entity(ent, Health, value=i * 10 - 100, alive=i % 4 == 0)
+        if i % 3 == 0:
+            world.add_component_to_entity(ent, Name, text=f"e{i}", tags=[i])
+        if i % 5 == 0:
+            world.add_component_to_entity(ent, Slotted, a=1 << 40, b=i / 3)
+        if i % 7 == 0:
+            world.add_component_to_entity(ent, Custom, speed=i)
+    for ent in (3, 8, 13):
+        world.remove_entity(ent)
+    world.create_entity()
+    return world
+
+
+def dump(world):
+    return {
+        component_type: [(ent, repr(component)) for ent, component in world.get_component(component_type)]
+        for component_type in (Position, Health, Name, Slotted)
+    } | {Custom: [(ent, vars(c)) for ent, c in world.get_component(Custom)]}
+
+
+@pytest.mark.parametrize("storage_type", [DefaultStorage, ArchetypeStorage])
+def test_snapshot_round_trip(storage_type):
+    world = build_world(storage_type())
+    world.frame = 120
+    world.scene_manager.update_scene_event("play", Restart, 1)
+    expected = dump(world)
+    buffer = world.snapshot()
+    assert isinstance(buffer, bytes)
+
+    other = World(storage_type())
+    other.add_scenes(["title", "play"])
+    other.add_event_to_scene(Restart, "play", lambda: False)
+    other.restore(buffer)
+    assert isinstance(other.storage, storage_type)
+    assert other.current_scene == "play"
+    assert other.frame == 120
+    assert other.scene_manager.scenes_events["play"][Restart].run == 1
+    got = dump(other)
+    if storage_type is DefaultStorage:
+        # Pools are refilled in order: iteration order is the same.
+        assert got == expected
+    else:
+        assert {k: sorted(v, key=repr) for k, v in got.items()} == {k: sorted(v, key=repr) for k, v in expected.items()}
+    assert sorted(other.entities) == sorted(world.entities)
+    assert type(other.get_entity_object(0)[Health].alive) is bool
+    assert other.get_entity_object(5)[Slotted].a == 1 << 40
+
+
+def test_restore_keeps_entity_ids_and_generations():
+    world = build_world()
+    stale = 3
+    buffer = world.snapshot()
+    world.restore(buffer)
+    assert not world.is_alive(stale)
+    assert world.create_entity() == build_world().create_entity()
+    world.restore(buffer)
+    fresh = World()
+    fresh.restore(buffer)
+    assert fresh.create_entity() == world.create_entity()
+
+
+def test_restore_resets_changes_and_queries():
+    world = build_world()
+    query = world.add_query(Query(all=(Position, Health)))
+    before = sorted(ent for ent, _ in query)
+    buffer = world.snapshot()
+
+    for ent, (pos,) in world.get_components(Position):
+        pos.x = -1.0
+    world.remove_entity(0)
+    world.add_component_to_entity(1, Health, value=0, alive=False)
+    world.commands.remove_entity(2)
+
+    world.restore(buffer)
+    assert sorted(ent for ent, _ in query) == before
+    assert all(pos.x >= 0 for _, pos in world.get_component(Position))
+    assert len(world.commands) == 0
+    assert world.get_entity_object(1).get(Health) is None
+
+
+def shuffle_components(world, rng, steps):
+    for _ in range(steps):
+        entities = list(world.entities)
+        op = rng.random()
+        if op < 0.3 or not entities:
+            world.add_component_to_entity(world.create_entity(), Position, x=0.0, y=0.0)
+        elif op < 0.6:
+            world.add_component_to_entity(rng.choice(entities), Health, value=1, alive=True)
+        elif op < 0.8:
+            world.remove_component_from_entity(rng.choice(entities), rng.choice([Position, Health]))
+        else:
+            world.remove_entity(rng.choice(entities))
+
+
+def iteration_order(world):
+    return (
+        list(world.entities),
+        [ent for ent, _ in world.get_component(Position)],
+        [ent for ent, _ in world.get_component(Health)],
+        [ent for ent, _ in world.get_components(Health, Position)],
+    )
+
+
+@pytest.mark.parametrize("storage_type", [DefaultStorage, ArchetypeStorage])
+def test_restore_keeps_iteration_order(storage_type):
+    world = World(storage_type())
+    shuffle_components(world, random.Random(0), 200)
+    expected = iteration_order(world)
+    other = World(storage_type())
+    other.restore(world.snapshot())
+    assert iteration_order(other) == expected
+    # Tables which were empty when the snapshot was taken keep their place too.
+    shuffle_components(world, random.Random(1), 100)
+    shuffle_components(other, random.Random(1), 100)
+    assert iteration_order(other) == iteration_order(world)
+
+
+def test_restore_rejects_other_data():
+    with pytest.raises(ValueError):
+        World().restore(b"not a snapshot at all")
+
+
+def test_snapshot_of_columnar_components():
+    if np is None:
+        pytest.skip("numpy is not installed")
+    world = World()
+    for i in range(100):
+        ent = world.create_entity()
+        world.add_component_to_entity(ent, Velocity, x=i, y=-i)
+    world.remove_entity(10)
+    buffer = world.snapshot()
+
+    other = World()
+    other.restore(buffer)
+    columns = other.get_columns(Velocity)
+    expected = world.get_columns(Velocity)
+    assert np.array_equal(columns.entities, expected.entities)
+    assert np.array_equal(columns[Velocity].x, expected[Velocity].x)
+    assert other.get_entity_object(20)[Velocity].y == -20
+
+
+def test_snapshot_file(tmp_path):
+    world = build_world()
+    path = tmp_path / "world.pgws"
+    world.save_snapshot(path)
+
+    with SnapshotFile(path) as snapshot:
+        assert sorted(snapshot.entities) == sorted(world.entities)
+        assert set(snapshot.component_types) == {Position, Health, Name, Slotted, Custom}
+        assert list(snapshot.ids(Health)) == [ent for ent, _ in world.get_component(Health)]
+        assert snapshot.column(Name, "text") == [c.text for _, c in world.get_component(Name)]
+        components = snapshot.components(Custom)
+        assert components is snapshot.components(Custom)
+        assert [vars(c) for c in components] == [vars(c) for _, c in world.get_component(Custom)]
+        if np is not None:
+            assert snapshot.column(Health, "alive").tolist() == [c.alive for _, c in world.get_component(Health)]
+
+    other = World()
+    other.load_snapshot(path)
+    assert dump(other) == dump(world)
+
+
+def test_load_columnar_snapshot_in_place(tmp_path):
+    if np is None:
+        pytest.skip("numpy is not installed")
+    world = World()
+    world.spawn_batch(1000, {Velocity: {"x": np.arange(1000.0), "y": 1.0}})
+    path = tmp_path / "level.pgws"
+    world.save_snapshot(path)
+    data = path.read_bytes()
+
+    other = World()
+    other.load_snapshot(path)
+    columns = other.get_columns(Velocity)
+    x = columns[Velocity].x
+    # The columns are the mapped file: no copy, and writes stay in memory.
+    assert not x.flags.owndata
+    x += 1
+    assert other.get_entity_object(5)[Velocity].x == 6.0
+    assert path.read_bytes() == data
+    ent = other.create_entity()
+    other.add_component_to_entity(ent, Velocity, x=-1.0, y=0.0)
+    other.remove_entity(0)
+    assert len(other.get_columns(Velocity)) == 1000
+    assert other.get_entity_object(ent)[Velocity].x == -1.0
+
+    # From bytes, the read-only buffer is copied into the pool.
+    copy = World()
+    copy.restore(data)
+    copy.get_columns(Velocity)[Velocity].x += 1
+    assert copy.get_entity_object(5)[Velocity].x == 6.0
+
+
+def test_snapshot_file_rejects_other_files(tmp_path):
+    path = tmp_path / "empty"
+    path.write_bytes(b"")
+    with pytest.raises(ValueError):
+        SnapshotFile(path)
+    path.write_bytes(b"x" * 64)
+    with pytest.raises(ValueError):
+        World().load_snapshot(path)
+
+
+if __name__ == "__main__":
+    test_snapshot_round_trip(DefaultStorage)
+    test_snapshot_round_trip(ArchetypeStorage)
+    test_restore_keeps_entity_ids_and_generations()
+    test_restore_resets_changes_and_queries()
+    test_restore_keeps_iteration_order(DefaultStorage)
+    test_restore_keeps_iteration_order(ArchetypeStorage)
+    test_restore_rejects_other_data()
+    test_snapshot_of_columnar_components()
+    import pathlib
+    import tempfile
+
+    test_snapshot_file(pathlib.Path(tempfile.mkdtemp()))
+    test_load_columnar_snapshot_in_place(pathlib.Path(tempfile.mkdtemp()))
+    test_snapshot_file_rejects_other_files(pathlib.Path(tempfile.mkdtemp()))
@@ -0,0 +1,114 @@
+import random
+from dataclasses import dataclass
+
+import pytest
+
+from pigframe import World, ArchetypeStorage, SpatialGrid
+
+
+@dataclass
+class Position:
+    x: float
+    y: float
+
+
+@dataclass
+class Enemy:
+    pass
+
+
+def brute_pairs(world, grid, radius):
+    rows = [(ent, pos) for ent, pos in world.get_component(Position) if ent in grid]
+    pairs = set()
+    for i, (a, pa) in enumerate(rows):
+        for b, pb in rows[i + 1:]:
+            if (pa.x - pb.x) ** 2 + (pa.y - pb.y) ** 2 <= radius**2:
+                pairs.add(frozenset((a, b)))
+    return pairs
+
+
+@pytest.mark.parametrize("storage", [None, ArchetypeStorage])
+@pytest.mark.parametrize("seed", range(5))
+def test_grid_matches_brute_force(storage, seed):
+    rng = random.Random(seed)
+    world = World(storage() if storage else None)
+    grid = world.add_spatial_index(Position, cell_size=10, none=[Enemy])
+    alive = []
+    for _ in range(300):
+        op = rng.random()
+        if op < 0.4 or not alive:
+            ent = world.create_entity()
+            world.add_component_to_entity(ent, Position, x=rng.uniform(-50, 50), y=rng.uniform(-50, 50))
+            alive.append(ent)
+        elif op < 0.5:
+            world.add_component_to_entity(rng.choice(alive), Enemy)
+        elif op < 0.6:
+            ent = rng.choice(alive)
+            alive.remove(ent)
+            world.remove_entity(ent)
+        else:
+            pos = world.get_entity_object(rng.choice(alive))[Position]
+            pos.x += rng.uniform(-15, 15)
+            pos.y += rng.uniform(-15, 15)
+    grid.refresh()
+
+    expected = {ent for ent in alive if not world.has_component(ent, Enemy)}
+    assert set(grid.entity_cells) == expected
+    assert sorted(grid.query_aabb(-1000, -1000, 1000, 1000)) == sorted(expected)
+
+    inside = {
+        ent
+        for ent in expected
+        if (world.get_entity_object(ent)[Position].x - 5) ** 2 + world.get_entity_object(ent)[Position].y ** 2 <= 400
+    }
+    assert set(grid.query_radius(5, 0, 20)) == inside
+
+    candidates = {frozenset(pair) for pair in grid.candidate_pairs()}
+    assert len(candidates) == len(grid.candidate_pairs())
+    assert brute_pairs(world, grid, 10) <= candidates
+
+
+def test_candidate_pairs_between_grids():
+    world = World()
+    bullets = world.add_spatial_index(Position, cell_size=8, none=[Enemy])
+    enemies = world.add_spatial_index(Position, cell_size=8, all=[Enemy])
+    bullet = world.create_entity()
+    world.add_component_to_entity(bullet, Position, x=7, y=7)
+    far = world.create_entity()
+    world.add_component_to_entity(far, Position, x=100, y=100)
+    enemy = world.create_entity()
+    world.add_component_to_entity(enemy, Position, x=9, y=9)
+    world.add_component_to_entity(enemy, Enemy)
+
+    assert bullets.candidate_pairs(enemies) == [(bullet, enemy)]
+    world.get_entity_object(enemy)[Position].x = 60
+    assert enemies.refresh() == 1
+    assert bullets.candidate_pairs(enemies) == []
+    with pytest.raises(ValueError):
+        bullets.candidate_pairs(SpatialGrid(Position, 4))
+
+
+def test_query_aabb_small_and_large_boxes():
+    rng = random.Random(0)
+    world = World()
+    grid = world.add_spatial_index(Position, cell_size=1)
+    points = {}
+    for _ in range(50):
+        ent = world.create_entity()
+        points[ent] = (rng.uniform(0, 20), rng.uniform(0, 20))
+        x, y = points[ent]
+        world.add_component_to_entity(ent, Position, x=x, y=y)
+    # Boxes covering fewer cells than the occupied ones visit their cells, larger boxes visit the occupied cells.
+    for x0, y0, x1, y1 in [(2, 3, 6, 5), (-1e6, 4, 1e6, 9), (-1e9, -1e9, 1e9, 1e9), (5, 5, 4, 4)]:
+        expected = {ent for ent, (x, y) in points.items() if x0 <= x <= x1 and y0 <= y <= y1}
+        found = grid.query_aabb(x0, y0, x1, y1)
+        assert len(found) == len(expected) and set(found) == expected
+    assert set(grid.query_radius(1e6, 1e6, 2e6)) == set(points)
+
+
+if __name__ == "__main__":
+    for seed in range(5):
+        test_grid_matches_brute_force(None, seed)
+        test_grid_matches_brute_force(ArchetypeStorage, seed)
+    test_candidate_pairs_between_grids()
+    test_query_aabb_small_and_large_boxes()
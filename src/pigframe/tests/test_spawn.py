@@ -0,0 +1,118 @@
+from dataclasses import dataclass
+
+import pytest
+
+from pigframe import World, ArchetypeStorage, make_entity
+
+
+@dataclass
+class Position:
+    x: int
+    y: int
+
+
+@dataclass
+class Velocity:
+    x: int = 0
+    y: int = 0
+
+
+class Enemy:
+    def __init__(self, hp: int = 3):
+        self.hp = hp
+
+
+@pytest.mark.parametrize("storage", [None, ArchetypeStorage])
+def test_spawn_batch(storage):
+    world = World(storage() if storage else None)
+    player = world.create_entity()
+    world.add_component_to_entity(player, Position, x=-1, y=-1)
+    positions = world.get_component(Position)
+
+    ents = world.spawn_batch(5, {
+        Position: {"x": range(5), "y": 7},
+        Velocity: lambda i: Velocity(x=i),
+        Enemy: None,
+    })
+    assert ents == range(1, 6)
+    assert positions == [(player, Position(-1, -1))]
+    assert world.get_entity_object(3)[Position] == Position(2, 7)
+    assert world.get_entity_object(3)[Velocity] == Velocity(2, 0)
+    assert world.get_entity_object(3)[Enemy].hp == 3
+    assert sorted(ent for ent, _ in world.get_components(Position, Velocity)) == [1, 2, 3, 4, 5]
+    assert len(world.get_component(Position)) == 6
+
+    world.remove_entity(2)
+    assert world.create_entity() == 2 + (1 << 32)
+    assert len(world.get_components(Position, Enemy)) == 4
+
+
+@pytest.mark.parametrize("storage", [None, ArchetypeStorage])
+def test_spawn_remove_waves_keep_capacity_bounded(storage):
+    world = World(storage() if storage else None)
+    player = world.create_entity()
+    world.add_component_to_entity(player, Position, x=-1, y=-1)
+    for wave in range(200):
+        ents = world.spawn_batch(1000, {Position: {"x": wave, "y": 0}, Velocity: None})
+        for ent in ents:
+            world.remove_entity(ent)
+    # Every wave reuses the indices freed by the previous one, with the next generation.
+    assert ents == range(make_entity(1, 199), make_entity(1, 199) + 1000)
+    assert world.entity_allocator.capacity == 1001
+    assert len(world.entity_allocator.free) <= 2 * 1000 + 64
+    assert world.get_component(Position) == [(player, Position(-1, -1))]
+
+
+def test_spawn_batch_length_mismatch():
+    world = World()
+    with pytest.raises(ValueError):
+        world.spawn_batch(3, {Position: [Position(0, 0)]})
+
+
+@pytest.mark.parametrize("storage", [None, ArchetypeStorage])
+def test_spawn_batch_checks_columns_first(storage):
+    world = World(storage() if storage else None)
+    with pytest.raises(ValueError):
+        world.spawn_batch(3, {Position: {"x": [1, 2], "y": [1, 2, 3]}, Velocity: None})
+    with pytest.raises(TypeError):
+        world.spawn_batch(3, {Position: {"x": 1, "z": 2}})
+    with pytest.raises(TypeError):
+        world.spawn_batch(3, {Position: {"x": 1}})
+    with pytest.raises(TypeError):
+        world.spawn_batch(3, {Enemy: {"speed": 1}})
+    assert len(world.entity_allocator) == 0
+    assert list(world.entities) == []
+
+    assert world.spawn_batch(2, {Velocity: {"x": [1, 2]}, Enemy: {"hp": 5}}) == range(2)
+    assert world.get_entity_object(1)[Velocity] == Velocity(2, 0)
+    assert world.get_entity_object(1)[Enemy].hp == 5
+
+
+def test_spawn_batch_columnar_defaults():
+    np = pytest.importorskip("numpy")
+    from pigframe import columnar
+
+    @columnar
+    @dataclass
+    class Body:
+        x: float
+        mass: float = 1.0
+
+    world = World()
+    with pytest.raises(TypeError):
+        world.spawn_batch(3, {Body: {"mass": 2.0}})
+    assert len(world.entity_allocator) == 0
+    world.spawn_batch(3, {Body: {"x": np.arange(3.0)}})
+    assert world.get_columns(Body)[Body].mass.tolist() == [1.0, 1.0, 1.0]
+    assert world.get_entity_object(2)[Body].x == 2.0
+
+
+if __name__ == "__main__":
+    test_spawn_batch(None)
+    test_spawn_batch(ArchetypeStorage)
+    test_spawn_remove_waves_keep_capacity_bounded(None)
+    test_spawn_remove_waves_keep_capacity_bounded(ArchetypeStorage)
+    test_spawn_batch_length_mismatch()
+    test_spawn_batch_checks_columns_first(None)
+    test_spawn_batch_checks_columns_first(ArchetypeStorage)
+    test_spawn_batch_columnar_defaults()
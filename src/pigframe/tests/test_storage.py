@@ -0,0 +1,102 @@
+from dataclasses import dataclass
+from pigframe import World, DefaultStorage, ArchetypeStorage, SparseSet, make_entity
+
+
+@dataclass
+class Position:
+    x: int
+    y: int
+
+
+@dataclass
+class Velocity:
+    x: int
+    y: int
+
+
+@dataclass
+class Health:
+    hp: int
+
+
+def build_world(storage):
+    world = World(storage)
+    for i in range(10):
+        ent = world.create_entity()
+        world.add_component_to_entity(ent, Position, x=i, y=i)
+        if i % 2 == 0:
+            world.add_component_to_entity(ent, Velocity, x=1, y=1)
+        if i % 3 == 0:
+            world.add_component_to_entity(ent, Health, hp=i)
+    return world
+
+
+def test_storages_agree():
+    worlds = [build_world(DefaultStorage()), build_world(ArchetypeStorage())]
+    for world in worlds:
+        world.remove_component_from_entity(4, Velocity)
+        world.remove_entity(6)
+
+    results = []
+    for world in worlds:
+        results.append((
+            sorted(world.get_component(Position), key=lambda r: r[0]),
+            sorted(world.get_components(Position, Velocity), key=lambda r: r[0]),
+            sorted(world.get_components(Velocity, Health), key=lambda r: r[0]),
+            {ent: world.get_entity_object(ent) for ent in world.entities},
+            {ct: set(ents) for ct, ents in world.components.items()},
+        ))
+    assert results[0] == results[1]
+    assert [ent for ent, _ in results[1][1]] == [0, 2, 8]
+
+
+def test_archetype_tables():
+    storage = ArchetypeStorage()
+    world = build_world(storage)
+    table = storage.archetypes[frozenset({Position, Velocity})]
+    assert table.entities == [2, 4, 8]
+    assert world.get_components(Position, Velocity, Health) == [(0, [Position(0, 0), Velocity(1, 1), Health(0)]),
+                                                                (6, [Position(6, 6), Velocity(1, 1), Health(6)])]
+
+    world.remove_entity(2)
+    assert table.entities == [8, 4]
+    assert world.get_entity_object(8)[Position] == Position(8, 8)
+    assert world.remove_entity(2) is None
+    assert world.get_components(Health, Velocity) == [(0, [Health(0), Velocity(1, 1)]), (6, [Health(6), Velocity(1, 1)])]
+
+
+def test_archetype_component_exist():
+    world = World(ArchetypeStorage())
+    ent = world.create_entity()
+    world.add_component_to_entity(ent, Position, x=0, y=0)
+    assert world.component_exist(Position) is True
+    assert world.component_exist(Velocity) is False
+    assert world.get_components(Position, Velocity) == []
+    world.remove_component_from_entity(ent, Position)
+    assert world.component_exist(Position) is False
+    assert world.get_entity_object(ent) == {}
+
+
+def test_sparse_set():
+    pool = SparseSet()
+    for entity in [0, 5, 9000]:
+        assert pool.add(entity, f"c{entity}") is True
+    assert pool.add(5, "again") is False
+    assert len(pool.pages) == 3 and pool.pages[1] is None
+
+    assert pool.remove(0) == "c0"
+    assert pool.entities == [9000, 5]
+    assert pool.dense == ["c9000", "c5"]
+    assert pool.get(9000) == "c9000"
+    assert 0 not in pool
+    # Another generation of the same index is a different entity.
+    assert make_entity(5, 1) not in pool
+    assert pool.remove(make_entity(5, 1)) is None
+    assert list(pool.items()) == [(9000, "c9000"), (5, "c5")]
+
+
+if __name__ == "__main__":
+    test_storages_agree()
+    test_archetype_tables()
+    test_archetype_component_exist()
+    test_sparse_set()
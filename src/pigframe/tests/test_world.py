@@ -1,4 +1,4 @@
-from pigframe import World, System, Screen
+from pigframe import World, System, Screen, Event, ActionMap, InputState
 from dataclasses import dataclass
 
 
@@ -58,7 +58,147 @@ def test_component():
     assert world.set_of_components_exist([Position, Velocity]) is True
 
 
+pressed = set()
+
+
+def btn(key):
+    return key in pressed
+
+
+@dataclass
+class Actions(ActionMap):
+    up: tuple = btn, "KEY_UP", "KEY_W"
+    shoot: tuple = btn, "KEY_SPACE"
+    any_key: tuple = (lambda: len(pressed) > 0,)
+
+
+def test_user_actions():
+    world = World()
+    world.set_user_actions_map(Actions())
+    actions = world.actions
+    assert (actions.up, actions.shoot, actions.any_key) == (False, False, False)
+
+    pressed.add("KEY_W")
+    world.process_user_actions()
+    assert world.actions is actions
+    assert (actions.up, actions.shoot, actions.any_key) == (True, False, True)
+
+    pressed.clear()
+    world.process_user_actions()
+    assert actions.as_dict() == {"up": False, "shoot": False, "any_key": False}
+
+
+def test_input_state():
+    world = World()
+    world.set_user_actions_map(Actions(), history=8)
+    state = world.input_state
+    pressed.clear()
+
+    pressed.add("KEY_SPACE")
+    world.process_user_actions()
+    assert state.is_down("shoot") and state.is_pressed("shoot")
+    world.process_user_actions()
+    assert state.is_down("shoot") and not state.is_pressed("shoot")
+    pressed.clear()
+    world.process_user_actions()
+    assert state.is_released("shoot") and not state.is_down("shoot")
+    for _ in range(3):
+        world.process_user_actions()
+    # Pressed 5 frames ago: inside a 6-frame buffer window, outside a 5-frame one.
+    assert state.pressed_within("shoot", 6)
+    assert not state.pressed_within("shoot", 5)
+    assert state.current == 0 and state.mask(5) == state.bits["shoot"] | state.bits["any_key"]
+    assert state.mask(100) == 0
+
+
+def test_input_state_polls_each_key_once():
+    calls = []
+
+    def poll(key):
+        calls.append(key)
+        return key == "A"
+
+    state = InputState([("jump", poll, ("A", "B")), ("confirm", poll, ("A",)), ("idle", lambda: True, ())])
+    assert state.poll() == state.bits["jump"] | state.bits["confirm"] | state.bits["idle"]
+    assert calls == ["A", "B"]
+
+
+class CountFrames(System):
+    def process(self):
+        self.world.elapsed += self.world.dt
+
+
+def test_run_headless():
+    world = World()
+    world.add_scenes(["scene1"])
+    world.add_system(CountFrames, 0)
+    world.add_screen(Screen1, 0)
+    world.current_scene = "scene1"
+    world.elapsed = 0.0
+
+    assert world.run_headless(120, dt=0.5) == 120
+    assert world.frame == 120
+    assert world.elapsed == 60.0
+
+    world.run_headless(3, dt=0.01, pace=True)
+    assert world.frame == 123
+
+
+calls = []
+
+
+class Record(System):
+    def process(self):
+        calls.append(("system", self.priority))
+
+
+class Draw(Screen):
+    def draw(self):
+        calls.append(("screen", self.priority))
+
+
+class Fire(Event):
+    def _Event__process(self):
+        calls.append(("event", self.priority))
+
+
+def test_scene_dispatch():
+    calls.clear()
+    fire = []
+    world = World()
+    world.add_scenes(["title", "game"])
+    world.add_system_to_scenes(Record, "game", 1)
+    world.add_screen_to_scenes(Draw, ["title", "game"], 0)
+    world.add_event_to_scene(Fire, "game", lambda: bool(fire), 2)
+    world.current_scene = "title"
+    world.process()
+    world.process_screens()
+    assert calls == [("screen", 0)]
+
+    calls.clear()
+    world.current_scene = "game"
+    world.process()
+    assert calls == [("system", 1)]
+    fire.append(1)
+    world.process()
+    assert calls == [("system", 1), ("system", 1), ("event", 2)]
+    # The run flag is reset once the event has run.
+    assert world.scene_manager.scenes_events["game"][Fire].run == 0
+    assert world.scene_manager.scenes_events["game"][Fire]["run"] == 0
+
+    # Registrations rebuild the dispatch tables of the scene.
+    calls.clear()
+    world.add_system_to_scenes(Record, "game", 0)
+    world.process_systems()
+    assert calls == [("system", 0), ("system", 1)]
+
+
 if __name__ == "__main__":
     test_systems()
     test_entity_id()
     test_component()
+    test_user_actions()
+    test_input_state()
+    test_input_state_polls_each_key_once()
+    test_run_headless()
+    test_scene_dispatch()
@@ -4,11 +4,28 @@ and `System`, `Screen`, `Event` classes which are the base systems
 in the context of ECS (Entity Component System).
 """
 
+import random
 from typing import Type
-from dataclasses import dataclass, asdict, field, make_dataclass
+from contextlib import contextmanager
+from time import perf_counter, perf_counter_ns, sleep
+from dataclasses import dataclass, asdict
 from .scene import SceneManager
 from abc import ABCMeta, abstractmethod
-from .action import ActionMap
+from .action import ActionMap, ActionResults, InputState, make_action_results_type
+from .storage import Storage, DefaultStorage, check_columns, components_from_columns
+from .columnar import is_columnar
+from .query import CachedQuery, Query
+from .spatial import SpatialGrid
+from .collision import sweep_pairs
+from .entity import EntityAllocator
+from .command import CommandBuffer
+from .profiler import Profiler
+from .replay import InputLog
+from .schedule import Schedule
+from .executor import ParallelExecutor
+from .registry import PriorityRegistry
+from .snapshot import SnapshotFile, apply_state, capture_world, dump_world, row_orders, unpack_state
+from .rollback import RollbackBuffer
 
 
 @dataclass
@@ -19,6 +36,13 @@ class Component(metaclass=ABCMeta):
 class System(metaclass=ABCMeta):
     """System is a class which has a process method. The process method is executed every frame."""
 
+    # Set by `World.add_system_to_scenes`. None runs the system once per frame.
+    schedule: Schedule | None = None
+    # Component types read and written by `process`, used by `ParallelExecutor`.
+    # None (undeclared) means the system may access anything.
+    reads: tuple[type, ...] | None = None
+    writes: tuple[type, ...] | None = None
+
     def __init__(self, world, priority: int = 0, **kwargs) -> None:
         """System is a class which has a process method. The process method is executed every frame.
 
@@ -58,17 +82,50 @@ class Event(System, metaclass=ABCMeta):
         super().__init__(world, priority, **kwargs)
 
     def process(self):
-        if self.world.scene_manager.scenes_events[self.world.current_scene][type(self)]["run"] != 1:
+        state = self.world.scene_manager.scenes_events[self.world.current_scene][type(self)]
+        if state.run != 1:
             return
 
         self.__process()
-        self.world.scene_manager.scenes_events[self.world.current_scene][type(self)]["run"] = 0
+        state.run = 0
 
     @abstractmethod
     def __process(self):
         pass
 
 
+def _enabled_items(table: dict, scene: str) -> tuple:
+    """Return the enabled items of a scene in a table of registries."""
+    registry = table.get(scene)
+    return () if registry is None else tuple(registry.enabled())
+
+
+class _ScenePlan:
+    """Dispatch tables of a scene, compiled by `World` when its systems, screens or events change."""
+
+    __slots__ = ("scene", "systems", "system_calls", "scheduled", "screens", "screen_calls", "events", "event_calls")
+
+    def __init__(self, world, scene: str) -> None:
+        self.scene = scene
+        self.systems = _enabled_items(world.scene_systems, scene)
+        self.system_calls = tuple(system.process for system in self.systems)
+        self.scheduled = any(system.schedule is not None for system in self.systems)
+        self.screens = _enabled_items(world.scene_screens, scene)
+        self.screen_calls = tuple(screen.draw for screen in self.screens)
+        self.events = _enabled_items(world.scene_events, scene)
+        # tuple: run flag of the event in the scene, callable run when the flag is set.
+        # Events overriding `process` keep handling the flag themselves (flag None).
+        states = world.scene_manager.get_scene_events(scene) or {}
+        event_calls = []
+        for event in self.events:
+            state = states.get(type(event))
+            if state is not None and type(event).process is Event.process:
+                event_calls.append((state, event._Event__process))
+            else:
+                event_calls.append((None, event.process))
+        self.event_calls = tuple(event_calls)
+
+
 class Screen(metaclass=ABCMeta):
     """Screen is a class which has a draw method.
     The draw method is executed every frame.
@@ -95,36 +152,87 @@ class Screen(metaclass=ABCMeta):
 class World(metaclass=ABCMeta):
     """World is a class which has entities, components, systems, screens."""
 
-    def __init__(self):
+    def __init__(self, storage: Storage | None = None):
         """World is a class which has entities, components, systems, screens.
         It is the core of the game.
+
+        Parameters
+        ----------
+        storage : Storage | None, optional
+            component storage backend, by default None which uses `DefaultStorage`.
+            Pass `ArchetypeStorage()` to group entities by their set of component types,
+            which makes multi-component queries over many entities cheaper.
         """
-        self.components = {}
-        self.entities = {}
-        self.__next_entity_id = 0
-        self.scene_systems: dict[list[System]] = {}
-        self.scene_screens: dict[list[Screen]] = {}
-        self.scene_events: dict[list[Event]] = {}
-        self._get_component_cache = {}
-        self._get_components_cache = {}
+        self.storage = storage if storage is not None else DefaultStorage()
+        self.entity_allocator = EntityAllocator()
+        self.scene_systems: dict[str, PriorityRegistry] = {}
+        self.scene_screens: dict[str, PriorityRegistry] = {}
+        self.scene_events: dict[str, PriorityRegistry] = {}
+        self._scene_plans: dict[str, _ScenePlan] = {}
+        self._scene_plan: _ScenePlan | None = None
+        self._get_component_cache: dict[type, CachedQuery] = {}
+        self._get_components_cache: dict[tuple, CachedQuery] = {}
+        self._cached_queries: dict[type, list[CachedQuery]] = {}
+        self._queries: list[Query] = []
+        self._batch: dict[int, set] | None = None
+        self.commands = CommandBuffer(self)
+        self.flush_commands_per_system = False
+        self.executor: ParallelExecutor | None = None
+        self.profiler = Profiler()
         self.user_input_event_map = None
+        self.actions: ActionResults | None = None
+        self.input_state: InputState | None = None
+        self._input_log: InputLog | None = None
+        self._input_replay = None
+        self.rollback: RollbackBuffer | None = None
+        self._rollback_rng = None
         self.scene_manager = SceneManager()
+        self.dt = 1 / 60
+        self.frame = 0
 
     def create_entity(self, id: int = None):
         """Create an entity.
 
+        Ids of removed entities are recycled with an incremented generation,
+        so an id kept after its entity was removed never refers to a new entity.
+
+        Parameters
+        ----------
+        id : int, optional
+            entity id to be used, by default None which allocates a new id.
+            It must not be used by a live entity.
+
         Returns
         -------
         _type_
             int: entity id
         """
         if id is None:
-            entity = self.__next_entity_id
-            self.__next_entity_id += 1
-        else:
-            entity = id
-            self.__next_entity_id = id + 1
-        return entity
+            return self.entity_allocator.allocate()
+        return self.entity_allocator.reserve(id)
+
+    def is_alive(self, entity: int) -> bool:
+        """Check if an entity id refers to a live entity.
+
+        Parameters
+        ----------
+        entity : int
+            entity id
+
+        Returns
+        -------
+        _type_
+            bool: True if the entity is alive, False if it has been removed or never created.
+        """
+        return self.entity_allocator.is_alive(entity)
+
+    def _ensure_alive(self, entity: int) -> None:
+        """Create the entity if it has not been created yet. Raise ValueError for a removed entity."""
+        if self.entity_allocator.is_alive(entity):
+            return
+        if self.entity_allocator.is_stale(entity):
+            raise ValueError(f"entity {entity} has been removed")
+        self.entity_allocator.reserve(entity)
 
     def add_component_to_entity(
         self, entity: int, component_type: Type[Component], **kwargs
@@ -143,18 +251,73 @@ class World(metaclass=ABCMeta):
         component : Component
             component to be added
         """
+        self._ensure_alive(entity)
         component = component_type(**kwargs)
-        if component_type not in self.components:
-            self.components[component_type] = set()
+        if self.storage.add_component(entity, component_type, component):
+            self._update_component_cache(entity, component_type)
+
+    def spawn_batch(self, n: int, components: dict) -> range | list[int]:
+        """Create `n` entities which have the same component types in one pass.
 
-        if entity not in self.entities:
-            self.entities[entity] = {}
+        ```python
+        world.spawn_batch(1000, {
+            Position: {"x": xs, "y": ys},             # field columns
+            Velocity: {"x": 0, "y": 0},               # a single value is shared by every entity
+            Movable: lambda i: Movable(speed=1 + i % 3),  # factory called with 0..n-1
+            CpEnemy: None,                            # default constructed
+        })
+        ```
 
-        self.components[component_type].add(entity)
-        self.entities[entity].setdefault(component_type, component)
+        Parameters
+        ----------
+        n : int
+            number of entities
+        components : dict
+            component type -> field name -> column (sequence of `n` values or a single value),
+            a factory called with the index of the entity in the batch, a sequence of `n` components,
+            or None to construct the component with its default values.
+            Columns of columnar components are copied into the NumPy columns directly.
+            Every spec is checked before any entity is created.
+
+        Returns
+        -------
+        _type_
+            range | list[int]: ids of the created entities, whose indices are contiguous.
+            A range unless the reused indices are at different generations.
 
-        # Clear cache when a component is added
-        self.clear_component_cache()
+        Raises
+        ------
+        ValueError
+            if a sequence or a column does not have `n` values.
+        TypeError
+            if a column is not a field of the component type, or a field without default value is missing.
+        """
+        batch = {}
+        for component_type, spec in components.items():
+            if spec is None:
+                spec = [component_type() for _ in range(n)]
+            elif isinstance(spec, dict):
+                if is_columnar(component_type):
+                    # Columnar pools copy whole columns, so they need a value for every field.
+                    spec = check_columns(component_type, spec, n, fill_defaults=True)
+                else:
+                    # Built before allocating the ids, so a failing constructor leaves the world unchanged.
+                    spec = components_from_columns(component_type, check_columns(component_type, spec, n), n)
+            elif callable(spec):
+                spec = [spec(i) for i in range(n)]
+            elif len(spec) != n:
+                raise ValueError(f"{len(spec)} {component_type.__name__} components given for {n} entities")
+            batch[component_type] = spec
+        entities = self.entity_allocator.allocate_block(n)
+        try:
+            self.storage.add_entities(entities, batch)
+        except Exception:
+            # e.g. a columnar type in a storage which does not support it
+            for entity in entities:
+                self.entity_allocator.release(entity)
+            raise
+        self._invalidate_component_cache(*batch)
+        return entities
 
     def get_entity_object(self, entity: int) -> dict | None:
         """Get entity object.
@@ -171,9 +334,7 @@ class World(metaclass=ABCMeta):
                 key: component type
                 value: component
         """
-        if entity not in self.entities:
-            return None
-        return self.entities[entity]
+        return self.storage.get_entity_object(entity)
 
     def _get_component(self, component_type: Type[Component]):
         """Get component.
@@ -188,8 +349,7 @@ class World(metaclass=ABCMeta):
         _type_
             tuple: entity id, component
         """
-        for entity in self.components.get(component_type):
-            yield entity, self.entities[entity][component_type]
+        return self.storage.iter_component(component_type)
 
     def get_component(self, component_type: Type[Component]):
         """Get component.
@@ -204,11 +364,12 @@ class World(metaclass=ABCMeta):
         _type_
             list: list of tuple: entity id, component
         """
-        cache_key = component_type
-        if cache_key not in self._get_component_cache:
-            self._get_component_cache[cache_key] = list(self._get_component(component_type))
-
-        return self._get_component_cache[cache_key]
+        cached = self._get_component_cache.get(component_type)
+        if cached is None:
+            cached = CachedQuery((component_type,), list(self._get_component(component_type)), single=True)
+            self._get_component_cache[component_type] = cached
+            self._cached_queries.setdefault(component_type, []).append(cached)
+        return cached.result()
 
     def _get_components(self, *component_types: list[Type[Component]]):
         """Get components.
@@ -218,8 +379,7 @@ class World(metaclass=ABCMeta):
         _type_
             tuple: entity id, list of components
         """
-        for entity in set.intersection(*[self.components[ct] for ct in component_types]):
-            yield entity, [self.entities[entity][ct] for ct in component_types]
+        return self.storage.iter_components(*component_types)
 
     def get_components(self, *component_types: list[Type[Component]]):
         """Get components.
@@ -230,16 +390,257 @@ class World(metaclass=ABCMeta):
             list: list of tuple: entity id, list of components
         """
         cache_key = tuple(component_types)
-        if cache_key not in self._get_components_cache:
-            self._get_components_cache[cache_key] = list(self._get_components(*component_types))
-        return self._get_components_cache[cache_key]
+        cached = self._get_components_cache.get(cache_key)
+        if cached is None:
+            cached = CachedQuery(cache_key, list(self._get_components(*component_types)))
+            self._get_components_cache[cache_key] = cached
+            for component_type in set(cache_key):
+                self._cached_queries.setdefault(component_type, []).append(cached)
+        return cached.result()
+
+    def add_query(self, query: Query) -> Query:
+        """Register a query. Its rows are computed once and then kept up to date as entities change.
+
+        Parameters
+        ----------
+        query : Query
+            query to be registered
+
+        Returns
+        -------
+        _type_
+            Query: the registered query, which can be iterated in systems every frame.
+        """
+        if query in self._queries:
+            return query
+        query.rebuild(self.storage)
+        self._queries.append(query)
+        for component_type in query.types:
+            self._cached_queries.setdefault(component_type, []).append(query)
+        return query
+
+    def remove_query(self, query: Query) -> None:
+        """Stop keeping a registered query up to date.
+
+        Parameters
+        ----------
+        query : Query
+            registered query
+        """
+        if query not in self._queries:
+            return
+        self._queries.remove(query)
+        for component_type in query.types:
+            self._cached_queries[component_type].remove(query)
+
+    def add_spatial_index(
+        self, position_type: Type[Component], cell_size: float, all=(), none=(), any=(), x: str = "x", y: str = "y"
+    ) -> SpatialGrid:
+        """Register a uniform-grid spatial index of the entities having a position component.
+        Spawned and removed entities are indexed by themselves; call `refresh` of the index after entities move.
+
+        ```python
+        enemies = world.add_spatial_index(Position, cell_size=16, all=[Enemy])
+        enemies.refresh()
+        near = enemies.query_radius(player_x, player_y, 32)
+        ```
+
+        Parameters
+        ----------
+        position_type : Type[Component]
+            component type holding the position
+        cell_size : float
+            width and height of a cell, at least the size of the largest object for collision
+        all : list[Type[Component]], optional
+            other component types an indexed entity must have, by default ()
+        none : list[Type[Component]], optional
+            component types an indexed entity must not have, by default ()
+        any : list[Type[Component]], optional
+            component types an indexed entity must have at least one of, by default ()
+        x : str, optional
+            attribute of the x coordinate, by default "x"
+        y : str, optional
+            attribute of the y coordinate, by default "y"
+
+        Returns
+        -------
+        _type_
+            SpatialGrid: the registered index. Remove it with `remove_query`.
+        """
+        return self.add_query(SpatialGrid(position_type, cell_size, all, none, any, x, y))
+
+    def collide(
+        self,
+        a,
+        b,
+        size: float | tuple[float, float],
+        position: Type[Component],
+        x: str = "x",
+        y: str = "y",
+        as_array: bool | None = None,
+    ):
+        """Return every pair of overlapping entities between two groups (broad phase).
+        Two entities overlap when their positions are closer than the size on both axes,
+        i.e. two boxes of `size` anchored at their positions intersect.
+
+        ```python
+        for bullet, enemy in self.world.collide(Bullet, CpEnemy, 16, Position):
+            self.world.commands.remove_entity(bullet)
+        ```
+
+        Parameters
+        ----------
+        a : Type[Component] | list[Type[Component]] | Query
+            first group: entities having the component type(s), or the rows of a query
+        b : Type[Component] | list[Type[Component]] | Query
+            second group, same as `a`
+        size : float | tuple[float, float]
+            size of the boxes, or (width, height)
+        position : Type[Component]
+            component type holding the position. A query must include it.
+        x : str, optional
+            attribute of the x coordinate, by default "x"
+        y : str, optional
+            attribute of the y coordinate, by default "y"
+        as_array : bool | None, optional
+            whether to return a NumPy array instead of a list, by default None for an array when NumPy is installed
+
+        Returns
+        -------
+        _type_
+            np.ndarray | list[tuple[int, int]]: pairs of entity ids (entity of `a`, entity of `b`),
+            as an (n, 2) int64 array or a list of tuples.
+        """
+        width, height = size if isinstance(size, tuple) else (size, size)
+        return sweep_pairs(
+            self._collision_points(a, position, x, y),
+            self._collision_points(b, position, x, y),
+            width,
+            height,
+            as_array=as_array,
+        )
+
+    def _collision_points(self, group, position: Type[Component], x: str, y: str) -> list[tuple]:
+        """Return tuple: entity id, x, y of every entity of a group of `collide`."""
+        if isinstance(group, CachedQuery):
+            if position not in group.component_types:
+                raise ValueError(f"{group!r} does not fetch {position.__name__}")
+            k = None if group.single else group.component_types.index(position)
+            rows = group.result()
+        else:
+            component_types = (group,) if isinstance(group, type) else tuple(group)
+            if position not in component_types:
+                component_types += (position,)
+            k = component_types.index(position)
+            rows = self.get_components(*component_types)
+        points = []
+        for entity, components in rows:
+            pos = components if k is None else components[k]
+            # A position among the optional components of a query may be missing.
+            if pos is not None:
+                points.append((entity, getattr(pos, x), getattr(pos, y)))
+        return points
+
+    def get_columns(self, *component_types: list[Type[Component]]):
+        """Get the NumPy columns of columnar components (see `columnar`).
+
+        ```python
+        pos, vel = self.world.get_columns(Position, Velocity)
+        pos.x += vel.x
+        pos.x = np.clip(pos.x, 0, 240)
+        ```
+
+        Parameters
+        ----------
+        component_types : list[Type[Component]]
+            columnar component types
+
+        Returns
+        -------
+        _type_
+            Columns: entity ids which have every component type, and a `ColumnView` per component type.
+            A field read from a view is a NumPy array. Assigning it writes the values back into the world.
+        """
+        return self.storage.get_columns(*component_types)
+
+    def _update_component_cache(self, entity: int, *component_types: Type[Component]):
+        """Patch the cached queries involving the component types after the entity has changed.
+
+        Parameters
+        ----------
+        entity : int
+            entity id
+        component_types : list[Type[Component]]
+            component types which have been added to or removed from the entity
+        """
+        if self._batch is not None:
+            self._batch.setdefault(entity, set()).update(component_types)
+            return
+        entity_object = None
+        looked_up = False
+        for component_type in component_types:
+            queries = self._cached_queries.get(component_type)
+            if not queries:
+                continue
+            if not looked_up:
+                entity_object = self.storage.get_entity_object(entity)
+                looked_up = True
+            for cached in queries:
+                cached.update(entity, entity_object)
+
+    def _invalidate_component_cache(self, *component_types: Type[Component]):
+        """Drop the cached queries involving the component types. They are rebuilt when requested again."""
+        dropped = {id(cached) for ct in component_types for cached in self._cached_queries.get(ct, ())}
+        if not dropped:
+            return
+        # Registered queries are owned by the caller, so they are rebuilt instead of dropped.
+        for query in self._queries:
+            if id(query) in dropped:
+                dropped.discard(id(query))
+                query.rebuild(self.storage)
+        for cache in (self._get_component_cache, self._get_components_cache):
+            for key in [key for key, cached in cache.items() if id(cached) in dropped]:
+                del cache[key]
+        for component_type, queries in self._cached_queries.items():
+            queries[:] = [cached for cached in queries if id(cached) not in dropped]
+
+    @contextmanager
+    def batch(self):
+        """Defer cache maintenance while applying many structural changes.
+
+        Inside the block cached queries are not patched. When the block exits,
+        every changed entity is reconciled once with the queries of the types it changed.
+
+        ```python
+        with world.batch():
+            for ent in dead_entities:
+                world.remove_entity(ent)
+        ```
+        """
+        if self._batch is not None:
+            yield
+            return
+        self._batch = {}
+        try:
+            yield
+        finally:
+            changed = self._batch
+            self._batch = None
+            for entity, component_types in changed.items():
+                self._update_component_cache(entity, *component_types)
 
     def clear_component_cache(self):
         """Clear the component cache.
-        Call this method when components are added, removed, or modified.
+        Adding and removing entities or components patches the cache by itself.
+        Call this method only when the storage has been modified directly.
         """
         self._get_component_cache.clear()
         self._get_components_cache.clear()
+        self._cached_queries.clear()
+        for query in self._queries:
+            query.rebuild(self.storage)
+            for component_type in query.types:
+                self._cached_queries.setdefault(component_type, []).append(query)
 
     def component_exist(self, component_type: Type[Component]):
         """Check if component exist.
@@ -254,13 +655,7 @@ class World(metaclass=ABCMeta):
         _type_
             bool: True if component exist, False otherwise
         """
-        if component_type not in self.components:
-            return False
-
-        if len(self.components[component_type]) == 0:
-            return False
-
-        return True
+        return self.storage.count(component_type) > 0
 
     def components_exist(self, *component_types: list[Type[Component]]):
         """Check if components exist.
@@ -280,7 +675,7 @@ class World(metaclass=ABCMeta):
         component_types : list[Type[Component]]
             component types
         """
-        return len(set.intersection(*[self.components[ct] for ct in component_types])) > 0
+        return next(self.storage.iter_components(*component_types), None) is not None
 
     def add_scene(self, scene: str):
         """Add a scene to world.
@@ -329,9 +724,15 @@ class World(metaclass=ABCMeta):
             triger of event
         """
         self.scene_manager.add_scene_event(scene, event_type, triger)
+        self.clear_dispatch_cache()
 
     def add_system_to_scenes(
-        self, system_type: Type[System], scenes: list[str] | str, priority: int = 0, **kwargs
+        self,
+        system_type: Type[System],
+        scenes: list[str] | str,
+        priority: int = 0,
+        schedule: Schedule | None = None,
+        **kwargs,
     ):
         """Add a system to scenes of world. Be sure you have added scenes before adding systems.
 
@@ -344,25 +745,58 @@ class World(metaclass=ABCMeta):
             scenes where the system is executed, by default None
         priority : int, optional
             system with its lower priority than the other systems is executed in advance., by default 0
+        schedule : Schedule | None, optional
+            how often the system runs (e.g. `EveryNFrames(6)`, `FixedRate(10)`, `OnDemand()`),
+            by default None to run it every frame
         """
         system_type: Type[System]
         system = system_type(self, priority, **kwargs)
+        if schedule is not None:
+            system.schedule = schedule
+        self._register(self.scene_systems, [system], scenes)
 
-        if type(scenes) == str:
-            scene = scenes
-            if self.scene_systems.get(scene) is None:
-                self.scene_systems.update({scene: []})
-            self.scene_systems[scene].append(system)
-            self.scene_systems[scene] = sorted(self.scene_systems[scene], key=lambda x: x.priority)
-            return
+    def add_systems_to_scenes(self, system_types: list, scenes: list[str] | str):
+        """Add many systems to scenes of world at once. Be sure you have added scenes before adding systems.
 
-        for scene in scenes:
-            if self.scene_systems.get(scene) is None:
-                self.scene_systems.update({scene: []})
-            self.scene_systems[scene].append(system)
-            self.scene_systems[scene] = sorted(self.scene_systems[scene], key=lambda x: x.priority)
+        ```python
+        world.add_systems_to_scenes([SysMovement, (SysAI, 1), (SysSpawn, 2, {"rate": 3})], ["level1", "level2"])
+        ```
+
+        Parameters
+        ----------
+        system_types : list[Type[System] | tuple]
+            types of systems to be added, or tuple: type, priority (, dict of keyword arguments).
+            One instance of each system is created and shared by the scenes.
+        scenes : list[str] | str
+            scenes where the systems are executed
+        """
+        self._register(self.scene_systems, self._instantiate(system_types), scenes)
+
+    def _instantiate(self, types: list) -> list:
+        """Create the systems or screens of a bulk registration."""
+        items = []
+        for entry in types:
+            if isinstance(entry, type):
+                items.append(entry(self, 0))
+            else:
+                item_type, priority, *kwargs = entry
+                items.append(item_type(self, priority, **(kwargs[0] if kwargs else {})))
+        return items
 
-    def add_system(self, system_type: Type[System], priority: int = 0, **kwargs) -> None:
+    def _register(self, table: dict, items: list, scenes: list[str] | str):
+        """Insert systems, screens or events into the priority registries of scenes."""
+        if type(scenes) == str:
+            scenes = [scenes]
+        for scene in scenes:
+            registry = table.get(scene)
+            if registry is None:
+                registry = table[scene] = PriorityRegistry()
+            registry.extend(items)
+        self.clear_dispatch_cache()
+
+    def add_system(
+        self, system_type: Type[System], priority: int = 0, schedule: Schedule | None = None, **kwargs
+    ) -> None:
         """Add a system to all scenes of world. Be sure you have added scenes before adding systems.
 
         Parameters
@@ -371,9 +805,11 @@ class World(metaclass=ABCMeta):
             system to be added
         priority : int, optional
             system with its lower priority than the other systems is executed in advance., by default 0
+        schedule : Schedule | None, optional
+            how often the system runs, by default None to run it every frame
         """
         scenes = self.scenes
-        self.add_system_to_scenes(system_type, scenes, priority, **kwargs)
+        self.add_system_to_scenes(system_type, scenes, priority, schedule, **kwargs)
 
     def add_screen_to_scenes(
         self, screen_type: Type[Screen], scenes: list[str] | str, priority: int = 0, **kwargs
@@ -392,20 +828,20 @@ class World(metaclass=ABCMeta):
         """
 
         screen = screen_type(self, priority, **kwargs)
+        self._register(self.scene_screens, [screen], scenes)
 
-        if type(scenes) == str:
-            scene = scenes
-            if self.scene_screens.get(scene) is None:
-                self.scene_screens.update({scene: []})
-            self.scene_screens[scene].append(screen)
-            self.scene_screens[scene] = sorted(self.scene_screens[scene], key=lambda x: x.priority)
-            return
+    def add_screens_to_scenes(self, screen_types: list, scenes: list[str] | str):
+        """Add many screens to scenes of world at once. Be sure you have added scenes before adding screens.
 
-        for scene in scenes:
-            if self.scene_screens.get(scene) is None:
-                self.scene_screens.update({scene: []})
-            self.scene_screens[scene].append(screen)
-            self.scene_screens[scene] = sorted(self.scene_screens[scene], key=lambda x: x.priority)
+        Parameters
+        ----------
+        screen_types : list[Type[Screen] | tuple]
+            types of screens to be added, or tuple: type, priority (, dict of keyword arguments).
+            One instance of each screen is created and shared by the scenes.
+        scenes : list[str] | str
+            scenes where the screens are drawn
+        """
+        self._register(self.scene_screens, self._instantiate(screen_types), scenes)
 
     def add_screen(self, screen_type: Type[Screen], priority: int = 0, **kwargs) -> None:
         """Add a screen to all scenes of world. Be sure you have added scenes before adding screens.
@@ -439,37 +875,80 @@ class World(metaclass=ABCMeta):
             event with its lower priority than the other events is executed in advance., by default 0
         """
         event = event_type(self, priority, **kwargs)
-
-        if self.scene_events.get(scene) is None:
-            self.scene_events.update({scene: []})
-
         self.add_scene_event_transition(scene, event_type, triger)
-        self.scene_events[scene].append(event)
-        self.scene_events[scene] = sorted(self.scene_events[scene], key=lambda x: x.priority)
+        self._register(self.scene_events, [event], scene)
 
-    def add_event(self, event_type: Type[Event], priority: int = 0, **kwargs):
+    def add_event(self, event_type: Type[Event], triger: callable, priority: int = 0, **kwargs):
         """Add an event to all scenes of world. Be sure you have added scenes before adding events.
 
         Parameters
         ----------
         event_type : Type[Event]
             type of event to be added. It must be a type of subclass of Event.
-            Event instance is created automatically.
+            An Event instance is created automatically for each scene.
+        triger : callable
+            triger of event. It must be a callable object.
         priority : int, optional
             event with its lower priority than the other events is executed in advance., by default 0
         """
-        scenes = self.scenes
-        self.add_event_to_scene(event_type, scenes, priority, **kwargs)
+        for scene in list(self.scenes):
+            self.add_event_to_scene(event_type, scene, triger, priority, **kwargs)
 
     def process_systems(self):
         """Process all systems in the current scene of world.
         Be sure you have added scenes before processing systems.
+
+        Changes queued in `commands` are applied after every system has run,
+        or after each system when `flush_commands_per_system` is True.
+        A system with a schedule runs as many times as its schedule decides (possibly 0).
+        With an `executor`, systems which declare `reads` / `writes` run concurrently
+        and commands are applied once after every system has run.
         """
-        if self.scene_systems.get(self.current_scene) is None:
+        plan = self._current_scene_plan()
+        systems = plan.systems
+        if self.executor is not None and self.executor.run(self, systems):
+            self.commands.flush()
+            return
+        if not (plan.scheduled or self.profiler.enabled or self.flush_commands_per_system):
+            for process in plan.system_calls:
+                process()
+            self.commands.flush()
             return
-        for system in self.scene_systems[self.current_scene]:
+        profiler = self.profiler if self.profiler.enabled else None
+        for system in systems:
             system: System
-            system.process()
+            runs = 1 if system.schedule is None else system.schedule.runs(self)
+            for _ in range(runs):
+                if profiler is None:
+                    system.process()
+                else:
+                    start = perf_counter_ns()
+                    system.process()
+                    profiler.record("system", type(system).__qualname__, start, perf_counter_ns())
+            if runs and self.flush_commands_per_system:
+                self.commands.flush()
+        self.commands.flush()
+
+    def _current_scene_plan(self) -> _ScenePlan:
+        """Return the dispatch tables of the current scene, compiling them if needed."""
+        scene = self.scene_manager.current_scene
+        plan = self._scene_plan
+        if plan is not None and plan.scene == scene:
+            return plan
+        plan = self._scene_plans.get(scene)
+        if plan is None:
+            plan = _ScenePlan(self, scene)
+            self._scene_plans[scene] = plan
+        self._scene_plan = plan
+        return plan
+
+    def clear_dispatch_cache(self):
+        """Clear the per-scene dispatch tables used by `process_systems`, `process_screens` and `process_events`.
+        Adding and removing systems, screens and events clears them by itself.
+        Call this method only when `scene_systems`, `scene_screens` or `scene_events` have been modified directly.
+        """
+        self._scene_plans.clear()
+        self._scene_plan = None
 
     def process_user_actions(self):
         """Process checking all user actions happened in a frame.
@@ -483,30 +962,76 @@ class World(metaclass=ABCMeta):
         """Draw all screens in the current scene of world.
         Be sure you have added scenes before drawing screens.
         """
-        if self.scene_screens.get(self.current_scene) is None:
+        plan = self._current_scene_plan()
+        if self.profiler.enabled:
+            self.profiler.run("screen", plan.screens, "draw")
             return
-        for screen in self.scene_screens[self.current_scene]:
-            screen: Screen
-            screen.draw()
+        for draw in plan.screen_calls:
+            draw()
 
     def process_events(self):
         """Process all events in the current scene of world.
         Be sure you have added scenes before processing events.
         """
-        if self.scene_events.get(self.current_scene) is None:
+        plan = self._current_scene_plan()
+        if self.profiler.enabled:
+            self.profiler.run("event", plan.events, "process")
             return
-        for event in self.scene_events[self.current_scene]:
-            event: Event
-            event.process()
+        for state, run in plan.event_calls:
+            if state is None:
+                run()
+            elif state.run == 1:
+                run()
+                state.run = 0
 
     def process(self):
         """Process all systems, screens, events in the current scene of world.
         Be sure you have added scenes before processing.
         """
+        rollback = self.rollback
+        if rollback is not None:
+            self.save_rollback_state()
         self.process_user_actions()
+        if rollback is not None and self.input_state is not None:
+            rollback.set_input(self.frame, self.input_state.current)
         self.process_systems()
         self.scene_manager.process()
         self.process_events()
+        self.frame += 1
+
+    def run_headless(self, frames: int, dt: float | None = None, pace: bool = False) -> int:
+        """Process frames at a fixed timestep without any game engine: screens are never drawn.
+        It is meant for server-side simulation, training rollouts and benchmarks.
+
+        Parameters
+        ----------
+        frames : int
+            number of frames to process
+        dt : float | None, optional
+            timestep in seconds set to `dt`, by default None to keep the current one (1/60)
+        pace : bool, optional
+            whether to sleep so that frames are processed in real time, by default False to run as fast as possible
+
+        Returns
+        -------
+        _type_
+            int: number of processed frames
+        """
+        if dt is not None:
+            self.dt = dt
+        process = self.process
+        if not pace:
+            for _ in range(frames):
+                process()
+            return frames
+        deadline = perf_counter()
+        for _ in range(frames):
+            process()
+            deadline += self.dt
+            delay = deadline - perf_counter()
+            if delay > 0:
+                sleep(delay)
+        return frames
 
     def has_component(self, entity: int, component_type: Type[Component]):
         """Check if an entity has a component.
@@ -523,7 +1048,7 @@ class World(metaclass=ABCMeta):
         _type_
             bool: True if the entity has the component, False otherwise
         """
-        return component_type in self.entities[entity]
+        return self.storage.has_component(entity, component_type)
 
     def has_components(self, entity: int, *component_types: list[Type[Component]]):
         """Check if an entity has components.
@@ -550,17 +1075,27 @@ class World(metaclass=ABCMeta):
         _type_
             bool | None: True if the entity is removed, None if the entity does not exist
         """
-        if entity not in self.entities:
-            return None
-
-        for component_type in self.entities[entity]:
-            self.components[component_type].remove(entity)
+        removed = self.storage.remove_entity(entity)
+        released = self.entity_allocator.release(entity)
+        if removed is None:
+            return True if released else None
 
-        del self.entities[entity]
-        self.clear_component_cache()
+        self._update_component_cache(entity, *removed)
         return True
 
-    def remove_system_from_scene(self, system_type: Type[System], scenes: list[str] | str):
+    def _unregister(self, table: dict, item_type: type, scenes) -> int:
+        """Remove every item of a type from the registries of scenes, all scenes if `scenes` is None."""
+        if type(scenes) == str:
+            scenes = [scenes]
+        registries = table.values() if scenes is None else [table[scene] for scene in scenes if scene in table]
+        removed = 0
+        for registry in registries:
+            removed += len(registry.remove_type(item_type))
+        if removed:
+            self.clear_dispatch_cache()
+        return removed
+
+    def remove_system_from_scene(self, system_type: Type[System], scenes: list[str] | str) -> int:
         """Remove a system from scenes of world.
 
         Parameters
@@ -569,36 +1104,30 @@ class World(metaclass=ABCMeta):
             type of system to be removed
         scenes : list[str] | str
             scenes where the system is removed
-        """
-        if type(scenes) == str:
-            scenes = [scenes]
 
-        for scene in scenes:
-            if self.scene_systems.get(scene) is None:
-                assert "scene not found!"
-                continue
-            for system in self.scene_systems[scene]:
-                if Type[System] is system_type:
-                    self.scene_systems[scene].remove(system)
+        Returns
+        -------
+        _type_
+            int: number of removed system instances
+        """
+        return self._unregister(self.scene_systems, system_type, scenes)
 
-    def remove_system(self, system_type: Type[System]):
+    def remove_system(self, system_type: Type[System]) -> int:
         """Remove a system from all scenes of world.
 
         Parameters
         ----------
         system_type : Type[System]
             type of system to be removed
+
+        Returns
+        -------
+        _type_
+            int: number of removed system instances
         """
-        scenes = self.scenes
-        for scene in scenes:
-            if self.scene_systems.get(scene) is None:
-                assert "scene not found!"
-                continue
-            for system in self.scene_systems[scene]:
-                if Type[System] is system_type:
-                    self.scene_systems[scene].remove(system)
+        return self._unregister(self.scene_systems, system_type, None)
 
-    def remove_screen_from_scene(self, screen_type: Type[Screen], scenes: list[str] | str):
+    def remove_screen_from_scene(self, screen_type: Type[Screen], scenes: list[str] | str) -> int:
         """Remove a screen from scenes of world.
 
         Parameters
@@ -607,20 +1136,31 @@ class World(metaclass=ABCMeta):
             type of screen to be removed
         scenes : list[str] | str
             scenes where the screen is removed
+
+        Returns
+        -------
+        _type_
+            int: number of removed screen instances
         """
-        if type(scenes) == str:
-            scenes = [scenes]
+        return self._unregister(self.scene_screens, screen_type, scenes)
 
-        for scene in scenes:
-            if self.scene_screens.get(scene) is None:
-                assert "scene not found!"
-                continue
-            for screen in self.scene_screens[scene]:
-                if Type[Screen] is screen_type:
-                    self.scene_screens[scene].remove(screen)
+    def remove_screen(self, screen_type: Type[Screen]) -> int:
+        """Remove a screen from all scenes of world.
+
+        Parameters
+        ----------
+        screen_type : Type[Screen]
+            type of screen to be removed
 
-    def remove_event_from_scene(self, event_type: Type[Event], scenes: list[str] | str):
-        """Remove an event from scenes of world.
+        Returns
+        -------
+        _type_
+            int: number of removed screen instances
+        """
+        return self._unregister(self.scene_screens, screen_type, None)
+
+    def remove_event_from_scene(self, event_type: Type[Event], scenes: list[str] | str) -> int:
+        """Remove an event and its triger from scenes of world.
 
         Parameters
         ----------
@@ -628,17 +1168,71 @@ class World(metaclass=ABCMeta):
             type of event to be removed
         scenes : list[str] | str
             scenes where the event is removed
+
+        Returns
+        -------
+        _type_
+            int: number of removed event instances
         """
         if type(scenes) == str:
             scenes = [scenes]
-
         for scene in scenes:
-            if self.scene_events.get(scene) is None:
-                assert "scene not found!"
-                continue
-            for event in self.scene_events[scene]:
-                if Type[Event] is event_type:
-                    self.scene_events[scene].remove(event)
+            self.scene_manager.remove_scene_event(scene, event_type)
+        return self._unregister(self.scene_events, event_type, scenes)
+
+    def remove_event(self, event_type: Type[Event]) -> int:
+        """Remove an event and its triger from all scenes of world.
+
+        Parameters
+        ----------
+        event_type : Type[Event]
+            type of event to be removed
+
+        Returns
+        -------
+        _type_
+            int: number of removed event instances
+        """
+        return self.remove_event_from_scene(event_type, list(self.scene_events))
+
+    def set_enabled(self, item_type: type, enabled: bool, scenes: list[str] | str | None = None) -> None:
+        """Enable or disable a type of system, screen or event without removing it.
+        Disabled items are left out of the per-scene dispatch tables, so they cost nothing per frame.
+
+        ```python
+        world.set_enabled(SysEnemyAI, False)  # pause
+        world.set_enabled(SysEnemyAI, True)  # resume
+        ```
+
+        Parameters
+        ----------
+        item_type : type
+            type of system, screen or event
+        enabled : bool
+            whether items of the type run
+        scenes : list[str] | str | None, optional
+            scenes where the type is toggled, by default None for all scenes
+        """
+        if type(scenes) == str:
+            scenes = [scenes]
+        for table in (self.scene_systems, self.scene_screens, self.scene_events):
+            for scene, registry in table.items():
+                if (scenes is not None and scene not in scenes) or item_type not in registry.types():
+                    continue
+                if enabled:
+                    registry.disabled.discard(item_type)
+                else:
+                    registry.disabled.add(item_type)
+        self.clear_dispatch_cache()
+
+    def is_enabled(self, item_type: type, scene: str | None = None) -> bool:
+        """Check if a type of system, screen or event is enabled in a scene, by default the current scene."""
+        scene = self.current_scene if scene is None else scene
+        return not any(
+            item_type in table[scene].disabled
+            for table in (self.scene_systems, self.scene_screens, self.scene_events)
+            if scene in table
+        )
 
     def remove_component_from_entity(self, entity: int, component_type: Type[Component]):
         """Remove a component from an entity.
@@ -650,10 +1244,8 @@ class World(metaclass=ABCMeta):
         component_type : Type[Component]
             component type
         """
-        if component_type not in self.entities[entity]:
-            return
-        self.components[component_type].remove(entity)
-        del self.entities[entity][component_type]
+        if self.storage.remove_component(entity, component_type) is not None:
+            self._update_component_cache(entity, component_type)
 
     def remove_components_from_entity(self, entity: int, *component_types: list[Type[Component]]):
         """Remove components from an entity.
@@ -665,13 +1257,10 @@ class World(metaclass=ABCMeta):
         component_types : list[Type[Component]]
             component types
         """
-        for component_type in component_types:
-            if component_type not in self.entities[entity]:
-                continue
-            self.components[component_type].remove(entity)
-            del self.entities[entity][component_type]
+        removed = [ct for ct in component_types if self.storage.remove_component(entity, ct) is not None]
+        self._update_component_cache(entity, *removed)
 
-    def set_user_actions_map(self, action_map: Type[ActionMap]):
+    def set_user_actions_map(self, action_map: Type[ActionMap], history: int = 60):
         """Add user action definitions to the world.
 
         Parameters
@@ -679,49 +1268,360 @@ class World(metaclass=ABCMeta):
         action_map : Type[ActionMap]
             User actions map (e.g. whether mouse left button was clicked or not.) to be added.
             It must be a subclass of ActionMap.
+        history : int, optional
+            number of frames of action states kept by `input_state` for edge detection and input buffering., by default 60
         """
         event_dict = asdict(action_map)
         self.user_input_event_map = event_dict
-        events = {}
+        bindings = []
         for key, value in event_dict.items():
             if not callable(value[0]):
                 break
-            events.update({key: False})
-
-        self._set_user_actions_map(events)
+            bindings.append((key, value[0], tuple(value[1:])))
 
-    def _set_user_actions_map(self, event_results_map: dict[str, bool]):
-        """Set user input events to the world."""
-        fields = [(key, bool, field(default=value)) for key, value in event_results_map.items()]
-        event_results = make_dataclass("EventResults", fields=fields)
-        self.actions = event_results
+        # The results type is created once, then `update_user_actions` updates its instance in place.
+        self.input_state = InputState(bindings, history)
+        self.actions = make_action_results_type(self.input_state.names)()
 
     def update_user_actions(self):
         """Update user input events results.
         if the user input event happened, the result is True, otherwise False.
+        Edges and past frames are available from `input_state`.
         """
-        events = {}
-        for key, value in self.user_input_event_map.items():
-            if not callable(value[0]):
-                break
-            happened = False
-            if len(value) == 1:
-                happened = value[0]()
+        replay = self._input_replay
+        mask = None if replay is None else next(replay, None)
+        if mask is None:
+            self._input_replay = None
+            self.input_state.poll()
+        else:
+            self.input_state.push(mask)
+        if self._input_log is not None:
+            self._input_log.append(self.input_state.current)
+        self._apply_action_mask()
+
+    def _apply_action_mask(self):
+        """Write the current state of `input_state` into `actions`."""
+        actions = self.actions
+        mask = self.input_state.current
+        for key, bit in self.input_state.bits.items():
+            setattr(actions, key, mask & bit != 0)
+
+    def record_inputs(self, seed: int | None = None, seed_hook=random.seed) -> InputLog:
+        """Start recording the resolved user actions of every frame.
+        Be sure you have added user acions definitions first by `set_user_actions_map` method.
+
+        Parameters
+        ----------
+        seed : int | None, optional
+            seed of the session, by default None for a random one
+        seed_hook : callable, optional
+            called with the seed now and again when the log is replayed, by default random.seed
+
+        Returns
+        -------
+        _type_
+            InputLog: log which receives one action bitmask per processed frame
+        """
+        if self.input_state is None:
+            raise ValueError("set_user_actions_map must be called before recording user actions")
+        if seed is None:
+            seed = random.SystemRandom().getrandbits(63)
+        seed_hook(seed)
+        self._input_log = InputLog(self.input_state.names, seed)
+        return self._input_log
+
+    def stop_recording(self) -> InputLog | None:
+        """Stop recording user actions.
+
+        Returns
+        -------
+        _type_
+            InputLog | None: recorded log, None if nothing was being recorded
+        """
+        log, self._input_log = self._input_log, None
+        return log
+
+    def replay_inputs(self, log: InputLog, seed_hook=random.seed):
+        """Feed the frames of a recorded log to `process_user_actions` in place of live input.
+        Live input resumes once every frame of the log has been replayed.
+
+        Parameters
+        ----------
+        log : InputLog
+            recorded log. Its actions must be the ones of the current user actions map.
+        seed_hook : callable, optional
+            called with the seed of the log, by default random.seed
+        """
+        if self.input_state is None or log.names != self.input_state.names:
+            raise ValueError(f"the log records actions {log.names}, which are not the actions of the world")
+        seed_hook(log.seed)
+        self._input_replay = iter(log.masks)
+
+    def fast_forward(self, log: InputLog, seed_hook=random.seed) -> int:
+        """Replay a recorded log at maximum speed: every frame is processed without drawing screens.
+
+        Parameters
+        ----------
+        log : InputLog
+            recorded log. Its actions must be the ones of the current user actions map.
+        seed_hook : callable, optional
+            called with the seed of the log, by default random.seed
+
+        Returns
+        -------
+        _type_
+            int: number of processed frames
+        """
+        self.replay_inputs(log, seed_hook)
+        return self.run_headless(len(log))
+
+    def snapshot(self, rng=None) -> bytes:
+        """Serialize the entities, components, entity ids, scene state, frame and input state of the world.
+
+        Numeric fields of components are packed into arrays, other fields are pickled.
+        Restoring a snapshot unpickles it, which can run arbitrary code: never restore one from an untrusted source.
+        Systems, screens, events and queries are not part of the snapshot: they are code,
+        and the world that restores the snapshot must have them registered.
+
+        ```python
+        checkpoint = world.snapshot()
+        ...
+        world.restore(checkpoint)
+        ```
+
+        Parameters
+        ----------
+        rng : optional
+            random number generator whose state is saved too (an object with `getstate`,
+            e.g. the `random` module or a `random.Random`), by default None
+
+        Returns
+        -------
+        _type_
+            bytes: snapshot
+        """
+        return dump_world(self, rng)
+
+    def restore(self, buffer, rng=None) -> None:
+        """Replace the state of the world with a snapshot made by `snapshot`.
+
+        The storage is rebuilt with the type of the current one, registered queries and spatial indexes
+        are rebuilt, and pending commands are dropped.
+        The snapshot is unpickled, which can run arbitrary code: only restore snapshots from trusted sources.
+
+        Parameters
+        ----------
+        buffer : bytes | bytearray | memoryview
+            snapshot
+        rng : optional
+            random number generator which gets the state saved by `snapshot(rng)`, by default None
+
+        Raises
+        ------
+        ValueError
+            if the buffer is not a world snapshot.
+        """
+        self._restore(unpack_state(buffer), rng)
+
+    def _restore(self, state: dict, rng=None, adopt: bool = False, in_place: bool = False) -> None:
+        if apply_state(self, state, rng, adopt, in_place):
+            self.clear_component_cache()
+        else:
+            # Same components with other values: cached rows are still valid, spatial cells are not.
+            for query in self._queries:
+                if isinstance(query, SpatialGrid):
+                    query.refresh()
+        # Cached rows get the order they had, so that systems iterate them as they did.
+        for (kind, key), entities in row_orders(state).items():
+            if kind == "component":
+                self.get_component(key)
+                cached = self._get_component_cache[key]
+            elif kind == "components":
+                self.get_components(*key)
+                cached = self._get_components_cache[key]
+            elif key < len(self._queries):
+                cached = self._queries[key]
             else:
-                for v in value[1:]:
-                    happened = value[0](v)
-                    if happened:
-                        break
-            events.update({key: happened})
+                continue
+            cached.reorder(entities)
+        self.commands.clear()
+        if self.input_state is not None and self.actions is not None:
+            self._apply_action_mask()
+
+    def save_snapshot(self, path) -> None:
+        """Write a snapshot of the world (see `snapshot`) to a file.
+
+        Parameters
+        ----------
+        path : str | os.PathLike
+            snapshot file
+        """
+        with open(path, "wb") as file:
+            file.write(self.snapshot())
+
+    def load_snapshot(self, path) -> None:
+        """Replace the state of the world with a snapshot file written by `save_snapshot`.
+
+        The file is memory-mapped: columns of columnar components are used in place without being copied,
+        which makes loading large pre-baked levels of columnar tiles and props fast.
+        The file is unpickled, which can run arbitrary code: only load files shipped with the game
+        or written by it, never files downloaded or shared by other players.
+
+        ```python
+        level = World()
+        ... # build the level once
+        level.save_snapshot("level1.pgws")
+
+        world.load_snapshot("level1.pgws")
+        ```
+
+        Parameters
+        ----------
+        path : str | os.PathLike
+            snapshot file
+
+        Raises
+        ------
+        ValueError
+            if the file is not a world snapshot.
+        """
+        SnapshotFile(path).restore(self)
+
+    def enable_rollback(self, frames: int = 120, rng=random) -> RollbackBuffer:
+        """Keep the states of the last frames in `rollback` so that the world can `rewind`.
+
+        `process` saves the state of the world at the start of every frame, delta-compressed
+        column by column against the previous one, and the input mask processed in the frame.
+        Saving reads every field of every component: with 20,000 entities of two plain components
+        of two floats it costs about 21 ms per frame, and `rewind(10)` about 28 ms.
+
+        ```python
+        world.enable_rollback(frames=8)
+        ...
+        # the remote inputs of the last 3 frames arrived and differ from the predicted ones
+        masks = world.rewind(3)
+        world.resimulate(corrected_masks)
+        ```
+
+        Parameters
+        ----------
+        frames : int, optional
+            number of frames kept, by default 120 (2 seconds at 60 FPS)
+        rng : optional
+            random number generator saved and rewound with the world (an object with `getstate` and `setstate`),
+            by default the `random` module. None to leave random numbers out.
+
+        Returns
+        -------
+        _type_
+            RollbackBuffer: buffer of the states
+        """
+        self.rollback = RollbackBuffer(frames)
+        self._rollback_rng = rng
+        return self.rollback
+
+    def disable_rollback(self) -> None:
+        """Stop keeping states and drop the kept ones."""
+        self.rollback = None
+        self._rollback_rng = None
+
+    def save_rollback_state(self) -> None:
+        """Save the state of the current frame into `rollback`.
+        `process` calls it at the start of every frame. Call it yourself at the start of
+        every frame if your world runs the process methods one by one.
+        """
+        self.rollback.push(self.frame, capture_world(self, self._rollback_rng))
+
+    def rewind(self, k: int) -> list:
+        """Go back `k` frames: the world gets the state it had at the start of frame `frame - k`.
+        The states of the rewound frames are dropped, and a log being recorded forgets their inputs.
+        When the world has the same entities and components as then, the saved values are written
+        into the existing components, which keeps cached queries. Otherwise the storage is rebuilt as in `restore`.
+
+        Parameters
+        ----------
+        k : int
+            number of frames to go back, from 1 to the number of kept frames
+
+        Returns
+        -------
+        _type_
+            list: input masks processed in the rewound frames, oldest first (None when unknown).
+            Pass them, or corrected ones, to `resimulate`.
+
+        Raises
+        ------
+        ValueError
+            if rollback is not enabled or `k` is less than 1.
+        KeyError
+            if the state of frame `frame - k` is not kept.
+        """
+        if self.rollback is None:
+            raise ValueError("enable_rollback must be called before rewinding")
+        if k < 1:
+            raise ValueError(f"k must be at least 1, got {k}")
+        target = self.frame - k
+        masks = self.rollback.inputs(target, self.frame)
+        state = self.rollback.discard_after(target)
+        self._restore(state, self._rollback_rng, in_place=True)
+        self._input_replay = None
+        if self._input_log is not None:
+            del self._input_log.masks[max(len(self._input_log) - k, 0):]
+        return masks
+
+    def resimulate(self, masks: list) -> int:
+        """Process one frame per input mask without drawing screens, the masks replacing live input
+        (see `replay_inputs`). Live input resumes at the first None mask.
+
+        Parameters
+        ----------
+        masks : list
+            input masks, e.g. returned by `rewind`
 
-        self._set_user_actions_map(events)
+        Returns
+        -------
+        _type_
+            int: number of processed frames
+        """
+        if self.input_state is not None:
+            self._input_replay = iter(masks)
+        return self.run_headless(len(masks))
 
     def set_next_entity_id(self, id: int):
-        self.__next_entity_id = id
+        """Make the next `create_entity` call return the given id.
+
+        Parameters
+        ----------
+        id : int
+            entity id. It must not be used by a live entity.
+        """
+        self.entity_allocator.set_next(id)
 
     def set_next_scene(self, scene: str):
         self.scene_manager.next_scene = scene
 
+    @property
+    def entities(self):
+        """Return entities of world.
+
+        Returns
+        -------
+        _type_
+            dict[int, dict]: entity id -> dict of component type -> component
+        """
+        return self.storage.entities
+
+    @property
+    def components(self):
+        """Return components index of world.
+
+        Returns
+        -------
+        _type_
+            dict[type, set[int]]: component type -> entity ids which have the component
+        """
+        return self.storage.components
+
     @property
     def scenes(self):
         """Return all scenes of world.
@@ -834,4 +1734,11 @@ class World(metaclass=ABCMeta):
 
     @property
     def next_entity_id(self):
-        return self.__next_entity_id
+        """Return the entity id which the next `create_entity` call returns.
+
+        Returns
+        -------
+        _type_
+            int: entity id
+        """
+        return self.entity_allocator.peek()